@@ -10,18 +10,34 @@ Example:
         --input data/clauses.jsonl \
         --output-dir data/processed/dispute_resolution/v2025.09.27 \
         --sources harvested_clauses,hf_cuad
+
+    python scripts/corpus/build_category_dataset.py \
+        --all-categories --workers 8 \
+        --input data/clauses.jsonl \
+        --output-dir "data/processed/{category}/v2025.10.16" \
+        --sources harvested_clauses
+
+Labels are cached in `data/cache/label_cache.sqlite` by default, so a rebuild
+only re-labels new or changed records; pass `--no-label-cache` to label
+everything from scratch without touching the cache. `--workers` defaults to 1.
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import re
+import shutil
 import sys
-from collections import Counter, defaultdict
-from dataclasses import dataclass
+import tempfile
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
 
 try:
     import yaml
@@ -33,9 +49,12 @@ REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:  # pragma: no cover - runtime path fix for scripts
     sys.path.insert(0, str(REPO_ROOT))
 
+from scripts.corpus.label_cache import CacheKey, LabelCache, mapping_version, record_hash
+from scripts.corpus.pattern_engine import PatternSet
 from scripts.ml.category_config import CATEGORY_REGISTRY, CategoryConfig
 
 PATTERNS_DIR = REPO_ROOT / "scripts" / "corpus" / "patterns"
+DEFAULT_LABEL_CACHE_PATH = REPO_ROOT / "data" / "cache" / "label_cache.sqlite"
 
 # Fallback patterns if YAML loading fails
 FALLBACK_LABEL_PATTERNS: Dict[str, Dict[str, Sequence[re.Pattern[str]]]] = {
@@ -105,14 +124,33 @@ class DatasetStats:
         }
 
 
+@dataclass
+class ChunkResult:
+    records: Dict[str, List[Dict[str, object]]]
+    cache_entries: List[Tuple[CacheKey, Dict[str, float]]] = field(default_factory=list)
+    cache_hits: Counter[str] = field(default_factory=Counter)
+    cache_lookups: Counter[str] = field(default_factory=Counter)
+    regex_timeouts: Counter[Tuple[str, str, str]] = field(default_factory=Counter)
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("--category", required=True, choices=sorted(CATEGORY_REGISTRY.keys()))
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--category", choices=sorted(CATEGORY_REGISTRY.keys()))
+    target.add_argument(
+        "--all-categories",
+        action="store_true",
+        help="Label the input once for every registered category and write one dataset per category",
+    )
     parser.add_argument("--input", required=True, help="Path to source JSONL with clause-level records")
     parser.add_argument(
         "--output-dir",
         required=True,
-        help="Directory where processed dataset + manifest will be written",
+        help=(
+            "Directory where processed dataset + manifest will be written. With --all-categories, "
+            "a '{category}' placeholder is substituted, otherwise the category is inserted before the "
+            "version directory (data/processed/v1 -> data/processed/<category>/v1)"
+        ),
     )
     parser.add_argument(
         "--sources",
@@ -130,6 +168,36 @@ def parse_args() -> argparse.Namespace:
         default="Automated build via scripts/corpus/build_category_dataset.py",
         help="Notes string stored in manifest",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes used to shard the input (default: 1, no pool)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=2000,
+        help="Input lines per worker task",
+    )
+    parser.add_argument(
+        "--label-cache",
+        default=str(DEFAULT_LABEL_CACHE_PATH),
+        help="SQLite label cache reused across rebuilds; only new or changed records are re-labeled",
+    )
+    parser.add_argument("--no-label-cache", action="store_true", help="Label every record from scratch")
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=0,
+        help="Split output into dataset-00000.jsonl, ... with at most this many records each (0 = single file)",
+    )
+    parser.add_argument(
+        "--match-budget-ms",
+        type=float,
+        default=None,
+        help="Abandon any single regex search that runs longer than this and report it in the manifest",
+    )
     return parser.parse_args()
 
 
@@ -213,15 +281,22 @@ def map_source_labels(
     return label_scores
 
 
-def apply_pattern_heuristics(text: str, category: str) -> Dict[str, float]:
-    results: Dict[str, float] = {}
-    patterns = get_patterns_for_category(category)
-    for label, pattern_list in patterns.items():
-        for pattern in pattern_list:
-            if pattern.search(text):
-                results[label] = max(results.get(label, 0.0), 1.0)
-                break
-    return results
+@lru_cache(maxsize=None)
+def get_pattern_set(category: str, match_budget: Optional[float] = None) -> PatternSet:
+    """Compile a category's patterns into a reusable matcher (loaded once per process).
+
+    ``match_budget`` caps each regex search in seconds; overruns are abandoned
+    and recorded on the returned set's ``timeouts`` counter.
+    """
+    return PatternSet(get_patterns_for_category(category), match_budget=match_budget)
+
+
+def apply_pattern_heuristics(
+    text: str,
+    category: str,
+    match_budget: Optional[float] = None,
+) -> Dict[str, float]:
+    return get_pattern_set(category, match_budget).scores(text)
 
 
 def build_record(
@@ -242,66 +317,325 @@ def build_record(
     }
 
 
-def summarise(records: List[Dict[str, object]], category_config: CategoryConfig) -> DatasetStats:
-    totals = Counter({label: 0 for label in category_config.label_list})
-    for record in records:
-        labels = record["labels"]
-        for label, value in labels.items():
-            if value >= 0.5:
-                totals[label] += 1
-    return DatasetStats(len(records), dict(totals))
+def extract_raw_labels(row: Dict[str, object]) -> List[str]:
+    raw_label = row.get("label")
+    if isinstance(raw_label, str):
+        return [raw_label]
+    if isinstance(raw_label, list):
+        return [str(v) for v in raw_label]
+    return []
 
 
-def main() -> None:
-    args = parse_args()
-    config = CATEGORY_REGISTRY[args.category]
-    input_path = Path(args.input)
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+def pattern_file_hash(category: str) -> str:
+    """Hash the category's pattern YAML plus everything else that shapes its labels."""
+    digest = hashlib.sha256()
+    pattern_file = PATTERNS_DIR / f"{category}.yaml"
+    if pattern_file.exists():
+        digest.update(pattern_file.read_bytes())
+    # Covers FALLBACK_LABEL_PATTERNS when no YAML is present.
+    digest.update(get_pattern_set(category).fingerprint.encode("utf-8"))
+    digest.update(json.dumps(CATEGORY_REGISTRY[category].label_list).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def cache_versions(category: str) -> Tuple[str, str]:
+    return pattern_file_hash(category), mapping_version(SOURCE_LABEL_MAP.get(category, {}))
 
-    sources = [s for s in (item.strip() for item in args.sources.split(",")) if s]
 
-    processed: List[Dict[str, object]] = []
-    for row in load_jsonl(input_path):
+_LABEL_CACHES: Dict[Tuple[int, str], LabelCache] = {}
+
+
+def _get_label_cache(path: str) -> LabelCache:
+    """Open one cache connection per process (workers reuse theirs across chunks).
+
+    Keyed by pid so a forked worker never touches a connection it inherited
+    from its parent; SQLite connections must not be used across fork().
+    """
+    key = (os.getpid(), path)
+    if key not in _LABEL_CACHES:
+        _LABEL_CACHES[key] = LabelCache(Path(path))
+    return _LABEL_CACHES[key]
+
+
+def label_lines(
+    lines: Sequence[str],
+    categories: Sequence[str],
+    min_labels: int,
+    cache_path: Optional[str] = None,
+    match_budget: Optional[float] = None,
+) -> ChunkResult:
+    """Decode a chunk of JSONL lines and label each record for every category.
+
+    When ``cache_path`` is set, labels are served from the persistent cache and
+    only misses are run through the pattern engine; new entries are returned for
+    the parent process to store. Records whose labeling hit the ``match_budget``
+    are never cached, so they are retried on the next build.
+    """
+    result = ChunkResult({category: [] for category in categories})
+    rows: List[Tuple[str, List[str], str]] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
         text = str(row.get("text", "")).strip()
         if not text:
             continue
-        raw_label = row.get("label")
-        if isinstance(raw_label, str):
-            raw_labels = [raw_label]
-        elif isinstance(raw_label, list):
-            raw_labels = [str(v) for v in raw_label]
-        else:
-            raw_labels = []
+        raw_labels = extract_raw_labels(row)
+        rows.append((text, raw_labels, record_hash(text, raw_labels) if cache_path else ""))
 
-        rule_scores = map_source_labels(raw_labels, args.category)
-        pattern_scores = apply_pattern_heuristics(text, args.category)
-        record = build_record(text, rule_scores, pattern_scores, config)
-        if record["positive_label_count"] < args.min_labels:
-            continue
-        processed.append(record)
+    cached: Dict[CacheKey, Dict[str, float]] = {}
+    if cache_path:
+        cached = _get_label_cache(cache_path).get_many(
+            (digest, category, *cache_versions(category)) for _, _, digest in rows for category in categories
+        )
+
+    for text, raw_labels, digest in rows:
+        for category in categories:
+            labels: Dict[str, float] | None = None
+            if cache_path:
+                key: CacheKey = (digest, category, *cache_versions(category))
+                result.cache_lookups[category] += 1
+                labels = cached.get(key)
+                if labels is not None:
+                    result.cache_hits[category] += 1
+            if labels is None:
+                pattern_set = get_pattern_set(category, match_budget)
+                rule_scores = map_source_labels(raw_labels, category)
+                pattern_scores = pattern_set.scores(text)
+                labels = build_record(text, rule_scores, pattern_scores, CATEGORY_REGISTRY[category])["labels"]
+                timeouts = pattern_set.drain_timeouts()
+                for (label, pattern), count in timeouts.items():
+                    result.regex_timeouts[(category, label, pattern)] += count
+                if cache_path and not timeouts:
+                    result.cache_entries.append((key, labels))
+            positives = sum(1 for value in labels.values() if value >= 0.5)
+            if positives < min_labels:
+                continue
+            result.records[category].append(
+                {"text": text, "labels": labels, "positive_label_count": positives}
+            )
+    return result
+
+
+def iter_line_chunks(path: Path, chunk_size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _label_chunk_task(
+    task: Tuple[List[str], Tuple[str, ...], int, Optional[str], Optional[float]],
+) -> ChunkResult:
+    return label_lines(*task)
+
+
+class DatasetWriter:
+    """Stream records for one category to disk while keeping running label totals.
 
-    stats = summarise(processed, config)
+    With ``shard_size`` > 0 records are split across ``dataset-00000.jsonl``,
+    ``dataset-00001.jsonl``, ... instead of a single ``dataset.jsonl``.
 
-    output_path = output_dir / "dataset.jsonl"
-    with output_path.open("w", encoding="utf-8") as handle:
-        for record in processed:
-            record = {k: v for k, v in record.items() if k != "positive_label_count"}
-            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+    Files are written to a staging directory inside ``output_dir`` and only
+    moved into place by :meth:`commit`, which also removes data files left by
+    an earlier build (the other layout, or surplus shards from a larger run).
+    A failed build calls :meth:`abort` and leaves the previous dataset intact.
+    """
+
+    def __init__(self, output_dir: Path, config: CategoryConfig, shard_size: int = 0, version: Optional[str] = None):
+        self.output_dir = output_dir
+        self.version = version or output_dir.name
+        self.config = config
+        self.shard_size = shard_size
+        self.count = 0
+        self.label_totals: Counter[str] = Counter({label: 0 for label in config.label_list})
+        # Final locations of the data files; they only exist there after commit().
+        self.paths: List[Path] = []
+        self._handle: Optional[TextIO] = None
+        self._shard_count = 0
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self._staging_dir = Path(tempfile.mkdtemp(prefix=".build-", dir=output_dir))
+
+    def _open_next(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        if self.shard_size > 0:
+            name = f"dataset-{len(self.paths):05d}.jsonl"
+        else:
+            name = "dataset.jsonl"
+        self.paths.append(self.output_dir / name)
+        self._handle = (self._staging_dir / name).open("w", encoding="utf-8")
+        self._shard_count = 0
+
+    def write(self, record: Dict[str, object]) -> None:
+        if self._handle is None or (self.shard_size > 0 and self._shard_count >= self.shard_size):
+            self._open_next()
+        for label, value in record["labels"].items():  # type: ignore[union-attr]
+            if value >= 0.5:
+                self.label_totals[label] += 1
+        record = {k: v for k, v in record.items() if k != "positive_label_count"}
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+        self._shard_count += 1
+
+    def close(self) -> DatasetStats:
+        if self._handle is None:
+            # Always leave a (possibly empty) dataset file behind.
+            self._open_next()
+        self._handle.close()
+        return DatasetStats(self.count, dict(self.label_totals))
+
+    def commit(self) -> None:
+        """Move the staged files into ``output_dir`` and drop stale data files."""
+        keep = {path.name for path in self.paths}
+        for path in self.paths:
+            os.replace(self._staging_dir / path.name, path)
+        stale = [self.output_dir / "dataset.jsonl", *self.output_dir.glob("dataset-[0-9][0-9][0-9][0-9][0-9].jsonl")]
+        for path in stale:
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+        shutil.rmtree(self._staging_dir, ignore_errors=True)
+
+    def abort(self) -> None:
+        """Discard the staged files, leaving ``output_dir`` as it was."""
+        if self._handle is not None:
+            self._handle.close()
+        shutil.rmtree(self._staging_dir, ignore_errors=True)
+
+
+def _bounded_map(
+    pool: Optional[ProcessPoolExecutor],
+    fn: Callable[..., ChunkResult],
+    tasks: Iterable[tuple],
+    max_in_flight: int,
+) -> Iterator[ChunkResult]:
+    """Ordered ``map`` that only reads ``max_in_flight`` tasks ahead of the consumer."""
+    if pool is None:
+        yield from map(fn, tasks)
+        return
+    pending: Deque[Future] = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def build_datasets(
+    input_path: Path,
+    writers: Dict[str, DatasetWriter],
+    min_labels: int,
+    workers: int,
+    chunk_size: int,
+    cache_path: Optional[Path] = None,
+    match_budget: Optional[float] = None,
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, List[Dict[str, object]]]]:
+    """Read the input once and stream labeled records into each category's writer.
+
+    Chunks are sharded across processes with a bounded look-ahead, so memory
+    stays flat regardless of corpus size. Returns per-category cache statistics
+    (empty without a label cache) and per-category runaway regex reports.
+    """
+    categories = list(writers)
+    hits: Counter[str] = Counter()
+    lookups: Counter[str] = Counter()
+    timeouts: Counter[Tuple[str, str, str]] = Counter()
+    cache_key = str(cache_path) if cache_path else None
+    cache: Optional[LabelCache] = None
+
+    chunks = iter_line_chunks(input_path, max(1, chunk_size))
+    tasks = ((chunk, tuple(categories), min_labels, cache_key, match_budget) for chunk in chunks)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # The parent's writer connection is opened only once the first chunk is back,
+        # i.e. after the pool has forked its workers.
+        for result in _bounded_map(pool, _label_chunk_task, tasks, max(2, workers * 2)):
+            if cache_key and cache is None:
+                cache = _get_label_cache(cache_key)
+            for category, records in result.records.items():
+                writer = writers[category]
+                for record in records:
+                    writer.write(record)
+            hits.update(result.cache_hits)
+            lookups.update(result.cache_lookups)
+            timeouts.update(result.regex_timeouts)
+            if cache is not None:
+                cache.put_many(result.cache_entries)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if cache_key and cache is None:  # empty input
+        cache = _get_label_cache(cache_key)
+
+    cache_stats: Dict[str, Dict[str, float]] = {}
+    if cache is not None:
+        for category in categories:
+            total = lookups[category]
+            cache_stats[category] = {
+                "lookups": total,
+                "hits": hits[category],
+                "hit_ratio": round(hits[category] / total, 4) if total else 0.0,
+            }
+
+    regex_timeouts: Dict[str, List[Dict[str, object]]] = {category: [] for category in categories}
+    for (category, label, pattern), count in timeouts.most_common():
+        regex_timeouts[category].append({"label": label, "pattern": pattern, "timeouts": count})
+    return cache_stats, regex_timeouts
+
+
+def resolve_category_output_dir(output_dir: str, category: str) -> Tuple[Path, str]:
+    """Output directory and dataset version for ``category`` in an ``--all-categories`` run.
+
+    Without a ``{category}`` placeholder the category is inserted before the
+    version directory, so ``data/processed/v1`` becomes
+    ``data/processed/<category>/v1``. The version is the last path component
+    that does not hold the placeholder.
+    """
+    template = Path(output_dir)
+    if "{category}" not in output_dir:
+        template = template.parent / "{category}" / template.name
+    version = next((part for part in reversed(template.parts) if "{category}" not in part), "")
+    return Path(str(template).replace("{category}", category)), version
+
+
+def write_metadata(
+    writer: DatasetWriter,
+    stats: DatasetStats,
+    sources: Sequence[str],
+    notes: str,
+    cache_stats: Optional[Dict[str, float]] = None,
+    regex_timeouts: Optional[List[Dict[str, object]]] = None,
+) -> None:
+    output_dir = writer.output_dir
+    config = writer.config
 
     manifest_path = output_dir / "manifest.json"
     manifest = {
         "category": config.name,
-        "version": output_dir.name,
+        "version": writer.version,
         "records": stats.count,
         "label_distribution": stats.distribution(),
-        "sources": sources,
+        "sources": list(sources),
         "qa_sample_size": 0,
         "qa_accuracy": 0.0,
         "annotators": [],
         "license": "pending",
-        "notes": args.notes,
+        "notes": notes,
     }
+    if writer.shard_size > 0:
+        manifest["shards"] = [path.name for path in writer.paths]
+    if cache_stats is not None:
+        manifest["label_cache"] = cache_stats
+    if regex_timeouts:
+        manifest["regex_timeouts"] = regex_timeouts
     with manifest_path.open("w", encoding="utf-8") as handle:
         json.dump(manifest, handle, indent=2)
 
@@ -327,10 +661,61 @@ def main() -> None:
             indent=2,
         )
 
-    print(f"Wrote {stats.count} records to {output_path}")
+    target = writer.paths[0] if len(writer.paths) == 1 else f"{len(writer.paths)} shards in {output_dir}"
+    print(f"Wrote {stats.count} records to {target}")
     print(f"Label totals: {stats.label_totals}")
     print(f"Manifest: {manifest_path}")
 
 
+def main() -> None:
+    args = parse_args()
+    input_path = Path(args.input)
+    sources = [s for s in (item.strip() for item in args.sources.split(",")) if s]
+    cache_path = None if args.no_label_cache else Path(args.label_cache)
+
+    categories = list(CATEGORY_REGISTRY.keys()) if args.all_categories else [args.category]
+    writers: Dict[str, DatasetWriter] = {}
+    for category in categories:
+        if args.all_categories:
+            output_dir, version = resolve_category_output_dir(args.output_dir, category)
+        else:
+            output_dir, version = Path(args.output_dir), None
+        writers[category] = DatasetWriter(output_dir, CATEGORY_REGISTRY[category], args.shard_size, version)
+
+    match_budget = args.match_budget_ms / 1000.0 if args.match_budget_ms else None
+    try:
+        cache_stats, regex_timeouts = build_datasets(
+            input_path,
+            writers,
+            args.min_labels,
+            args.workers,
+            args.chunk_size,
+            cache_path,
+            match_budget,
+        )
+        stats_by_category = {category: writer.close() for category, writer in writers.items()}
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        writer.commit()
+
+    for category, writer in writers.items():
+        write_metadata(
+            writer,
+            stats_by_category[category],
+            sources,
+            args.notes,
+            cache_stats.get(category),
+            regex_timeouts[category],
+        )
+        for entry in regex_timeouts[category]:
+            print(
+                f"⚠️  {category}/{entry['label']}: pattern exceeded match budget "
+                f"{entry['timeouts']}x: {entry['pattern']}"
+            )
+
+
 if __name__ == "__main__":  # pragma: no cover
     main()
@@ -0,0 +1,112 @@
+"""Persistent content-hash index shared by the corpus ingestion entry points.
+
+Texts are normalised (lowercased, whitespace collapsed) and hashed to a stable
+64-bit BLAKE2b digest, stored as the integer primary key of a SQLite table.
+Lookups are a single B-tree probe, memory stays flat regardless of corpus
+size, and the results are identical across processes and runs (unlike the
+salted built-in ``hash``).
+
+A text counts as a duplicate when it was first recorded by a different source,
+or by the same source earlier in the current run. Re-ingesting a source in a
+later run therefore reproduces its own output instead of filtering all of it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DEDUPE_INDEX_PATH = REPO_ROOT / "data" / "cache" / "dedupe_index.sqlite"
+
+COMMIT_INTERVAL = 5000
+
+
+def normalise_for_dedupe(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def content_hash64(text: str) -> int:
+    """Stable signed 64-bit hash of the normalised text (fits a SQLite INTEGER)."""
+    digest = hashlib.blake2b(normalise_for_dedupe(text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class DedupeIndex:
+    """On-disk set of content hashes annotated with the source that added them."""
+
+    def __init__(
+        self,
+        path: Union[Path, str] = DEFAULT_DEDUPE_INDEX_PATH,
+        commit_interval: Optional[int] = COMMIT_INTERVAL,
+    ):
+        """Open (or create) the index.
+
+        With ``commit_interval=None`` changes are only committed by an explicit
+        :meth:`flush`, which lets callers line commits up with their own
+        checkpoints so that an interrupted run leaves no orphaned hashes.
+        """
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.commit_interval = commit_interval
+        self.run_id = uuid.uuid4().hex
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen (
+                hash INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                run_id TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+        self._pending = 0
+        self.stats: Dict[str, int] = {"checked": 0, "cross_source": 0, "same_run": 0, "added": 0}
+
+    def check_and_add(self, text: str, source: str) -> bool:
+        """Return True if ``text`` is a duplicate; otherwise record it for ``source``."""
+        key = content_hash64(text)
+        self.stats["checked"] += 1
+        row = self.conn.execute("SELECT source, run_id FROM seen WHERE hash = ?", (key,)).fetchone()
+        if row is not None:
+            seen_source, seen_run = row
+            if seen_source != source:
+                self.stats["cross_source"] += 1
+                return True
+            if seen_run == self.run_id:
+                self.stats["same_run"] += 1
+                return True
+            # Same source re-ingested in a new run: claim it for this run.
+            self.conn.execute("UPDATE seen SET run_id = ? WHERE hash = ?", (self.run_id, key))
+        else:
+            self.conn.execute(
+                "INSERT INTO seen (hash, source, run_id) VALUES (?, ?, ?)",
+                (key, source, self.run_id),
+            )
+            self.stats["added"] += 1
+        self._pending += 1
+        if self.commit_interval and self._pending >= self.commit_interval:
+            self.flush()
+        return False
+
+    def begin_run(self, run_id: Optional[str] = None) -> str:
+        """Start a new run, or continue an interrupted one by passing its id."""
+        self.run_id = run_id or uuid.uuid4().hex
+        return self.run_id
+
+    def __len__(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0])
+
+    def flush(self) -> None:
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
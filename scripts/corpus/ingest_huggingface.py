@@ -6,7 +6,7 @@ This script processes downloaded HF datasets from data/raw/ and converts them
 into standardized JSONL format for weak-supervision labeling and training.
 
 Usage:
-    python scripts/corpus/ingest_huggingface.py [--dry-run] [--dataset DATASET_NAME]
+    python scripts/corpus/ingest_huggingface.py [--dry-run] [--dataset DATASET_NAME] [--workers N]
     
 Output:
     data/corpus/<dataset_name>.jsonl - Processed documents in standard format
@@ -27,12 +27,17 @@ Format:
 """
 
 import argparse
+import hashlib
 import json
+import os
 import re
+import shutil
 import sys
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Iterator, Tuple
-from collections import defaultdict
+from typing import Deque, Dict, List, Optional, Iterator, Tuple
 
 try:
     import yaml
@@ -46,18 +51,36 @@ except ImportError:
     print("ERROR: Missing datasets dependency. Install: pip install datasets")
     sys.exit(2)
 
-# Optional: language detection for filtering
-try:
-    from langdetect import detect, LangDetectException
-    LANGDETECT_AVAILABLE = True
-except ImportError:
-    LANGDETECT_AVAILABLE = False
-    print("WARNING: langdetect not available. Language filtering disabled.")
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:  # pragma: no cover - runtime path fix for scripts
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.corpus.dedupe_index import DEFAULT_DEDUPE_INDEX_PATH, DedupeIndex
+from scripts.corpus.language_id import get_profiles, identify_languages
+
 
+@lru_cache(maxsize=None)
+def language_id_available() -> bool:
+    """Whether language filtering can run, resolved on first use.
+
+    The n-gram profiles need numpy and, until they are cached, langdetect;
+    loading (or building) them is deferred so ``--help`` and runs without
+    language filtering don't pay for it.
+    """
+    available = get_profiles() is not None
+    if not available:
+        print("WARNING: language profiles not available. Language filtering disabled.")
+    return available
 
 MANIFEST_PATH = Path("data/manifests/hf_datasets.yml")
 DEFAULT_OUTPUT_DIR = Path("data/corpus")
 DEFAULT_RAW_DIR = Path("data/raw")
+DEFAULT_BATCH_SIZE = 1000
+CHECKPOINT_DIRNAME = ".checkpoints"
+
+# Per-process caches used by pool workers (see ``_ingest_batch``).
+_WORKER_INGESTERS: Dict[str, "HuggingFaceIngester"] = {}
+_WORKER_DATASETS: Dict[str, "Dataset"] = {}
 
 
 class HuggingFaceIngester:
@@ -73,19 +96,30 @@ class HuggingFaceIngester:
         
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.stats = defaultdict(int)
-        self.seen_texts = set() if self.deduplicate else None
+        # Shared on-disk index so dedupe is stable across runs, datasets and
+        # the other ingestion entry points (see scripts/ingest_offhub.py).
+        self.dedupe_index: Optional[DedupeIndex] = None
+        if self.deduplicate:
+            # Commits are aligned with split checkpoints (see ``_ingest_split``).
+            self.dedupe_index = DedupeIndex(
+                config.get("dedupe_index", DEFAULT_DEDUPE_INDEX_PATH),
+                commit_interval=None,
+            )
     
     def detect_language(self, text: str) -> Optional[str]:
         """Detect language of text. Returns None if detection unavailable."""
-        if not LANGDETECT_AVAILABLE:
-            return None
-        try:
-            return detect(text)
-        except LangDetectException:
-            return None
+        return self.detect_languages([text])[0]
     
-    def is_valid_text(self, text: str) -> bool:
-        """Check if text meets quality criteria."""
+    def detect_languages(self, texts: List[str]) -> List[Optional[str]]:
+        """Detect languages for a batch of texts in one vectorized call."""
+        if not language_id_available():
+            return [None] * len(texts)
+        return [
+            label if label != "unknown" else None
+            for label, _, _ in identify_languages(texts)
+        ]
+    
+    def passes_length_filter(self, text: str) -> bool:
         if not text or not text.strip():
             return False
         
@@ -93,23 +127,37 @@ class HuggingFaceIngester:
         if text_len < self.min_length or text_len > self.max_length:
             self.stats["filtered_length"] += 1
             return False
-        
-        # Language check (if available)
-        if LANGDETECT_AVAILABLE and self.target_language:
-            lang = self.detect_language(text)
+        return True
+    
+    def passes_language_filter(self, texts: List[str]) -> List[bool]:
+        """Batch language check; texts with no detectable language pass."""
+        if not self.target_language or not language_id_available():
+            return [True] * len(texts)
+        keep: List[bool] = []
+        for lang in self.detect_languages(texts):
             if lang and lang != self.target_language:
                 self.stats["filtered_language"] += 1
-                return False
-        
-        # Deduplication
-        if self.deduplicate:
-            text_hash = hash(text.strip().lower())
-            if text_hash in self.seen_texts:
-                self.stats["filtered_duplicate"] += 1
-                return False
-            self.seen_texts.add(text_hash)
-        
-        return True
+                keep.append(False)
+            else:
+                keep.append(True)
+        return keep
+    
+    def passes_filters(self, text: str) -> bool:
+        """Check the stateless quality criteria (length and language)."""
+        return self.passes_length_filter(text) and self.passes_language_filter([text])[0]
+    
+    def is_duplicate(self, text: str, source: str) -> bool:
+        """Record ``text`` as seen for ``source``, returning True if it was seen before."""
+        if self.dedupe_index is None:
+            return False
+        if self.dedupe_index.check_and_add(text, source):
+            self.stats["filtered_duplicate"] += 1
+            return True
+        return False
+    
+    def is_valid_text(self, text: str, source: str) -> bool:
+        """Check if text meets quality criteria."""
+        return self.passes_filters(text) and not self.is_duplicate(text, source)
     
     @staticmethod
     def _normalise_whitespace(value: str) -> str:
@@ -219,13 +267,185 @@ class HuggingFaceIngester:
             return [(text, {})]
         return []
     
+    def build_documents(
+        self,
+        rows: List[Dict],
+        start_idx: int,
+        dataset_name: str,
+        split_name: str,
+    ) -> List[Dict]:
+        """Extract and filter documents from a batch of examples.
+
+        Deduplication is left to the caller so that it can run in input order
+        even when batches are processed out of order by pool workers.
+        """
+        candidates: List[Tuple[int, int, str, Dict[str, object], Dict]] = []
+        for offset, example in enumerate(rows):
+            idx = start_idx + offset
+            records = self.extract_text_from_example(example, dataset_name)
+
+            if not records:
+                self.stats["no_text_field"] += 1
+                continue
+
+            for inner_idx, (text, extra_meta) in enumerate(records):
+                if not text:
+                    continue
+
+                if self.passes_length_filter(text):
+                    candidates.append((idx, inner_idx, text, extra_meta, example))
+
+        # Language ID runs once per batch rather than once per text.
+        keep = self.passes_language_filter([candidate[2] for candidate in candidates])
+        docs: List[Dict] = []
+        for (idx, inner_idx, text, extra_meta, example), passed in zip(candidates, keep):
+            if passed:
+                metadata = {
+                    "original_split": split_name,
+                    "length": len(text),
+                    "index": idx,
+                }
+                if extra_meta:
+                    metadata.update(extra_meta)
+
+                doc = {
+                    "doc_id": f"{dataset_name}_{split_name}_{idx}_{inner_idx}",
+                    "text": text.strip(),
+                    "source": dataset_name,
+                    "metadata": metadata,
+                }
+
+                if "label" in example:
+                    doc["metadata"].setdefault("original_label", example["label"])
+                if "labels" in example:
+                    doc["metadata"].setdefault("original_labels", example["labels"])
+
+                docs.append(doc)
+        return docs
+
+    def iter_split_batches(
+        self,
+        split_path: Path,
+        dataset_name: str,
+        split_name: str,
+        workers: int,
+        batch_size: int,
+        start: int = 0,
+    ) -> Iterator[Tuple[int, List[Dict]]]:
+        """Yield ``(next_index, docs)`` batches for one split in input order.
+
+        ``start`` skips examples already covered by a checkpoint.
+        """
+        if workers <= 1:
+            dataset = load_from_disk(str(split_path))
+            if start:
+                dataset = dataset.select(range(start, len(dataset)))
+            for batch in dataset.iter(batch_size=batch_size):
+                rows = _batch_to_rows(batch)
+                docs = self.build_documents(rows, start, dataset_name, split_name)
+                start += len(rows)
+                yield start, docs
+            return
+
+        total = len(load_from_disk(str(split_path)))
+        worker_config = dict(self.config, deduplicate=False)
+        tasks = (
+            (worker_config, dataset_name, str(split_path), split_name, begin, min(begin + batch_size, total))
+            for begin in range(start, total, batch_size)
+        )
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Tuple[int, Future]] = deque()
+            for task in tasks:
+                pending.append((task[-1], pool.submit(_ingest_batch, task)))
+                # Bounded look-ahead keeps memory flat on very large splits.
+                if len(pending) >= workers * 2:
+                    stop, future = pending.popleft()
+                    yield stop, self._collect_batch(future)
+            while pending:
+                stop, future = pending.popleft()
+                yield stop, self._collect_batch(future)
+
+    def _collect_batch(self, future: Future) -> List[Dict]:
+        docs, stats = future.result()
+        for key, value in stats.items():
+            self.stats[key] += value
+        return docs
+
+    def _ingest_split(
+        self,
+        split_path: Path,
+        dataset_name: str,
+        split_name: str,
+        state: Dict,
+        part_path: Path,
+        checkpoint: Dict,
+        checkpoint_path: Path,
+        workers: int,
+        batch_size: int,
+    ) -> int:
+        """Append one split's documents to its part file, checkpointing per batch."""
+        # Dedupe ownership is per split, so a refreshed split can reclaim its own
+        # texts while duplicates of other splits stay filtered.
+        dedupe_source = f"{dataset_name}/{split_name}"
+        if self.dedupe_index is not None:
+            state["run_id"] = self.dedupe_index.begin_run(state.get("run_id"))
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        doc_count = 0
+        with open(part_path, "ab") as out_f:
+            # Drop anything written after the last checkpoint of an interrupted run.
+            out_f.truncate(state["bytes_written"])
+            batches = self.iter_split_batches(
+                split_path, dataset_name, split_name, workers, batch_size, start=state["next_index"]
+            )
+            for next_index, docs in batches:
+                for doc in docs:
+                    if self.is_duplicate(doc["text"], dedupe_source):
+                        continue
+
+                    out_f.write((json.dumps(doc, ensure_ascii=False) + "\n").encode("utf-8"))
+                    doc_count += 1
+                    state["documents"] += 1
+
+                    if doc_count % 1000 == 0:
+                        print(f"    Processed {doc_count} documents...")
+
+                out_f.flush()
+                os.fsync(out_f.fileno())
+                state["next_index"] = next_index
+                state["bytes_written"] = out_f.tell()
+                save_checkpoint(checkpoint_path, checkpoint)
+                if self.dedupe_index is not None:
+                    self.dedupe_index.flush()
+
+        state["complete"] = True
+        save_checkpoint(checkpoint_path, checkpoint)
+        return doc_count
+
     def process_dataset(
         self, 
         dataset_path: Path, 
         dataset_name: str,
-        dry_run: bool = False
+        dry_run: bool = False,
+        workers: int = 1,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        force: bool = False,
+        keep_checkpoints: bool = False,
     ) -> int:
-        """Process a single dataset directory."""
+        """Process a single dataset directory.
+
+        With ``workers`` > 1, Arrow record batches are extracted and filtered in a
+        process pool while this process acts as the single ordered writer, so
+        deduplication and ``doc_id`` assignment match a serial run.
+
+        Each split is written to a part file under ``.checkpoints/<dataset>/``
+        with a checkpoint (last example index, bytes written) after every batch.
+        Interrupted splits resume where they stopped, splits whose Arrow files
+        are unchanged are reused, and the final JSONL is assembled in a temp file
+        and renamed into place. Once every split is complete the part files (a
+        second copy of the corpus) are deleted, unless ``keep_checkpoints`` is
+        set to keep them for incremental re-ingestion.
+        """
         print(f"\n[PROCESSING] {dataset_name}")
         print(f"  Source: {dataset_path}")
         
@@ -235,12 +455,14 @@ class HuggingFaceIngester:
         
         # Output file
         output_file = self.output_dir / f"{dataset_name}.jsonl"
-        if output_file.exists() and not dry_run:
-            print(f"  [SKIP] Output already exists: {output_file}")
+        checkpoint_dir = self.output_dir / CHECKPOINT_DIRNAME / dataset_name
+        checkpoint_path = checkpoint_dir / "checkpoint.json"
+        if output_file.exists() and not checkpoint_path.exists() and not dry_run and not force:
+            print(f"  [SKIP] Output already exists without a checkpoint: {output_file} (use --force to rebuild)")
             return 0
         
         # Load dataset splits
-        splits = [d for d in dataset_path.iterdir() if d.is_dir()]
+        splits = sorted(d for d in dataset_path.iterdir() if d.is_dir())
         if not splits:
             # Single dataset without splits
             splits = [dataset_path]
@@ -251,60 +473,73 @@ class HuggingFaceIngester:
             print(f"  [DRY-RUN] Would process {len(splits)} split(s)")
             return 0
         
-        with open(output_file, "w", encoding="utf-8") as out_f:
-            for split_path in splits:
-                split_name = split_path.name if split_path != dataset_path else "default"
+        checkpoint = {"dataset": dataset_name, "splits": {}}
+        if checkpoint_path.exists() and not force:
+            checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+        split_names: List[str] = []
+        changed = False
+        for split_path in splits:
+            split_name = split_path.name if split_path != dataset_path else "default"
+            split_names.append(split_name)
+            fingerprint = split_fingerprint(split_path)
+            part_path = checkpoint_dir / f"{split_name}.jsonl"
+            state = checkpoint["splits"].get(split_name)
+
+            if state and state["fingerprint"] == fingerprint and state["complete"] and part_path.exists():
+                print(f"  Split unchanged, reusing checkpoint: {split_name}")
+                continue
+            changed = True
+            if state and state["fingerprint"] == fingerprint and part_path.exists():
+                print(f"  Resuming split: {split_name} (from example {state['next_index']})")
+            else:
                 print(f"  Processing split: {split_name}")
-                
-                try:
-                    # Load the split
-                    dataset = load_from_disk(str(split_path))
-                    
-                    for idx, example in enumerate(dataset):
-                        records = self.extract_text_from_example(example, dataset_name)
-
-                        if not records:
-                            self.stats["no_text_field"] += 1
-                            continue
-
-                        for inner_idx, (text, extra_meta) in enumerate(records):
-                            if not text:
-                                continue
-
-                            if not self.is_valid_text(text):
-                                continue
-
-                            metadata = {
-                                "original_split": split_name,
-                                "length": len(text),
-                                "index": idx,
-                            }
-                            if extra_meta:
-                                metadata.update(extra_meta)
-
-                            doc = {
-                                "doc_id": f"{dataset_name}_{split_name}_{idx}_{inner_idx}",
-                                "text": text.strip(),
-                                "source": dataset_name,
-                                "metadata": metadata,
-                            }
-
-                            if "label" in example:
-                                doc["metadata"].setdefault("original_label", example["label"])
-                            if "labels" in example:
-                                doc["metadata"].setdefault("original_labels", example["labels"])
-
-                            out_f.write(json.dumps(doc, ensure_ascii=False) + "\n")
-                            doc_count += 1
-
-                            if doc_count % 1000 == 0:
-                                print(f"    Processed {doc_count} documents...")
-                
-                except Exception as e:
-                    print(f"  [ERROR] Failed to process split {split_name}: {e}")
-                    continue
-        
-        print(f"  [DONE] Wrote {doc_count} documents to {output_file}")
+                state = {
+                    "fingerprint": fingerprint,
+                    "next_index": 0,
+                    "bytes_written": 0,
+                    "documents": 0,
+                    "complete": False,
+                }
+                checkpoint["splits"][split_name] = state
+                part_path.unlink(missing_ok=True)
+
+            try:
+                doc_count += self._ingest_split(
+                    split_path,
+                    dataset_name,
+                    split_name,
+                    state,
+                    part_path,
+                    checkpoint,
+                    checkpoint_path,
+                    workers,
+                    batch_size,
+                )
+            except Exception as e:
+                print(f"  [ERROR] Failed to process split {split_name}: {e}")
+                continue
+
+        # Forget splits that no longer exist in the source dataset.
+        for stale in set(checkpoint["splits"]).difference(split_names):
+            changed = True
+            del checkpoint["splits"][stale]
+            (checkpoint_dir / f"{stale}.jsonl").unlink(missing_ok=True)
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        if not changed and output_file.exists():
+            print(f"  [SKIP] Output up to date: {output_file}")
+            return 0
+
+        complete = [name for name in split_names if checkpoint["splits"].get(name, {}).get("complete")]
+        if len(complete) < len(split_names):
+            print(f"  [WARN] {len(split_names) - len(complete)} split(s) incomplete; re-run to resume them")
+        total_docs = finalize_output(output_file, [checkpoint_dir / f"{name}.jsonl" for name in complete])
+        if len(complete) == len(split_names) and not keep_checkpoints:
+            shutil.rmtree(checkpoint_dir)
+
+        print(f"  [DONE] Wrote {doc_count} new documents; {output_file} now has {total_docs}")
         self.stats["total_documents"] += doc_count
         return doc_count
     
@@ -317,10 +552,80 @@ class HuggingFaceIngester:
         print(f"Filtered (length): {self.stats['filtered_length']}")
         print(f"Filtered (language): {self.stats['filtered_language']}")
         print(f"Filtered (duplicate): {self.stats['filtered_duplicate']}")
+        if self.dedupe_index is not None:
+            index_stats = self.dedupe_index.stats
+            print(f"  - seen in another corpus: {index_stats['cross_source']}")
+            print(f"  - repeated within this run: {index_stats['same_run']}")
+            print(f"Dedupe index: {self.dedupe_index.path} ({len(self.dedupe_index)} hashes)")
         print(f"No text field found: {self.stats['no_text_field']}")
         print("=" * 60)
 
 
+def split_fingerprint(split_path: Path) -> str:
+    """Fingerprint a saved split from its state file and Arrow file sizes/mtimes."""
+    digest = hashlib.sha256()
+    state_file = split_path / "state.json"
+    if state_file.exists():
+        digest.update(state_file.read_bytes())
+    for arrow_file in sorted(split_path.glob("*.arrow")):
+        stat = arrow_file.stat()
+        digest.update(f"{arrow_file.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def save_checkpoint(path: Path, checkpoint: Dict) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(checkpoint, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def count_lines(path: Path) -> int:
+    with open(path, "rb") as handle:
+        return sum(1 for _ in handle)
+
+
+def finalize_output(output_file: Path, part_paths: List[Path]) -> int:
+    """Concatenate split part files into a temp file, then atomically rename it."""
+    tmp_path = output_file.with_name(output_file.name + ".tmp")
+    total = 0
+    with open(tmp_path, "wb") as out_f:
+        for part_path in part_paths:
+            with open(part_path, "rb") as part_f:
+                shutil.copyfileobj(part_f, out_f)
+            total += count_lines(part_path)
+        out_f.flush()
+        os.fsync(out_f.fileno())
+    os.replace(tmp_path, output_file)
+    return total
+
+
+def _batch_to_rows(batch: Dict[str, List]) -> List[Dict]:
+    """Convert a columnar Arrow batch into per-example dicts."""
+    columns = list(batch)
+    if not columns:
+        return []
+    return [
+        {column: batch[column][i] for column in columns}
+        for i in range(len(batch[columns[0]]))
+    ]
+
+
+def _ingest_batch(task: Tuple[Dict, str, str, str, int, int]) -> Tuple[List[Dict], Dict[str, int]]:
+    """Pool worker: extract and filter examples ``[start, stop)`` of one split."""
+    config, dataset_name, split_path, split_name, start, stop = task
+    ingester = _WORKER_INGESTERS.get(dataset_name)
+    if ingester is None:
+        ingester = _WORKER_INGESTERS[dataset_name] = HuggingFaceIngester(config)
+    # ``load_from_disk`` memory-maps the Arrow files, so each worker reads its own
+    # slice without the parent pickling rows across.
+    dataset = _WORKER_DATASETS.get(split_path)
+    if dataset is None:
+        dataset = _WORKER_DATASETS[split_path] = load_from_disk(split_path)
+    ingester.stats.clear()
+    docs = ingester.build_documents(_batch_to_rows(dataset[start:stop]), start, dataset_name, split_name)
+    return docs, dict(ingester.stats)
+
+
 def load_manifest(path: Path) -> Dict:
     """Load the HF datasets manifest."""
     with open(path, "r", encoding="utf-8") as f:
@@ -386,6 +691,34 @@ def main():
         default=DEFAULT_RAW_DIR,
         help="Directory containing raw HF datasets"
     )
+    parser.add_argument(
+        "--dedupe-index",
+        type=Path,
+        default=None,
+        help=f"Persistent content-hash dedupe index (default: {DEFAULT_DEDUPE_INDEX_PATH})"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Discard checkpoints and re-ingest every split from scratch"
+    )
+    parser.add_argument(
+        "--keep-checkpoints",
+        action="store_true",
+        help="Keep per-split part files after a complete run so unchanged splits are reused next time"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Process Arrow record batches in this many worker processes"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Examples per Arrow record batch"
+    )
     
     args = parser.parse_args()
     
@@ -398,6 +731,8 @@ def main():
     
     # Get ingestion config
     ingest_config = manifest.get("ingestion", {})
+    if args.dedupe_index is not None:
+        ingest_config["dedupe_index"] = args.dedupe_index
     
     # Create ingester
     ingester = HuggingFaceIngester(ingest_config)
@@ -414,7 +749,15 @@ def main():
     # Process each dataset
     total_docs = 0
     for dataset_path, dataset_name in datasets:
-        doc_count = ingester.process_dataset(dataset_path, dataset_name, args.dry_run)
+        doc_count = ingester.process_dataset(
+            dataset_path,
+            dataset_name,
+            args.dry_run,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            force=args.force,
+            keep_checkpoints=args.keep_checkpoints,
+        )
         total_docs += doc_count
     
     # Print summary
@@ -425,6 +768,9 @@ def main():
         print("  1. Run QC on corpus: python scripts/corpus/qc_report.py")
         print("  2. Generate labeled datasets: python scripts/corpus/build_category_dataset.py")
     
+    if ingester.dedupe_index is not None:
+        ingester.dedupe_index.close()
+    
     return 0
 
 
@@ -0,0 +1,84 @@
+"""Persistent weak-supervision label cache for incremental dataset rebuilds.
+
+Entries are keyed by (record hash, category, pattern hash, label-map version)
+so a record is only re-labeled when its text/source labels, the category's
+compiled patterns, or its ``SOURCE_LABEL_MAP`` entry change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+CacheKey = Tuple[str, str, str, str]
+
+# SQLite limits the number of bound parameters per statement.
+LOOKUP_BATCH_SIZE = 900
+
+
+def record_hash(text: str, raw_labels: Sequence[str]) -> str:
+    """Hash the labeled text together with the source labels that feed the rules."""
+    payload = text + "\x1f" + "\x1e".join(sorted(label.upper() for label in raw_labels))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def mapping_version(mapping: object) -> str:
+    return hashlib.sha256(json.dumps(mapping, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class LabelCache:
+    """SQLite-backed store of label dictionaries produced by the corpus builder."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS labels (
+                record_hash TEXT NOT NULL,
+                category TEXT NOT NULL,
+                pattern_hash TEXT NOT NULL,
+                map_version TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                PRIMARY KEY (record_hash, category, pattern_hash, map_version)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Dict[str, float]]:
+        found: Dict[CacheKey, Dict[str, float]] = {}
+        # Look up record hashes in batches per (category, pattern hash, map version).
+        groups: Dict[Tuple[str, str, str], Dict[str, None]] = {}
+        for digest, *scope in keys:
+            groups.setdefault(tuple(scope), {})[digest] = None  # type: ignore[arg-type]
+        for scope, digests in groups.items():
+            unique = list(digests)
+            for begin in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[begin : begin + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    "SELECT record_hash, labels FROM labels WHERE category = ? AND pattern_hash = ? "
+                    f"AND map_version = ? AND record_hash IN ({placeholders})",
+                    (*scope, *batch),
+                )
+                for digest, labels in rows:
+                    found[(digest, *scope)] = json.loads(labels)  # type: ignore[assignment]
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[CacheKey, Dict[str, float]]]) -> None:
+        rows: List[Tuple[str, str, str, str, str]] = [
+            (*key, json.dumps(labels)) for key, labels in entries
+        ]
+        if not rows:
+            return
+        self.conn.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""Batch language identification shared by the QC report and HF ingestion.
+
+Texts are scored with a naive-Bayes model over character 1-3 grams, like
+langdetect, but a whole batch is classified in one vectorized pass: every text
+is normalised, joined into a single code-point array, the n-grams are hashed
+with NumPy and their log-probabilities summed per text and language. The
+result is deterministic and orders of magnitude faster than calling
+``langdetect.detect_langs`` once per record.
+
+Language profiles are compiled from the n-gram frequency files that ship with
+langdetect (case folded, with langdetect's script normalisation) and cached at
+``data/cache/language_profiles.npz``; once the cache exists langdetect is no
+longer needed. Clearly English texts are accepted by
+:func:`heuristic_language_label` before any scoring happens.
+
+Usage:
+    python scripts/corpus/language_id.py --build-profiles
+    python scripts/corpus/language_id.py --benchmark --input data/clauses.jsonl --limit 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:  # pragma: no cover - optional dependency guard
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - fallback when numpy missing
+    np = None  # type: ignore[assignment]
+    NUMPY_AVAILABLE = False
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_PROFILE_CACHE_PATH = REPO_ROOT / "data" / "cache" / "language_profiles.npz"
+
+PROFILE_FORMAT_VERSION = 2
+HASH_BITS = 20
+# Floor for n-grams missing from a language's profile, relative to its counts.
+MISSING_GRAM_PROBABILITY = 1e-6
+# Texts scored per vectorized pass; bounds the (grams x languages) gather.
+SCORE_CHUNK_SIZE = 1024
+# langdetect only reports languages above this posterior probability.
+DISTRIBUTION_THRESHOLD = 0.1
+
+_HASH_MULTIPLIER = 1_000_003
+_HASH_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+# ASCII non-letters, Latin-1 punctuation/symbols and General Punctuation map to
+# a word boundary, as in langdetect's ``NGram.normalize``.
+_NON_LETTERS = re.compile("[\\x00-\\x40\\x5b-\\x60\\x7b-\\x7f\\x80-\\xbf\\u2000-\\u206f\\s]+")
+_CJK_START, _CJK_END = 0x4E00, 0xA000
+
+DEFAULT_STOPWORDS = {
+    "the",
+    "and",
+    "that",
+    "shall",
+    "will",
+    "you",
+    "your",
+    "our",
+    "may",
+    "not",
+    "for",
+    "with",
+    "have",
+    "hereby",
+    "such",
+    "this",
+}
+
+LanguageResult = Tuple[str, float, Dict[str, float]]
+
+
+def heuristic_language_label(text: str) -> str:
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    total_chars = len(text)
+    if total_chars == 0:
+        return "unknown"
+    non_ascii_ratio = 1 - (ascii_chars / total_chars)
+
+    tokens = [token.strip(".,;:!?()[]\"'").lower() for token in text.split() if token]
+    english_hits = sum(1 for token in tokens if token in DEFAULT_STOPWORDS)
+    token_count = len(tokens) or 1
+    english_ratio = english_hits / token_count
+
+    if english_ratio >= 0.2 and non_ascii_ratio < 0.3:
+        return "en"
+    if english_ratio >= 0.1:
+        return "mixed"
+    return "unknown"
+
+
+def normalise_for_ngrams(text: str) -> str:
+    """Lowercase and collapse every non-letter run into a single space."""
+    return _NON_LETTERS.sub(" ", text.lower()).strip()
+
+
+def _gram_hash(gram: str) -> int:
+    """Scalar twin of the vectorized hash in :func:`_hash_grams`."""
+    value = len(gram)
+    for ch in gram:
+        value = (value * _HASH_MULTIPLIER + ord(ch)) & _MASK64
+    return ((value * _HASH_MIX) & _MASK64) >> (64 - HASH_BITS)
+
+
+def _fold_code_points(cps: "np.ndarray", cjk_map: "np.ndarray") -> "np.ndarray":
+    """Apply langdetect's per-script normalisation to an array of code points."""
+    cps = cps.copy()
+    cps[cps == 0x0219] = 0x015F  # Romanian s/t with comma -> cedilla
+    cps[cps == 0x021B] = 0x0163
+    cps[cps == 0x06CC] = 0x064A  # Farsi yeh -> Arabic yeh
+    cps[(cps >= 0x1EA0) & (cps <= 0x1EFF)] = 0x1EC3
+    cps[(cps >= 0x3040) & (cps <= 0x309F)] = 0x3042
+    cps[(cps >= 0x30A0) & (cps <= 0x30FF)] = 0x30A2
+    cps[((cps >= 0x3100) & (cps <= 0x312F)) | ((cps >= 0x31A0) & (cps <= 0x31BF))] = 0x3105
+    cps[(cps >= 0xAC00) & (cps <= 0xD7AF)] = 0xAC00
+    cjk = (cps >= _CJK_START) & (cps < _CJK_END)
+    cps[cjk] = cjk_map[cps[cjk] - _CJK_START]
+    return cps
+
+
+def _hash_grams(cps: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Hash every valid 1-3 gram of a NUL-separated code-point array.
+
+    Returns ``(positions, buckets)`` where ``positions`` is the start offset of
+    each gram (used to attribute it to its text). Grams never span a text
+    boundary and, following langdetect, only contain a space at their edges.
+    """
+    codes = cps.astype(np.uint64)
+    length = len(codes)
+    positions: List["np.ndarray"] = []
+    buckets: List["np.ndarray"] = []
+    with np.errstate(over="ignore"):
+        for n in (1, 2, 3):
+            count = length - n + 1
+            if count <= 0:
+                break
+            value = np.full(count, n, dtype=np.uint64)
+            valid = np.ones(count, dtype=bool)
+            for offset in range(n):
+                window = codes[offset : offset + count]
+                value = value * np.uint64(_HASH_MULTIPLIER) + window
+                valid &= window != 0
+            if n == 1:
+                valid &= codes[:count] != 32
+            elif n == 2:
+                valid &= (codes[:count] != 32) | (codes[1 : 1 + count] != 32)
+            else:
+                valid &= codes[1 : 1 + count] != 32
+            index = np.flatnonzero(valid)
+            positions.append(index)
+            buckets.append((value[index] * np.uint64(_HASH_MIX)) >> np.uint64(64 - HASH_BITS))
+    if not positions:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+    return np.concatenate(positions), np.concatenate(buckets)
+
+
+def _langdetect_profile_dir() -> Path:
+    import langdetect  # noqa: PLC0415 - only needed to compile profiles
+
+    return Path(langdetect.__file__).resolve().parent / "profiles"
+
+
+def _langdetect_cjk_map() -> "np.ndarray":
+    from langdetect.utils.ngram import NGram  # noqa: PLC0415
+
+    table = np.arange(_CJK_START, _CJK_END, dtype=np.uint32)
+    for ch, representative in NGram.CJK_MAP.items():
+        code = ord(ch)
+        if _CJK_START <= code < _CJK_END:
+            table[code - _CJK_START] = ord(representative)
+    return table
+
+
+class LanguageProfiles:
+    """Per-language log-probabilities over hashed character n-grams."""
+
+    def __init__(
+        self,
+        languages: Sequence[str],
+        log_probs: "np.ndarray",
+        columns: "np.ndarray",
+        cjk_map: "np.ndarray",
+        source_hash: str = "",
+    ):
+        self.languages = list(languages)
+        self.log_probs = log_probs  # (known grams, languages), float32
+        self.columns = columns  # hash bucket -> row in log_probs, -1 if unknown
+        self.cjk_map = cjk_map
+        self.source_hash = source_hash
+
+    @classmethod
+    def from_langdetect(cls, profile_dir: Optional[Path] = None) -> "LanguageProfiles":
+        """Compile profiles from langdetect's bundled n-gram frequency files."""
+        profile_dir = profile_dir or _langdetect_profile_dir()
+        profile_paths = sorted(path for path in profile_dir.iterdir() if path.is_file())
+        languages: List[str] = []
+        counts: List[Dict[int, float]] = []
+        totals: List[List[int]] = []
+        for path in profile_paths:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            bucket_counts: Dict[int, float] = {}
+            for gram, count in payload["freq"].items():
+                # Profiles are case sensitive; fold to match the lowercased input.
+                bucket = _gram_hash(gram.lower())
+                bucket_counts[bucket] = bucket_counts.get(bucket, 0.0) + count
+            languages.append(payload["name"].lower())
+            counts.append(bucket_counts)
+            totals.append(payload["n_words"])
+
+        known = sorted(set().union(*counts))
+        columns = np.full(1 << HASH_BITS, -1, dtype=np.int32)
+        columns[known] = np.arange(len(known), dtype=np.int32)
+        # Bucket -> n-gram order is fixed by the hash, so recover it once per bucket.
+        orders: Dict[int, int] = {}
+        for path in profile_paths:
+            for gram in json.loads(path.read_text(encoding="utf-8"))["freq"]:
+                orders.setdefault(_gram_hash(gram.lower()), len(gram))
+        order_index = np.array([orders[bucket] - 1 for bucket in known], dtype=np.int64)
+
+        log_probs = np.empty((len(known), len(languages)), dtype=np.float32)
+        for column, (bucket_counts, n_words) in enumerate(zip(counts, totals)):
+            frequency = np.array([bucket_counts.get(bucket, 0.0) for bucket in known])
+            denominators = np.asarray(n_words, dtype=np.float64)[order_index]
+            log_probs[:, column] = np.log(frequency / denominators + MISSING_GRAM_PROBABILITY)
+
+        digest = hashlib.sha256()
+        for path in profile_paths:
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+        return cls(languages, log_probs, columns, _langdetect_cjk_map(), digest.hexdigest())
+
+    @classmethod
+    def load(cls, path: Path) -> "LanguageProfiles":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != PROFILE_FORMAT_VERSION or int(data["hash_bits"]) != HASH_BITS:
+                raise ValueError(f"Stale language profile cache: {path}")
+            return cls(
+                [str(code) for code in data["languages"]],
+                data["log_probs"],
+                data["columns"],
+                data["cjk_map"],
+                str(data["source_hash"]),
+            )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(
+            tmp_path,
+            format_version=PROFILE_FORMAT_VERSION,
+            hash_bits=HASH_BITS,
+            languages=np.array(self.languages),
+            log_probs=self.log_probs,
+            columns=self.columns,
+            cjk_map=self.cjk_map,
+            source_hash=self.source_hash,
+        )
+        tmp_path.replace(path)
+
+    def score(self, texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Return ``(log_likelihoods, gram_counts)`` of shape (texts, languages) / (texts,)."""
+        normalised = [f" {normalise_for_ngrams(text)} " for text in texts]
+        joined = "\x00".join(normalised)
+        cps = _fold_code_points(np.frombuffer(joined.encode("utf-32-le"), dtype="<u4"), self.cjk_map)
+        starts, buckets = _hash_grams(cps)
+
+        position_docs = np.repeat(
+            np.arange(len(texts), dtype=np.int64),
+            np.fromiter((len(text) + 1 for text in normalised), dtype=np.int64, count=len(texts)),
+        )
+        doc_ids = position_docs[starts]
+        columns = self.columns[buckets.astype(np.int64)]
+        known = columns >= 0
+        doc_ids, columns = doc_ids[known], columns[known]
+        gram_counts = np.bincount(doc_ids, minlength=len(texts))
+
+        scores = np.zeros((len(texts), len(self.languages)), dtype=np.float64)
+        if not len(doc_ids):
+            return scores, gram_counts
+        # Collapse repeated (text, gram) pairs, then gather profile rows once and
+        # sum them per text; keys are sorted by text, so reduceat segments them.
+        keys, weights = np.unique(doc_ids * len(self.columns) + columns, return_counts=True)
+        key_docs = keys // len(self.columns)
+        contributions = self.log_probs[keys % len(self.columns)] * weights[:, None].astype(np.float32)
+        segment_starts = np.flatnonzero(np.r_[True, key_docs[1:] != key_docs[:-1]])
+        scores[key_docs[segment_starts]] = np.add.reduceat(contributions, segment_starts, axis=0)
+        return scores, gram_counts
+
+    def classify(self, texts: Sequence[str]) -> List[LanguageResult]:
+        """Classify a batch of texts into ``(label, confidence, distribution)`` tuples."""
+        if not texts:
+            return []
+        if len(texts) > SCORE_CHUNK_SIZE:
+            chunked: List[LanguageResult] = []
+            for begin in range(0, len(texts), SCORE_CHUNK_SIZE):
+                chunked.extend(self.classify(texts[begin : begin + SCORE_CHUNK_SIZE]))
+            return chunked
+        scores, gram_counts = self.score(texts)
+        scores -= scores.max(axis=1, keepdims=True)
+        posteriors = np.exp(scores)
+        posteriors /= posteriors.sum(axis=1, keepdims=True)
+
+        results: List[LanguageResult] = []
+        for row, count in zip(posteriors, gram_counts):
+            if not count:
+                results.append(("unknown", 0.0, {"unknown": 1.0}))
+                continue
+            top = int(row.argmax())
+            distribution = {
+                self.languages[idx]: round(float(row[idx]), 6)
+                for idx in np.flatnonzero(row >= DISTRIBUTION_THRESHOLD)
+            }
+            results.append((self.languages[top], float(row[top]), distribution))
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_profiles(cache_path: Path = DEFAULT_PROFILE_CACHE_PATH) -> Optional[LanguageProfiles]:
+    """Load the cached profiles, compiling them from langdetect on first use.
+
+    Returns None when NumPy is missing, or when there is no cache and
+    langdetect is not installed to build one.
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    if cache_path.exists():
+        try:
+            return LanguageProfiles.load(cache_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    try:
+        profiles = LanguageProfiles.from_langdetect()
+    except ImportError:
+        return None
+    try:
+        profiles.save(cache_path)
+    except OSError:  # pragma: no cover - read-only checkout; keep the in-memory copy
+        pass
+    return profiles
+
+
+def identify_languages(texts: Sequence[str], prefilter: bool = True) -> List[LanguageResult]:
+    """Classify ``texts`` in one batch.
+
+    With ``prefilter`` texts that :func:`heuristic_language_label` already marks
+    as English are returned as ``("en", 1.0, {"en": 1.0})`` without scoring.
+    Without usable profiles every text gets the heuristic label with zero
+    confidence, matching the QC report's langdetect-less behaviour.
+    """
+    results: List[Optional[LanguageResult]] = [None] * len(texts)
+    pending: List[int] = []
+    for idx, text in enumerate(texts):
+        stripped = text.strip()
+        if not stripped:
+            results[idx] = ("unknown", 0.0, {"unknown": 1.0})
+        elif prefilter and heuristic_language_label(stripped) == "en":
+            results[idx] = ("en", 1.0, {"en": 1.0})
+        else:
+            pending.append(idx)
+
+    profiles = get_profiles() if pending else None
+    if profiles is not None:
+        for idx, result in zip(pending, profiles.classify([texts[idx] for idx in pending])):
+            results[idx] = result
+    else:
+        for idx in pending:
+            label = heuristic_language_label(texts[idx].strip())
+            results[idx] = (label, 0.0, {label: 1.0})
+    return results  # type: ignore[return-value]
+
+
+def load_texts(path: Path, limit: int) -> List[str]:
+    texts: List[str] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            text = str(json.loads(line).get("text", "")).strip()
+            if text:
+                texts.append(text)
+            if limit and len(texts) >= limit:
+                break
+    return texts
+
+
+def run_benchmark(texts: Sequence[str], batch_size: int) -> Dict[str, object]:
+    """Compare labels and throughput against langdetect on ``texts``."""
+    from langdetect import DetectorFactory, LangDetectException, detect_langs  # noqa: PLC0415
+
+    DetectorFactory.seed = 0
+    get_profiles()  # exclude the one-off profile load from the timings
+
+    report: Dict[str, object] = {"records": len(texts)}
+    reference: List[str] = []
+    started = time.perf_counter()
+    for text in texts:
+        try:
+            candidates = detect_langs(text)
+            reference.append(max(candidates, key=lambda item: item.prob).lang.lower() if candidates else "unknown")
+        except LangDetectException:
+            reference.append("unknown")
+    reference_seconds = time.perf_counter() - started
+    report["langdetect"] = {
+        "seconds": round(reference_seconds, 3),
+        "texts_per_second": round(len(texts) / reference_seconds, 1) if reference_seconds else math.inf,
+    }
+
+    for name, prefilter in (("ngram", False), ("ngram+prefilter", True)):
+        labels: List[str] = []
+        started = time.perf_counter()
+        for begin in range(0, len(texts), batch_size):
+            labels.extend(label for label, _, _ in identify_languages(texts[begin : begin + batch_size], prefilter))
+        seconds = time.perf_counter() - started
+        disagreements = [idx for idx, (ours, theirs) in enumerate(zip(labels, reference)) if ours != theirs]
+        report[name] = {
+            "seconds": round(seconds, 3),
+            "texts_per_second": round(len(texts) / seconds, 1) if seconds else math.inf,
+            "speedup": round(reference_seconds / seconds, 1) if seconds else math.inf,
+            "agreement": round(1 - len(disagreements) / len(texts), 4) if texts else 1.0,
+            "disagreement_examples": [
+                {"index": idx, "langdetect": reference[idx], "ngram": labels[idx], "text": texts[idx][:120]}
+                for idx in disagreements[:10]
+            ],
+        }
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--build-profiles", action="store_true", help="(Re)compile the profile cache from langdetect")
+    parser.add_argument("--profile-cache", type=Path, default=DEFAULT_PROFILE_CACHE_PATH)
+    parser.add_argument("--benchmark", action="store_true", help="Compare accuracy/throughput against langdetect")
+    parser.add_argument("--input", type=Path, default=REPO_ROOT / "data" / "clauses.jsonl", help="JSONL with a text field")
+    parser.add_argument("--limit", type=int, default=5000, help="Benchmark at most this many records (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=4096, help="Texts per identify_languages call")
+    parser.add_argument("--output", type=Path, help="Write the benchmark report as JSON")
+    return parser.parse_args()
+
+
+def main() -> int:  # pragma: no cover - CLI entry point
+    args = parse_args()
+    if not NUMPY_AVAILABLE:
+        print("ERROR: numpy is required for the n-gram language identifier")
+        return 2
+    if args.build_profiles:
+        profiles = LanguageProfiles.from_langdetect()
+        profiles.save(args.profile_cache)
+        print(f"Compiled {len(profiles.languages)} language profiles into {args.profile_cache}")
+    if args.benchmark:
+        report = run_benchmark(load_texts(args.input, args.limit), args.batch_size)
+        rendered = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.output:
+            args.output.write_text(rendered + "\n", encoding="utf-8")
+        print(rendered)
+    if not args.build_profiles and not args.benchmark:
+        print("Nothing to do; pass --build-profiles and/or --benchmark")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Persistent MinHash LSH index for train/gold leakage detection.
+
+Training corpora (``data/processed`` and the synthetic ``data/aug`` outputs by
+default) are indexed once into ``data/cache/leakage_index.sqlite``: every
+distinct normalised text gets a MinHash signature and one row per LSH band,
+and each file's (size, mtime) is recorded so later runs only re-index files
+that were added or changed (removed files are dropped). Querying a gold set
+then costs the gold set's size: each gold record is banded, its candidates
+are looked up in the band table and verified against their stored signatures.
+
+Files named ``gold_*`` (the gold seeds written next to processed datasets) are
+excluded from the index by default so gold records do not match themselves.
+
+Usage:
+    python scripts/corpus/leakage_index.py
+    python scripts/corpus/leakage_index.py --gold  # update the index only
+    python scripts/corpus/leakage_index.py --gold data/gold/dispute_resolution --threshold 0.9 --fail-on-leak
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:  # pragma: no cover - runtime path fix for scripts
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.corpus.dedupe_index import content_hash64
+from scripts.corpus.minhash import (
+    DEFAULT_NUM_PERM,
+    DEFAULT_SEED,
+    DEFAULT_SHINGLE_SIZE,
+    MinHasher,
+    band_keys,
+    estimate_jaccard,
+    lsh_params,
+)
+
+DEFAULT_LEAKAGE_INDEX_PATH = REPO_ROOT / "data" / "cache" / "leakage_index.sqlite"
+DEFAULT_CORPUS_ROOTS = (REPO_ROOT / "data" / "processed", REPO_ROOT / "data" / "aug")
+DEFAULT_GOLD_ROOT = REPO_ROOT / "data" / "gold"
+DEFAULT_REPORT_PATH = REPO_ROOT / "reports" / "qa" / "leakage_report.json"
+DEFAULT_EXCLUDE_PATTERNS = ("gold_*",)
+# LSH bands are tuned for this similarity; queries below it lose recall.
+DEFAULT_INDEX_THRESHOLD = 0.8
+INDEX_BATCH_SIZE = 5000
+MAX_REPORTED_OCCURRENCES = 5
+
+
+@dataclass
+class LeakMatch:
+    text_hash: int
+    similarity: float
+
+
+def relative_path(path: Path) -> str:
+    resolved = path.resolve()
+    try:
+        return str(resolved.relative_to(REPO_ROOT))
+    except ValueError:
+        return str(resolved)
+
+
+def iter_jsonl_files(roots: Iterable[Path], exclude: Sequence[str] = ()) -> Iterator[Path]:
+    for root in roots:
+        candidates = [root] if root.is_file() else sorted(root.rglob("*.jsonl"))
+        for path in candidates:
+            if not any(fnmatch.fnmatch(path.name, pattern) for pattern in exclude):
+                yield path
+
+
+def iter_texts(path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield ``(line_number, text)`` for every JSONL record with a non-empty text."""
+    with path.open("r", encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = str(record.get("text", "")).strip() if isinstance(record, dict) else ""
+            if text:
+                yield line_no, text
+
+
+class LeakageIndex:
+    """On-disk MinHash LSH index over training texts, updated file by file."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_LEAKAGE_INDEX_PATH,
+        threshold: float = DEFAULT_INDEX_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = DEFAULT_SEED,
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, records INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS texts (hash INTEGER PRIMARY KEY, sig BLOB);
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL, key INTEGER NOT NULL, hash INTEGER NOT NULL,
+                PRIMARY KEY (band, key, hash)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS occurrences (
+                file TEXT NOT NULL, line INTEGER NOT NULL, hash INTEGER NOT NULL,
+                PRIMARY KEY (file, line)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS occurrences_hash ON occurrences (hash);
+            CREATE TEMP TABLE probe (idx INTEGER NOT NULL, band INTEGER NOT NULL, key INTEGER NOT NULL);
+            """
+        )
+        params = {
+            "threshold": str(threshold),
+            "num_perm": str(num_perm),
+            "shingle_size": str(shingle_size),
+            "seed": str(seed),
+        }
+        stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if stored and stored != params:
+            self.conn.close()
+            raise ValueError(
+                f"Leakage index {path} was built with {stored}, not {params}; rebuild it with --rebuild"
+            )
+        if not stored:
+            self.conn.executemany("INSERT INTO meta VALUES (?, ?)", params.items())
+            self.conn.commit()
+        self.threshold = threshold
+        self.minhasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+    def update(self, files: Iterable[Path]) -> Dict[str, int]:
+        """Index new or changed ``files`` and drop files that are no longer listed."""
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0, "replaced": 0, "records": 0}
+        known = {path: (size, mtime) for path, size, mtime in self.conn.execute("SELECT path, size, mtime_ns FROM files")}
+        listed = set()
+        for path in files:
+            key = relative_path(path)
+            listed.add(key)
+            stat = path.stat()
+            if known.get(key) == (stat.st_size, stat.st_mtime_ns):
+                stats["unchanged"] += 1
+                continue
+            if key in known:
+                self._remove_file(key)
+                stats["replaced"] += 1
+            stats["records"] += self._index_file(path, key, stat.st_size, stat.st_mtime_ns)
+            stats["indexed"] += 1
+        for key in set(known) - listed:
+            self._remove_file(key)
+            stats["removed"] += 1
+        if stats["removed"] or stats["replaced"]:
+            # Texts only referenced by dropped occurrences no longer count as training data.
+            self._collect_garbage()
+        return stats
+
+    def _index_file(self, path: Path, key: str, size: int, mtime_ns: int) -> int:
+        records = 0
+        batch: List[Tuple[int, str]] = []
+
+        def flush() -> None:
+            hashes = [content_hash64(text) for _, text in batch]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO occurrences VALUES (?, ?, ?)",
+                ((key, line_no, digest) for (line_no, _), digest in zip(batch, hashes)),
+            )
+            new: Dict[int, str] = {}
+            for (_, text), digest in zip(batch, hashes):
+                new.setdefault(digest, text)
+            existing = set()
+            unique = list(new)
+            for begin in range(0, len(unique), 900):
+                chunk = unique[begin : begin + 900]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    row[0] for row in self.conn.execute(f"SELECT hash FROM texts WHERE hash IN ({placeholders})", chunk)
+                )
+            missing = [digest for digest in unique if digest not in existing]
+            if not missing:
+                return
+            signatures, valid = self.minhasher.signatures([new[digest] for digest in missing])
+            self.conn.executemany(
+                "INSERT INTO texts VALUES (?, ?)",
+                ((digest, sig.tobytes() if ok else None) for digest, sig, ok in zip(missing, signatures, valid)),
+            )
+            hashed = np.array(missing, dtype=np.int64)[valid]
+            if len(hashed):
+                keys = band_keys(signatures[valid], self.bands, self.rows).view(np.int64)
+                bands = np.broadcast_to(np.arange(self.bands, dtype=np.int64), keys.shape)
+                owners = np.broadcast_to(hashed[:, None], keys.shape)
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO bands VALUES (?, ?, ?)",
+                    zip(bands.ravel().tolist(), keys.ravel().tolist(), owners.ravel().tolist()),
+                )
+
+        for line_no, text in iter_texts(path):
+            batch.append((line_no, text))
+            records += 1
+            if len(batch) >= INDEX_BATCH_SIZE:
+                flush()
+                batch = []
+        if batch:
+            flush()
+        # The file row is written last, so an interrupted run re-indexes the file.
+        self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (key, size, mtime_ns, records))
+        self.conn.commit()
+        return records
+
+    def _remove_file(self, key: str) -> None:
+        self.conn.execute("DELETE FROM occurrences WHERE file = ?", (key,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (key,))
+        self.conn.commit()
+
+    def _collect_garbage(self) -> None:
+        self.conn.execute("DELETE FROM texts WHERE hash NOT IN (SELECT hash FROM occurrences)")
+        self.conn.execute("DELETE FROM bands WHERE hash NOT IN (SELECT hash FROM texts)")
+        self.conn.commit()
+
+    def query(self, texts: Sequence[str], threshold: float) -> List[List[LeakMatch]]:
+        """Return, per text, the indexed texts with estimated Jaccard >= ``threshold``."""
+        results: List[List[LeakMatch]] = [[] for _ in texts]
+        if not texts:
+            return results
+        signatures, valid = self.minhasher.signatures(texts)
+        indexes = np.flatnonzero(valid)
+        if not len(indexes):
+            return results
+        keys = band_keys(signatures[indexes], self.bands, self.rows).view(np.int64)
+        bands = np.broadcast_to(np.arange(self.bands, dtype=np.int64), keys.shape)
+        probes = np.broadcast_to(indexes[:, None], keys.shape)
+        self.conn.execute("DELETE FROM probe")
+        self.conn.executemany(
+            "INSERT INTO probe VALUES (?, ?, ?)",
+            zip(probes.ravel().tolist(), bands.ravel().tolist(), keys.ravel().tolist()),
+        )
+        candidates = self.conn.execute(
+            "SELECT DISTINCT p.idx, t.hash, t.sig FROM probe p "
+            "JOIN bands b ON b.band = p.band AND b.key = p.key "
+            "JOIN texts t ON t.hash = b.hash"
+        ).fetchall()
+        for idx, digest, blob in candidates:
+            similarity = float(estimate_jaccard(signatures[idx], np.frombuffer(blob, dtype=np.uint32)))
+            if similarity >= threshold:
+                results[idx].append(LeakMatch(int(digest), similarity))
+        for matches in results:
+            matches.sort(key=lambda match: -match.similarity)
+        return results
+
+    def occurrences(self, text_hash: int, limit: int = MAX_REPORTED_OCCURRENCES) -> Tuple[int, List[Dict[str, object]]]:
+        total = int(self.conn.execute("SELECT COUNT(*) FROM occurrences WHERE hash = ?", (text_hash,)).fetchone()[0])
+        rows = self.conn.execute(
+            "SELECT file, line FROM occurrences WHERE hash = ? ORDER BY file, line LIMIT ?", (text_hash, limit)
+        )
+        return total, [{"file": file, "line": line} for file, line in rows]
+
+    def summary(self) -> Dict[str, object]:
+        count = lambda table: int(self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])  # noqa: E731
+        return {
+            "path": relative_path(self.path),
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+            "files": count("files"),
+            "texts": count("texts"),
+            "occurrences": count("occurrences"),
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def check_gold_file(
+    index: LeakageIndex, path: Path, threshold: float, max_matches: int
+) -> Dict[str, object]:
+    rows = list(iter_texts(path))
+    matches_per_record = index.query([text for _, text in rows], threshold)
+    leaked = []
+    for (line_no, text), matches in zip(rows, matches_per_record):
+        if not matches:
+            continue
+        reported = []
+        for match in matches[:max_matches]:
+            total, occurrences = index.occurrences(match.text_hash)
+            reported.append(
+                {
+                    "similarity": round(match.similarity, 4),
+                    "occurrence_count": total,
+                    "occurrences": occurrences,
+                }
+            )
+        leaked.append(
+            {
+                "line": line_no,
+                "text": text[:200],
+                "best_similarity": round(matches[0].similarity, 4),
+                "match_count": len(matches),
+                "matches": reported,
+            }
+        )
+    return {"path": relative_path(path), "records": len(rows), "leaked_records": len(leaked), "leaks": leaked}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", type=Path, default=DEFAULT_LEAKAGE_INDEX_PATH, help="SQLite index location")
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        nargs="+",
+        default=list(DEFAULT_CORPUS_ROOTS),
+        help="Training files or directories (searched for *.jsonl) to keep indexed",
+    )
+    parser.add_argument(
+        "--exclude",
+        nargs="*",
+        default=list(DEFAULT_EXCLUDE_PATTERNS),
+        help="Filename patterns skipped when indexing the corpus",
+    )
+    parser.add_argument(
+        "--gold",
+        type=Path,
+        nargs="*",
+        default=[DEFAULT_GOLD_ROOT],
+        help="Gold/eval files or directories to check (pass no paths to only update the index)",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_INDEX_THRESHOLD, help="Similarity reported as leakage")
+    parser.add_argument(
+        "--index-threshold",
+        type=float,
+        default=DEFAULT_INDEX_THRESHOLD,
+        help="Similarity the LSH bands are tuned for (changing it requires --rebuild)",
+    )
+    parser.add_argument("--max-matches", type=int, default=10, help="Training matches listed per leaked gold record")
+    parser.add_argument("--output", type=Path, default=DEFAULT_REPORT_PATH, help="Leakage report JSON path")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the index and rebuild it from scratch")
+    parser.add_argument("--no-update", action="store_true", help="Query the index without re-scanning the corpus")
+    parser.add_argument("--fail-on-leak", action="store_true", help="Exit non-zero if any gold record leaks")
+    return parser.parse_args()
+
+
+def main() -> int:  # pragma: no cover - CLI entry point
+    args = parse_args()
+    if args.rebuild:
+        for suffix in ("", "-wal", "-shm"):
+            Path(str(args.index) + suffix).unlink(missing_ok=True)
+    try:
+        index = LeakageIndex(args.index, threshold=args.index_threshold)
+    except ValueError as exc:
+        print(f"ERROR: {exc}")
+        return 2
+    if args.threshold < args.index_threshold:
+        print(
+            f"WARNING: --threshold {args.threshold} is below the index threshold {args.index_threshold}; "
+            "matches between the two are found with reduced recall"
+        )
+    try:
+        if not args.no_update:
+            stats = index.update(iter_jsonl_files(args.corpus, args.exclude))
+            print(
+                f"Index update: {stats['indexed']} file(s) indexed ({stats['records']} records), "
+                f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+            )
+        if not args.gold:
+            return 0
+        gold_files = [check_gold_file(index, path, args.threshold, args.max_matches) for path in iter_jsonl_files(args.gold)]
+        total = sum(entry["records"] for entry in gold_files)  # type: ignore[misc]
+        leaked = sum(entry["leaked_records"] for entry in gold_files)  # type: ignore[misc]
+        report = {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "threshold": args.threshold,
+            "index": index.summary(),
+            "summary": {"records": total, "leaked_records": leaked, "leak_rate": round(leaked / total, 4) if total else 0.0},
+            "gold_files": gold_files,
+        }
+    finally:
+        index.close()
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    for entry in gold_files:
+        print(f"{entry['path']}: {entry['leaked_records']}/{entry['records']} record(s) above {args.threshold}")
+    print(f"Leakage report written to {args.output}")
+    return 1 if args.fail_on_leak and leaked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Vectorized MinHash signatures and banded LSH for near-duplicate detection.
+
+Word shingles of a whole batch of texts are hashed into one ``uint64`` array,
+and all permutations are applied at once as a broadcast multiply-shift
+(``(a * x + b) >> 32`` with random odd ``a``), followed by a segmented minimum
+per text. LSH banding hashes every band of every signature in one pass, and
+candidate pairs come from sorting the band keys, so there is no per-record
+Python object or index insert.
+
+Token hashes come from BLAKE2b, so signatures are stable across processes and
+runs and can be persisted (see the QC cache and leakage index).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_SEED = 1
+
+# Shingles hashed per vectorized block; bounds the (shingles x permutations) matrix.
+SIGNATURE_BLOCK_SIZE = 65536
+PAIR_BLOCK_SIZE = 262144
+
+_SHINGLE_MULTIPLIER = np.uint64(0x100000001B3)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """Compute MinHash signatures for batches of texts over word shingles."""
+
+    def __init__(
+        self,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = DEFAULT_SEED,
+    ):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(0, 2**63, size=num_perm, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 2**63, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._token_cache: Dict[str, int] = {}
+
+    def _token_hashes(self, tokens: Sequence[str]) -> List[Optional[int]]:
+        cache = self._token_cache
+        hashes = list(map(cache.get, tokens))
+        if None in hashes:
+            for position, token in enumerate(tokens):
+                if hashes[position] is None:
+                    hashes[position] = cache[token] = _token_hash(token)
+        return hashes
+
+    def shingle_hashes(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(hashes, doc_ids)`` for every word shingle of ``texts``.
+
+        Texts shorter than the shingle size contribute a single shingle of all
+        their tokens, matching ``qc_report.generate_shingles``.
+        """
+        token_hashes: List[Optional[int]] = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        for idx, text in enumerate(texts):
+            tokens = text.lower().split()
+            lengths[idx] = len(tokens)
+            token_hashes.extend(self._token_hashes(tokens))
+        flat = np.array(token_hashes, dtype=np.uint64)
+        token_docs = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        doc_ends = np.cumsum(lengths)
+
+        k = self.shingle_size
+        hashes: List[np.ndarray] = []
+        doc_ids: List[np.ndarray] = []
+        with np.errstate(over="ignore"):
+            count = len(flat) - k + 1
+            if count > 0:
+                value = np.full(count, k, dtype=np.uint64)
+                for offset in range(k):
+                    value = value * _SHINGLE_MULTIPLIER + flat[offset : offset + count]
+                starts = np.arange(count)
+                # Keep windows that end inside their own text, for texts longer than k.
+                owner = token_docs[:count]
+                valid = (starts + k <= doc_ends[owner]) & (lengths[owner] > k)
+                hashes.append(value[valid])
+                doc_ids.append(owner[valid])
+            short_docs = np.flatnonzero((lengths > 0) & (lengths <= k))
+            if len(short_docs):
+                short_hashes = np.empty(len(short_docs), dtype=np.uint64)
+                for position, doc in enumerate(short_docs):
+                    value = np.uint64(lengths[doc])
+                    for token in flat[doc_ends[doc] - lengths[doc] : doc_ends[doc]]:
+                        value = value * _SHINGLE_MULTIPLIER + token
+                    short_hashes[position] = value
+                hashes.append(short_hashes)
+                doc_ids.append(short_docs)
+        if not hashes:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+        all_hashes = np.concatenate(hashes)
+        all_docs = np.concatenate(doc_ids)
+        order = np.argsort(all_docs, kind="stable")
+        return all_hashes[order], all_docs[order]
+
+    def signatures(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(signatures, valid)``: a ``(len(texts), num_perm)`` uint32 matrix
+        and a mask of texts that had at least one shingle."""
+        hashes, doc_ids = self.shingle_hashes(texts)
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        valid = np.zeros(len(texts), dtype=bool)
+        valid[doc_ids] = True
+        begin = 0
+        with np.errstate(over="ignore"):
+            while begin < len(hashes):
+                end = min(begin + SIGNATURE_BLOCK_SIZE, len(hashes))
+                # Extend the block to the end of its last text so segments are whole.
+                end = int(np.searchsorted(doc_ids, doc_ids[end - 1], side="right"))
+                # (permutations, shingles) keeps each segmented minimum contiguous.
+                permuted = self._a[:, None] * hashes[None, begin:end] + self._b[:, None]
+                block_docs = doc_ids[begin:end]
+                segment_starts = np.flatnonzero(np.r_[True, block_docs[1:] != block_docs[:-1]])
+                minima = np.minimum.reduceat(permuted, segment_starts, axis=1)
+                # The hash is the high word, and taking it commutes with the minimum.
+                signatures[block_docs[segment_starts]] = (minima >> np.uint64(32)).astype(np.uint32).T
+                begin = end
+        return signatures, valid
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        signatures, valid = self.signatures([text])
+        return signatures[0] if valid[0] else None
+
+
+def estimate_jaccard(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Row-wise Jaccard estimates for two aligned signature matrices (or vectors)."""
+    return np.mean(first == second, axis=-1)
+
+
+def _false_probabilities(threshold: float, bands: int, rows: int) -> Tuple[float, float]:
+    grid = np.linspace(0.0, 1.0, 1001)
+    collision = 1.0 - (1.0 - grid**rows) ** bands
+    below = grid <= threshold
+    false_positive = np.trapz(collision[below], grid[below])
+    false_negative = np.trapz(1.0 - collision[~below], grid[~below])
+    return float(false_positive), float(false_negative)
+
+
+@lru_cache(maxsize=None)
+def lsh_params(
+    threshold: float,
+    num_perm: int = DEFAULT_NUM_PERM,
+    false_positive_weight: float = 0.5,
+    false_negative_weight: float = 0.5,
+) -> Tuple[int, int]:
+    """Pick ``(bands, rows)`` minimising weighted false positive/negative mass
+    around ``threshold`` (the same criterion datasketch uses)."""
+    best = (1, num_perm)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive, false_negative = _false_probabilities(threshold, bands, rows)
+            error = false_positive * false_positive_weight + false_negative * false_negative_weight
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+def band_keys(signatures: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """Hash each band of each signature into a ``(len(signatures), bands)`` uint64 key matrix."""
+    multipliers = (np.arange(rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)) * _MIX
+    banded = signatures[:, : bands * rows].astype(np.uint64).reshape(len(signatures), bands, rows)
+    with np.errstate(over="ignore"):
+        keys = (banded * multipliers).sum(axis=2, dtype=np.uint64)
+        keys ^= np.arange(bands, dtype=np.uint64) * _SHINGLE_MULTIPLIER
+    return keys
+
+
+def _bucket_pairs(keys: np.ndarray, ids: np.ndarray) -> Iterable[np.ndarray]:
+    """Yield ``(n, 2)`` arrays of id pairs that share a key."""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    sorted_ids = ids[order]
+    boundaries = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1], True])
+    sizes = np.diff(boundaries)
+    for start, size in zip(boundaries[:-1][sizes > 1], sizes[sizes > 1]):
+        members = np.sort(sorted_ids[start : start + size])
+        first, second = np.triu_indices(size, k=1)
+        yield np.stack([members[first], members[second]], axis=1)
+
+
+def candidate_pairs(signatures: np.ndarray, valid: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """Unique ``(i, j)`` pairs (``i < j``) that collide in at least one band."""
+    ids = np.flatnonzero(valid)
+    if len(ids) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    keys = band_keys(signatures[ids], bands, rows)
+    chunks: List[np.ndarray] = []
+    for band in range(bands):
+        chunks.extend(_bucket_pairs(keys[:, band], ids))
+    if not chunks:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.concatenate(chunks)
+    return np.unique(pairs, axis=0)
+
+
+def near_duplicate_pairs(
+    signatures: np.ndarray,
+    valid: np.ndarray,
+    threshold: float,
+) -> List[Tuple[int, int, float]]:
+    """Return verified ``(i, j, similarity)`` pairs with estimated Jaccard >= ``threshold``."""
+    bands, rows = lsh_params(threshold, signatures.shape[1])
+    pairs = candidate_pairs(signatures, valid, bands, rows)
+    found: List[Tuple[int, int, float]] = []
+    for begin in range(0, len(pairs), PAIR_BLOCK_SIZE):
+        block = pairs[begin : begin + PAIR_BLOCK_SIZE]
+        similarity = estimate_jaccard(signatures[block[:, 0]], signatures[block[:, 1]])
+        keep = similarity >= threshold
+        found.extend(
+            (int(i), int(j), float(score))
+            for (i, j), score in zip(block[keep], similarity[keep])
+        )
+    return found
+
+
+class StreamingLSH:
+    """Disk-backed LSH index that flags near duplicates of earlier records.
+
+    Records arrive in batches with increasing ids. Each band key is owned by
+    the first record that produced it, and a new record is compared only with
+    the owners of its band keys, so work per record is bounded by the number
+    of bands. Band keys, owner signatures and the ids of every record found in
+    a near-duplicate pair live in SQLite, so memory stays flat however long
+    the stream is.
+    """
+
+    def __init__(self, path: str, threshold: float, num_perm: int = DEFAULT_NUM_PERM):
+        import sqlite3  # noqa: PLC0415 - only the streaming index needs it
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode=OFF;
+            PRAGMA synchronous=OFF;
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL, key INTEGER NOT NULL, doc INTEGER NOT NULL,
+                PRIMARY KEY (band, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS signatures (doc INTEGER PRIMARY KEY, sig BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS duplicates (doc INTEGER PRIMARY KEY);
+            CREATE TEMP TABLE batch (band INTEGER NOT NULL, key INTEGER NOT NULL, doc INTEGER NOT NULL);
+            """
+        )
+
+    def detection_probability_upper_bound(self, similarity: float) -> float:
+        """Chance that a pair with Jaccard ``similarity`` shares at least one band.
+
+        This is the textbook banding S-curve and only bounds recall from above:
+        a record is compared with the first owner of each of its band keys, not
+        with every earlier record in the bucket, so a pair that meets only
+        through a non-owner is missed.
+        """
+        return 1.0 - (1.0 - similarity**self.rows) ** self.bands
+
+    def add_batch(self, doc_ids: np.ndarray, signatures: np.ndarray, valid: np.ndarray) -> List[Tuple[int, int, float]]:
+        """Index a batch and return verified ``(earlier, doc, similarity)`` pairs."""
+        doc_ids = doc_ids[valid]
+        signatures = signatures[valid]
+        if not len(doc_ids):
+            return []
+        keys = band_keys(signatures, self.bands, self.rows).view(np.int64)
+        bands = np.broadcast_to(np.arange(self.bands, dtype=np.int64), keys.shape)
+        docs = np.broadcast_to(doc_ids[:, None], keys.shape)
+        conn = self.conn
+        conn.execute("DELETE FROM batch")
+        conn.executemany(
+            "INSERT INTO batch VALUES (?, ?, ?)",
+            zip(bands.ravel().tolist(), keys.ravel().tolist(), docs.ravel().tolist()),
+        )
+        conn.execute("INSERT OR IGNORE INTO bands SELECT band, key, MIN(doc) FROM batch GROUP BY band, key")
+        # Records that now own a band key are the only ones later records compare against.
+        owners = [
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT b.doc FROM batch b JOIN bands s ON s.band = b.band AND s.key = b.key WHERE s.doc = b.doc"
+            )
+        ]
+        position = {int(doc): idx for idx, doc in enumerate(doc_ids)}
+        conn.executemany(
+            "INSERT OR IGNORE INTO signatures VALUES (?, ?)",
+            ((doc, signatures[position[doc]].tobytes()) for doc in owners),
+        )
+        candidates = conn.execute(
+            "SELECT DISTINCT s.doc, b.doc, g.sig FROM batch b "
+            "JOIN bands s ON s.band = b.band AND s.key = b.key "
+            "JOIN signatures g ON g.doc = s.doc WHERE s.doc < b.doc"
+        ).fetchall()
+        found: List[Tuple[int, int, float]] = []
+        for earlier, doc, blob in candidates:
+            similarity = float(estimate_jaccard(np.frombuffer(blob, dtype=np.uint32), signatures[position[doc]]))
+            if similarity >= self.threshold:
+                found.append((int(earlier), int(doc), similarity))
+        conn.executemany(
+            "INSERT OR IGNORE INTO duplicates VALUES (?)",
+            ((doc,) for pair in found for doc in pair[:2]),
+        )
+        conn.commit()
+        return found
+
+    def duplicate_count(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM duplicates").fetchone()[0])
+
+    def close(self) -> None:
+        self.conn.close()
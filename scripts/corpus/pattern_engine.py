@@ -0,0 +1,280 @@
+"""Compiled multi-pattern matcher for weak-supervision labeling.
+
+A :class:`PatternSet` is built once per category from the label -> regex
+mapping produced by ``build_category_dataset.get_patterns_for_category``. It
+folds each text once, checks a deduplicated set of required literal
+substrings, and only runs a label's combined alternation when at least one
+of its patterns could possibly match.
+
+With a ``match_budget`` the patterns are searched one at a time under a
+``SIGALRM`` interval timer; a search that overruns is abandoned, counted as a
+miss and recorded in :attr:`PatternSet.timeouts`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import signal
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple
+
+try:  # Python 3.11+ moved the parser behind a private name
+    from re import _constants as sre_constants  # type: ignore[attr-defined]
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_constants  # type: ignore[no-redef]
+    import sre_parse  # type: ignore[no-redef]
+
+# Characters that ``re.IGNORECASE`` treats as equal to an ASCII letter but
+# that ``str.lower`` does not map onto it.
+_IGNORECASE_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "K": "k"})
+
+_LITERAL = sre_constants.LITERAL
+_SUBPATTERN = sre_constants.SUBPATTERN
+_BRANCH = sre_constants.BRANCH
+_AT = sre_constants.AT
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+
+class MatchTimeout(Exception):
+    """Raised inside a regex search that exceeded its time budget."""
+
+
+def _raise_timeout(signum: int, frame: object) -> None:
+    raise MatchTimeout()
+
+
+def budget_supported() -> bool:
+    """Interval timers only interrupt the main thread on POSIX platforms."""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def search_with_budget(pattern: re.Pattern[str], text: str, budget: float) -> Optional[re.Match[str]]:
+    """Search ``text`` but raise :class:`MatchTimeout` after ``budget`` seconds."""
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, budget)
+    try:
+        return pattern.search(text)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def fold_text(text: str) -> str:
+    """Normalise text so ASCII literal checks agree with ``re.IGNORECASE``."""
+    return text.translate(_IGNORECASE_FOLD).lower()
+
+
+def _score(anchors: FrozenSet[str]) -> Tuple[int, int]:
+    return (min(len(item) for item in anchors), -len(anchors))
+
+
+def _sequence_anchors(items: Sequence[Tuple[object, object]]) -> Optional[FrozenSet[str]]:
+    candidates: List[FrozenSet[str]] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run.clear()
+
+    for op, arg in items:
+        if op == _LITERAL and arg < 128:
+            run.append(chr(arg).lower())
+            continue
+        if op == _AT:
+            continue
+        flush()
+        sub = _node_anchors(op, arg)
+        if sub:
+            candidates.append(sub)
+    flush()
+
+    if not candidates:
+        return None
+    return max(candidates, key=_score)
+
+
+def _node_anchors(op: object, arg: object) -> Optional[FrozenSet[str]]:
+    """Return literals of which every match must contain at least one."""
+    if op == _SUBPATTERN:
+        return _sequence_anchors(arg[-1])  # type: ignore[index]
+    if op == _BRANCH:
+        merged: Set[str] = set()
+        for branch in arg[1]:  # type: ignore[index]
+            anchors = _sequence_anchors(branch)
+            if not anchors:
+                return None
+            merged.update(anchors)
+        return frozenset(merged)
+    if op in _REPEATS:
+        minimum, _maximum, body = arg  # type: ignore[misc]
+        if minimum < 1:
+            return None
+        return _sequence_anchors(body)
+    return None
+
+
+def required_literals(pattern: re.Pattern[str]) -> Optional[FrozenSet[str]]:
+    """Extract lowercase ASCII literals, one of which appears in every match.
+
+    Returns ``None`` when no such set can be derived, in which case the
+    pattern is always evaluated.
+    """
+    if not pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except (re.error, TypeError):  # pragma: no cover - already compiled once
+        return None
+    return _sequence_anchors(list(parsed))
+
+
+def pattern_literals(pattern: re.Pattern[str], min_length: int = 2) -> List[str]:
+    """Collect every ASCII literal run in a pattern, in pattern order."""
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except (re.error, TypeError):  # pragma: no cover - already compiled once
+        return []
+
+    found: List[str] = []
+
+    def walk(items: Sequence[Tuple[object, object]]) -> None:
+        run: List[str] = []
+        for op, arg in items:
+            if op == _LITERAL and arg < 128:
+                run.append(chr(arg).lower())
+                continue
+            if len(run) >= min_length:
+                found.append("".join(run))
+            run = []
+            if op == _SUBPATTERN:
+                walk(arg[-1])  # type: ignore[index]
+            elif op == _BRANCH:
+                for branch in arg[1]:  # type: ignore[index]
+                    walk(branch)
+            elif op in _REPEATS:
+                walk(arg[2])  # type: ignore[index]
+        if len(run) >= min_length:
+            found.append("".join(run))
+
+    walk(list(parsed))
+    return list(dict.fromkeys(found))
+
+
+def _combine(patterns: Sequence[re.Pattern[str]]) -> Optional[re.Pattern[str]]:
+    if len(patterns) == 1:
+        return patterns[0]
+    flags = {pattern.flags for pattern in patterns}
+    if len(flags) != 1:
+        return None
+    try:
+        return re.compile("|".join(f"(?:{pattern.pattern})" for pattern in patterns), flags.pop())
+    except re.error:
+        # Backreferences or inline global flags do not survive concatenation.
+        return None
+
+
+@dataclass(frozen=True)
+class LabelMatcher:
+    label: str
+    patterns: Tuple[re.Pattern[str], ...]
+    combined: Optional[re.Pattern[str]]
+    anchors: Optional[FrozenSet[str]]
+    pattern_anchors: Tuple[Optional[FrozenSet[str]], ...]
+
+    def search(self, text: str) -> bool:
+        if self.combined is not None:
+            return self.combined.search(text) is not None
+        return any(pattern.search(text) for pattern in self.patterns)
+
+
+class PatternSet:
+    """All label patterns for one category compiled into a single matcher."""
+
+    def __init__(
+        self,
+        label_patterns: Mapping[str, Sequence[re.Pattern[str]]],
+        match_budget: Optional[float] = None,
+    ):
+        self.matchers: List[LabelMatcher] = []
+        self.match_budget = match_budget
+        self.timeouts: Counter[Tuple[str, str]] = Counter()
+        anchor_pool: Set[str] = set()
+        for label, patterns in label_patterns.items():
+            patterns = tuple(patterns)
+            if not patterns:
+                continue
+            pattern_anchors = tuple(required_literals(pattern) for pattern in patterns)
+            # The budgeted path prefilters each pattern on its own anchors, so every
+            # pattern's anchors must be looked up, even when the label has none.
+            for item in pattern_anchors:
+                if item is not None:
+                    anchor_pool.update(item)
+            anchors: Optional[FrozenSet[str]] = None
+            if all(item is not None for item in pattern_anchors):
+                anchors = frozenset().union(*pattern_anchors)  # type: ignore[arg-type]
+            self.matchers.append(
+                LabelMatcher(label, patterns, _combine(patterns), anchors, pattern_anchors)
+            )
+        self.anchor_pool: Tuple[str, ...] = tuple(sorted(anchor_pool))
+        self.fingerprint = hashlib.sha256(
+            "\n".join(
+                f"{matcher.label}\t{pattern.flags}\t{pattern.pattern}"
+                for matcher in self.matchers
+                for pattern in matcher.patterns
+            ).encode("utf-8")
+        ).hexdigest()
+
+    @property
+    def labels(self) -> List[str]:
+        return [matcher.label for matcher in self.matchers]
+
+    def __len__(self) -> int:
+        return len(self.matchers)
+
+    def match_labels(self, text: str) -> List[str]:
+        """Return every label with at least one matching pattern."""
+        folded = fold_text(text)
+        present = {anchor for anchor in self.anchor_pool if anchor in folded}
+        budget = self.match_budget if self.match_budget and budget_supported() else None
+        matched: List[str] = []
+        for matcher in self.matchers:
+            if matcher.anchors is not None and matcher.anchors.isdisjoint(present):
+                continue
+            if budget is None:
+                if matcher.search(text):
+                    matched.append(matcher.label)
+            elif self._budgeted_search(matcher, text, present, budget):
+                matched.append(matcher.label)
+        return matched
+
+    def _budgeted_search(
+        self,
+        matcher: LabelMatcher,
+        text: str,
+        present: Set[str],
+        budget: float,
+    ) -> bool:
+        # Patterns run individually so a runaway regex can be attributed.
+        for pattern, anchors in zip(matcher.patterns, matcher.pattern_anchors):
+            if anchors is not None and anchors.isdisjoint(present):
+                continue
+            try:
+                if search_with_budget(pattern, text, budget):
+                    return True
+            except MatchTimeout:
+                self.timeouts[(matcher.label, pattern.pattern)] += 1
+        return False
+
+    def drain_timeouts(self) -> Counter[Tuple[str, str]]:
+        """Return and reset the (label, pattern) -> count of abandoned searches."""
+        drained = self.timeouts
+        self.timeouts = Counter()
+        return drained
+
+    def scores(self, text: str) -> Dict[str, float]:
+        return {label: 1.0 for label in self.match_labels(text)}
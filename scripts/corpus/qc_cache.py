@@ -0,0 +1,88 @@
+"""Persistent per-record QC analysis cache for incremental QC across versions.
+
+Entries are keyed by (text hash, analysis version) and hold the token count,
+language detection and MinHash signature of a record, so re-running QC on a
+dataset version that mostly repeats the previous one only analyses new texts.
+The analysis version changes whenever the tokenizer, language profiles or
+MinHash parameters do, which invalidates stale entries without a purge.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_QC_CACHE_PATH = REPO_ROOT / "data" / "cache" / "qc_cache.sqlite"
+
+# SQLite limits the number of bound parameters per statement.
+LOOKUP_BATCH_SIZE = 900
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedAnalysis:
+    token_count: int
+    language: Tuple[str, float, Dict[str, float]]
+    # Raw uint32 MinHash signature bytes; None when the text has no shingles.
+    signature: Optional[bytes]
+
+
+class QCCache:
+    """SQLite-backed store of per-record QC analysis results."""
+
+    def __init__(self, path: Path, analysis_version: str):
+        self.path = path
+        self.analysis_version = analysis_version
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                text_hash TEXT NOT NULL,
+                analysis_version TEXT NOT NULL,
+                token_count INTEGER NOT NULL,
+                language TEXT NOT NULL,
+                signature BLOB,
+                PRIMARY KEY (text_hash, analysis_version)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, CachedAnalysis]:
+        found: Dict[str, CachedAnalysis] = {}
+        unique = list(dict.fromkeys(hashes))
+        for begin in range(0, len(unique), LOOKUP_BATCH_SIZE):
+            batch = unique[begin : begin + LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                "SELECT text_hash, token_count, language, signature FROM analyses "
+                f"WHERE analysis_version = ? AND text_hash IN ({placeholders})",
+                (self.analysis_version, *batch),
+            )
+            for digest, token_count, language, signature in rows:
+                label, confidence, distribution = json.loads(language)
+                found[digest] = CachedAnalysis(token_count, (label, confidence, distribution), signature)
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, CachedAnalysis]]) -> None:
+        rows: List[Tuple[str, str, int, str, Optional[bytes]]] = [
+            (digest, self.analysis_version, entry.token_count, json.dumps(list(entry.language)), entry.signature)
+            for digest, entry in entries
+        ]
+        if not rows:
+            return
+        self.conn.executemany("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -4,15 +4,22 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import itertools
 import json
 import math
+import multiprocessing
+import os
 import statistics
 import sys
-from collections import Counter, defaultdict
-from dataclasses import dataclass
+import tempfile
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import yaml
 
@@ -26,42 +33,44 @@ except ImportError:  # pragma: no cover - fallback when langdetect missing
     detect_langs = None  # type: ignore[assignment]
     LANGDETECT_AVAILABLE = False
 
-try:  # pragma: no cover - optional dependency guard
-    from datasketch import MinHash, MinHashLSH
-
-    DATASKETCH_AVAILABLE = True
-except ImportError:  # pragma: no cover - fallback when datasketch missing
-    MinHash = None  # type: ignore[assignment]
-    MinHashLSH = None  # type: ignore[assignment]
-    DATASKETCH_AVAILABLE = False
-
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:  # pragma: no cover - runtime path fix for scripts
     sys.path.insert(0, str(REPO_ROOT))
 
+from scripts.corpus.dedupe_index import content_hash64
+from scripts.corpus.language_id import (
+    LanguageResult,
+    get_profiles,
+    heuristic_language_label,
+    identify_languages,
+)
+from scripts.corpus.qc_cache import DEFAULT_QC_CACHE_PATH, CachedAnalysis, QCCache, text_hash
 from scripts.ml.category_config import CATEGORY_REGISTRY, CategoryConfig
 
-DEFAULT_STOPWORDS = {
-    "the",
-    "and",
-    "that",
-    "shall",
-    "will",
-    "you",
-    "your",
-    "our",
-    "may",
-    "not",
-    "for",
-    "with",
-    "have",
-    "hereby",
-    "such",
-    "this",
-}
+try:  # pragma: no cover - optional dependency guard
+    import numpy as np
+
+    from scripts.corpus.minhash import MinHasher, StreamingLSH, near_duplicate_pairs
+    from scripts.corpus.sketches import HyperLogLog, KLLSketch
+
+    MINHASH_AVAILABLE = True
+except ImportError:  # pragma: no cover - fallback when numpy missing
+    np = None  # type: ignore[assignment]
+    MinHasher = None  # type: ignore[assignment,misc]
+    StreamingLSH = None  # type: ignore[assignment,misc]
+    near_duplicate_pairs = None  # type: ignore[assignment]
+    HyperLogLog = None  # type: ignore[assignment,misc]
+    KLLSketch = None  # type: ignore[assignment,misc]
+    MINHASH_AVAILABLE = False
 
 MINHASH_PERMUTATIONS = 128
 MINHASH_SHINGLE_SIZE = 3
+QC_CHUNK_SIZE = 2000
+# Streaming mode keeps at most this many integrity/structure messages.
+STREAMING_MESSAGE_LIMIT = 1000
+# Bump when tokenization or language post-processing changes so cached
+# per-record analyses are recomputed.
+QC_ANALYSIS_VERSION = "1"
 
 DEFAULT_THRESHOLD_VALUES = {
     "max_duplicate_ratio": 0.05,
@@ -108,12 +117,20 @@ class LanguageStats:
     confidence_summary: Dict[str, float]
 
 
+@dataclass
+class DuplicateCluster:
+    representative: int
+    size: int
+    members: List[int]
+
+
 @dataclass
 class DedupeStats:
     duplicate_ratio: float
     sample_duplicates: List[Tuple[int, int]]
     flags: List[str]
     similarity_threshold: float
+    exact_clusters: List[DuplicateCluster] = field(default_factory=list)
 
 
 @dataclass
@@ -124,7 +141,11 @@ class LabelStats:
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("--category", required=True, choices=sorted(CATEGORY_REGISTRY.keys()))
+    parser.add_argument(
+        "--category",
+        choices=sorted(CATEGORY_REGISTRY.keys()),
+        help="Category whose labels are validated (optional with --streaming, e.g. for data/corpus harvests)",
+    )
     parser.add_argument("--dataset", required=True, help="Path to processed dataset JSONL file")
     parser.add_argument("--manifest", help="Optional manifest JSON with expected counts")
     parser.add_argument("--sources", default="", help="Comma-separated source identifiers to include in metadata")
@@ -164,9 +185,90 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Similarity threshold for MinHash near-duplicate detection (0-1).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for per-record stages; analyses also run concurrently (1 = serial)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=QC_CHUNK_SIZE,
+        help="Records per worker task",
+    )
+    parser.add_argument(
+        "--qc-cache",
+        default=str(DEFAULT_QC_CACHE_PATH),
+        help="SQLite cache of per-record analyses reused across versions; only new texts are analysed",
+    )
+    parser.add_argument("--no-qc-cache", action="store_true", help="Analyse every record from scratch")
+    parser.add_argument(
+        "--diff-against",
+        help="Previous dataset JSONL to diff against (default: the preceding version directory, if any)",
+    )
+    parser.add_argument("--no-diff", action="store_true", help="Skip the version-to-version diff report")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Single-pass constant-memory mode (quantile/HyperLogLog sketches, disk-backed LSH)",
+    )
+    parser.add_argument(
+        "--sketch-dir",
+        help="Directory for the streaming LSH index's temporary files (default: system temp dir)",
+    )
     parser.add_argument("--fail-on-warning", action="store_true", help="Exit non-zero if any warnings were raised")
     parser.add_argument("--sample-limit", type=int, default=20, help="Limit count for sample issue listings")
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.category and not args.streaming:
+        parser.error("--category is required unless --streaming is set")
+    return args
+
+
+def parse_record_line(
+    idx: int,
+    line: str,
+    config: Optional[CategoryConfig],
+) -> Tuple[Optional[DatasetRecord], List[str], List[str]]:
+    """Validate one JSONL line, returning ``(record, integrity_errors, structure_issues)``.
+
+    Without a category ``config`` (raw corpus harvests) labels are optional and
+    passed through unvalidated.
+    """
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError as exc:  # pragma: no cover - depends on malformed data
+        return None, [f"Line {idx}: JSON decode error: {exc}"], []
+
+    structure_issues: List[str] = []
+    text = str(payload.get("text", "")).strip()
+    labels = payload.get("labels")
+
+    if not text:
+        structure_issues.append(f"Line {idx}: Missing or empty text field")
+    if config is None:
+        return DatasetRecord(text=text, labels=labels if isinstance(labels, dict) else {}), [], structure_issues
+    if not isinstance(labels, dict):
+        structure_issues.append(f"Line {idx}: Labels must be an object, got {type(labels).__name__}")
+        labels = {}
+
+    validated_labels: Dict[str, float] = {}
+    for label in config.label_list:
+        value = labels.get(label, 0.0)
+        try:
+            validated_labels[label] = float(value)
+        except (TypeError, ValueError):
+            structure_issues.append(
+                f"Line {idx}: Label '{label}' should be numeric, got {value!r}"
+            )
+            validated_labels[label] = 0.0
+
+    for unknown_label in set(labels or {}).difference(config.label_list):
+        structure_issues.append(
+            f"Line {idx}: Unknown label '{unknown_label}' not defined for category {config.name}"
+        )
+
+    return DatasetRecord(text=text, labels=validated_labels), [], structure_issues
 
 
 def load_dataset(path: Path, config: CategoryConfig) -> Tuple[List[DatasetRecord], IntegrityResult, StructureResult]:
@@ -183,38 +285,11 @@ def load_dataset(path: Path, config: CategoryConfig) -> Tuple[List[DatasetRecord
                 line = raw_line.strip()
                 if not line:
                     continue
-                try:
-                    payload = json.loads(line)
-                except json.JSONDecodeError as exc:  # pragma: no cover - depends on malformed data
-                    integrity_errors.append(f"Line {idx}: JSON decode error: {exc}")
-                    continue
-
-                text = str(payload.get("text", "")).strip()
-                labels = payload.get("labels")
-
-                if not text:
-                    structure_issues.append(f"Line {idx}: Missing or empty text field")
-                if not isinstance(labels, dict):
-                    structure_issues.append(f"Line {idx}: Labels must be an object, got {type(labels).__name__}")
-                    labels = {}
-
-                validated_labels: Dict[str, float] = {}
-                for label in config.label_list:
-                    value = labels.get(label, 0.0)
-                    try:
-                        validated_labels[label] = float(value)
-                    except (TypeError, ValueError):
-                        structure_issues.append(
-                            f"Line {idx}: Label '{label}' should be numeric, got {value!r}"
-                        )
-                        validated_labels[label] = 0.0
-
-                for unknown_label in set(labels or {}).difference(config.label_list):
-                    structure_issues.append(
-                        f"Line {idx}: Unknown label '{unknown_label}' not defined for category {config.name}"
-                    )
-
-                records.append(DatasetRecord(text=text, labels=validated_labels))
+                record, line_errors, line_issues = parse_record_line(idx, line, config)
+                integrity_errors.extend(line_errors)
+                structure_issues.extend(line_issues)
+                if record is not None:
+                    records.append(record)
     except UnicodeDecodeError as exc:  # pragma: no cover - depends on malformed file
         integrity_errors.append(f"Unicode decode error: {exc}")
     except OSError as exc:  # pragma: no cover - filesystem issues
@@ -230,9 +305,39 @@ def tokenize(text: str) -> List[str]:
     return [token for token in text.split() if token]
 
 
-def compute_length_stats(records: Sequence[DatasetRecord], min_tokens: int, max_tokens: int, sample_limit: int) -> LengthStats:
-    char_lengths = [len(record.text) for record in records]
-    token_lengths = [len(tokenize(record.text)) for record in records]
+def token_counts(texts: Sequence[str]) -> List[int]:
+    return [len(tokenize(text)) for text in texts]
+
+
+def map_record_chunks(
+    fn: Callable[[Sequence[str]], Any],
+    texts: Sequence[str],
+    pool: Optional[Executor] = None,
+    chunk_size: int = QC_CHUNK_SIZE,
+) -> List[Any]:
+    """Apply ``fn`` to consecutive chunks of ``texts``, returning per-chunk results in order.
+
+    Without a pool, or when everything fits in one chunk, ``fn`` runs inline.
+    """
+    if pool is None or len(texts) <= chunk_size:
+        return [fn(texts)]
+    futures = [pool.submit(fn, texts[begin : begin + chunk_size]) for begin in range(0, len(texts), chunk_size)]
+    return [future.result() for future in futures]
+
+
+def compute_length_stats(
+    records: Sequence[DatasetRecord],
+    min_tokens: int,
+    max_tokens: int,
+    sample_limit: int,
+    pool: Optional[Executor] = None,
+    chunk_size: int = QC_CHUNK_SIZE,
+    token_lengths: Optional[Sequence[int]] = None,
+) -> LengthStats:
+    texts = [record.text for record in records]
+    char_lengths = [len(text) for text in texts]
+    if token_lengths is None:
+        token_lengths = list(itertools.chain.from_iterable(map_record_chunks(token_counts, texts, pool, chunk_size)))
 
     def summarise(values: Sequence[int]) -> Dict[str, float]:
         if not values:
@@ -312,111 +417,149 @@ def load_thresholds(category: str, args: argparse.Namespace) -> Dict[str, float]
 LANGDETECT_CONFIDENCE_THRESHOLD = 0.7
 
 
-def heuristic_language_label(text: str) -> str:
-    ascii_chars = sum(1 for ch in text if ch.isascii())
-    total_chars = len(text)
-    if total_chars == 0:
-        return "unknown"
-    non_ascii_ratio = 1 - (ascii_chars / total_chars)
-
-    tokens = [token.strip(".,;:!?()[]\"'").lower() for token in text.split() if token]
-    english_hits = sum(1 for token in tokens if token in DEFAULT_STOPWORDS)
-    token_count = len(tokens) or 1
-    english_ratio = english_hits / token_count
-
-    if english_ratio >= 0.2 and non_ascii_ratio < 0.3:
-        return "en"
-    if english_ratio >= 0.1:
-        return "mixed"
-    return "unknown"
-
-
-def detect_language(text: str) -> Tuple[str, float, Dict[str, float]]:
-    stripped = text.strip()
-    if not stripped:
-        return "unknown", 0.0, {"unknown": 1.0}
-
+def _langdetect_language(stripped: str) -> LanguageResult:
     if LANGDETECT_AVAILABLE and detect_langs is not None:
         try:
             candidates = detect_langs(stripped)
             if candidates:
                 top = max(candidates, key=lambda item: item.prob)
                 distribution = {item.lang.lower(): float(item.prob) for item in candidates}
-                label = top.lang.lower()
-                confidence = float(top.prob)
-                if confidence < LANGDETECT_CONFIDENCE_THRESHOLD:
-                    heuristic = heuristic_language_label(stripped)
-                    label = heuristic if heuristic != "unknown" else "mixed"
-                return label, confidence, distribution
+                return top.lang.lower(), float(top.prob), distribution
         except LangDetectException:  # pragma: no cover - relies on langdetect internals
             pass
-
     heuristic_label = heuristic_language_label(stripped)
     return heuristic_label, 0.0, {heuristic_label: 1.0}
 
 
-def analyse_languages(records: Sequence[DatasetRecord], sample_limit: int) -> LanguageStats:
-    language_counts: Counter[str] = Counter()
-    probability_totals: DefaultDict[str, float] = defaultdict(float)
-    non_primary_samples: List[int] = []
-    low_confidence_samples: List[int] = []
-    confidence_values: List[float] = []
+def detect_languages(texts: Sequence[str]) -> List[LanguageResult]:
+    """Classify a batch of texts with the shared n-gram identifier.
 
-    for idx, record in enumerate(records):
-        label, confidence, distribution = detect_language(record.text)
-        language_counts[label] += 1
-        confidence_values.append(confidence)
-        if label != "en" and len(non_primary_samples) < sample_limit:
-            non_primary_samples.append(idx)
-        if label == "en" and confidence < LANGDETECT_CONFIDENCE_THRESHOLD and len(low_confidence_samples) < sample_limit:
-            low_confidence_samples.append(idx)
+    Falls back to per-text langdetect when NumPy or the language profiles are
+    unavailable, and to the stopword heuristic when neither is.
+    """
+    if get_profiles() is not None:
+        results = identify_languages(texts)
+    else:
+        results = [
+            _langdetect_language(text.strip()) if text.strip() else ("unknown", 0.0, {"unknown": 1.0})
+            for text in texts
+        ]
+
+    labelled: List[LanguageResult] = []
+    for text, (label, confidence, distribution) in zip(texts, results):
+        if 0.0 < confidence < LANGDETECT_CONFIDENCE_THRESHOLD:
+            heuristic = heuristic_language_label(text.strip())
+            label = heuristic if heuristic != "unknown" else "mixed"
+        labelled.append((label, confidence, distribution))
+    return labelled
+
+
+def detect_language(text: str) -> LanguageResult:
+    return detect_languages([text])[0]
+
+
+class LanguageAccumulator:
+    """Fold per-record language detections into :class:`LanguageStats`.
+
+    The confidence median is exact unless a quantile ``confidence_sketch`` is
+    given, which keeps memory constant in streaming mode.
+    """
+
+    def __init__(self, sample_limit: int, confidence_sketch: Optional["KLLSketch"] = None):
+        self.sample_limit = sample_limit
+        self.total_records = 0
+        self.language_counts: Counter[str] = Counter()
+        self.probability_totals: DefaultDict[str, float] = defaultdict(float)
+        self.non_primary_samples: List[int] = []
+        self.low_confidence_samples: List[int] = []
+        self.confidence_sketch = confidence_sketch
+        self.confidence_values: List[float] = []
+        self.confidence_count = 0
+        self.confidence_sum = 0.0
+        self.confidence_min = math.inf
+
+    def add(self, idx: int, label: str, confidence: float, distribution: Dict[str, float]) -> None:
+        sample_limit = self.sample_limit
+        self.total_records += 1
+        self.language_counts[label] += 1
+        if confidence > 0:
+            self.confidence_count += 1
+            self.confidence_sum += confidence
+            self.confidence_min = min(self.confidence_min, confidence)
+            if self.confidence_sketch is not None:
+                self.confidence_sketch.update(confidence)
+            else:
+                self.confidence_values.append(confidence)
+        if label != "en" and len(self.non_primary_samples) < sample_limit:
+            self.non_primary_samples.append(idx)
+        if label == "en" and confidence < LANGDETECT_CONFIDENCE_THRESHOLD and len(self.low_confidence_samples) < sample_limit:
+            self.low_confidence_samples.append(idx)
         for iso_code, probability in distribution.items():
-            probability_totals[iso_code] += probability
-
-    total_records = len(records)
-    breakdown = {}
-    if total_records:
-        breakdown = {
-            iso_code: round(total / total_records, 4)
-            for iso_code, total in sorted(probability_totals.items())
-        }
+            self.probability_totals[iso_code] += probability
+
+    def result(self) -> LanguageStats:
+        total_records = self.total_records
+        breakdown = {}
+        if total_records:
+            breakdown = {
+                iso_code: round(total / total_records, 4)
+                for iso_code, total in sorted(self.probability_totals.items())
+            }
 
-    classification = {}
-    if total_records:
-        classification = {
-            language: round(count / total_records, 4)
-            for language, count in sorted(language_counts.items())
-        }
+        classification = {}
+        if total_records:
+            classification = {
+                language: round(count / total_records, 4)
+                for language, count in sorted(self.language_counts.items())
+            }
 
-    primary = max(breakdown, key=breakdown.get) if breakdown else "unknown"
-    flags: List[str] = []
-    non_primary_fraction = 1.0 - breakdown.get("en", 0.0)
-    if non_primary_fraction > 0 and non_primary_samples:
-        flags.append(
-            f"{non_primary_fraction:.2%} of tokens attributed to non-English languages (examples: {', '.join(map(str, non_primary_samples))})"
-        )
-    if low_confidence_samples:
-        flags.append(
-            f"Detected low-confidence English classifications (examples: {', '.join(map(str, low_confidence_samples))})"
-        )
+        primary = max(breakdown, key=breakdown.get) if breakdown else "unknown"
+        flags: List[str] = []
+        non_primary_fraction = 1.0 - breakdown.get("en", 0.0)
+        if non_primary_fraction > 0 and self.non_primary_samples:
+            flags.append(
+                f"{non_primary_fraction:.2%} of tokens attributed to non-English languages (examples: {', '.join(map(str, self.non_primary_samples))})"
+            )
+        if self.low_confidence_samples:
+            flags.append(
+                f"Detected low-confidence English classifications (examples: {', '.join(map(str, self.low_confidence_samples))})"
+            )
 
-    confidence_summary: Dict[str, float] = {}
-    if confidence_values:
-        filtered = [value for value in confidence_values if value > 0]
-        if filtered:
+        confidence_summary: Dict[str, float] = {}
+        if self.confidence_count:
+            if self.confidence_sketch is not None:
+                median = self.confidence_sketch.quantiles([0.5])[0]
+            else:
+                median = statistics.median(self.confidence_values)
             confidence_summary = {
-                "mean": round(statistics.mean(filtered), 3),
-                "median": round(statistics.median(filtered), 3),
-                "min": round(min(filtered), 3),
+                "mean": round(self.confidence_sum / self.confidence_count, 3),
+                "median": round(median, 3),
+                "min": round(self.confidence_min, 3),
             }
 
-    return LanguageStats(
-        primary=primary,
-        breakdown=breakdown,
-        flags=flags,
-        classification=classification,
-        confidence_summary=confidence_summary,
-    )
+        return LanguageStats(
+            primary=primary,
+            breakdown=breakdown,
+            flags=flags,
+            classification=classification,
+            confidence_summary=confidence_summary,
+        )
+
+
+def analyse_languages(
+    records: Sequence[DatasetRecord],
+    sample_limit: int,
+    pool: Optional[Executor] = None,
+    chunk_size: int = QC_CHUNK_SIZE,
+    detections: Optional[Sequence[LanguageResult]] = None,
+) -> LanguageStats:
+    if detections is None:
+        texts = [record.text for record in records]
+        detections = list(itertools.chain.from_iterable(map_record_chunks(detect_languages, texts, pool, chunk_size)))
+    accumulator = LanguageAccumulator(sample_limit)
+    for idx, (label, confidence, distribution) in enumerate(detections):
+        accumulator.add(idx, label, confidence, distribution)
+    return accumulator.result()
 
 
 def normalise_text(text: str) -> str:
@@ -435,97 +578,124 @@ def generate_shingles(text: str, shingle_size: int) -> List[str]:
     ]
 
 
-def compute_minhash(text: str) -> Optional[MinHash]:
-    if not DATASKETCH_AVAILABLE or MinHash is None:
+@lru_cache(maxsize=1)
+def get_minhasher() -> Optional["MinHasher"]:
+    if not MINHASH_AVAILABLE or MinHasher is None:
         return None
-    shingles = generate_shingles(text, MINHASH_SHINGLE_SIZE)
-    if not shingles:
+    return MinHasher(num_perm=MINHASH_PERMUTATIONS, shingle_size=MINHASH_SHINGLE_SIZE)
+
+
+def minhash_signatures(texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+    return get_minhasher().signatures(texts)  # type: ignore[union-attr]
+
+
+def compute_minhash(text: str) -> Optional["np.ndarray"]:
+    minhasher = get_minhasher()
+    if minhasher is None:
         return None
-    signature = MinHash(num_perm=MINHASH_PERMUTATIONS)
-    for shingle in shingles:
-        signature.update(shingle.encode("utf-8"))
-    return signature
+    return minhasher.signature(text)
 
 
 def analyse_duplicates(
     records: Sequence[DatasetRecord],
     sample_limit: int,
     similarity_threshold: float,
+    pool: Optional[Executor] = None,
+    chunk_size: int = QC_CHUNK_SIZE,
+    signatures: Optional["np.ndarray"] = None,
+    valid: Optional["np.ndarray"] = None,
 ) -> DedupeStats:
+    """Report exact-duplicate clusters and MinHash near-duplicate pairs.
+
+    Precomputed per-record ``signatures``/``valid`` (e.g. from the QC cache)
+    skip the signature stage.
+    """
     canonical_map: Dict[str, List[int]] = defaultdict(list)
     for idx, record in enumerate(records):
         canonical = normalise_text(record.text)
         if canonical:
             canonical_map[canonical].append(idx)
 
-    duplicate_pairs_exact: List[Tuple[int, int]] = []
-    duplicate_indexes: set[int] = set()
-    for indexes in canonical_map.values():
-        if len(indexes) > 1:
-            duplicate_indexes.update(indexes)
-            for i in range(len(indexes)):
-                for j in range(i + 1, len(indexes)):
-                    duplicate_pairs_exact.append((indexes[i], indexes[j]))
+    # Exact duplicates are kept as clusters (first occurrence as representative)
+    # rather than expanded into pairs, so cost stays linear in the group sizes.
+    exact_clusters = sorted(
+        (
+            DuplicateCluster(representative=indexes[0], size=len(indexes), members=indexes)
+            for indexes in canonical_map.values()
+            if len(indexes) > 1
+        ),
+        key=lambda cluster: (-cluster.size, cluster.representative),
+    )
+    exact_duplicate_records = sum(cluster.size for cluster in exact_clusters)
+    exact_representatives = {cluster.representative for cluster in exact_clusters}
 
-    near_duplicate_pairs: set[Tuple[int, int]] = set()
+    near_duplicate_pairs_found: set[Tuple[int, int]] = set()
+    near_duplicate_indexes: set[int] = set()
     near_duplicate_error = ""
-    if DATASKETCH_AVAILABLE and MinHash is not None and MinHashLSH is not None and len(records) > 1:
+    minhasher = get_minhasher()
+    if minhasher is not None and len(canonical_map) > 1:
         try:
-            lsh = MinHashLSH(threshold=similarity_threshold, num_perm=MINHASH_PERMUTATIONS)
-            signatures: List[Optional[MinHash]] = []
-            for idx, record in enumerate(records):
-                signature = compute_minhash(record.text)
-                signatures.append(signature)
-                if signature is not None:
-                    lsh.insert(str(idx), signature)
-
-            for idx, signature in enumerate(signatures):
-                if signature is None:
-                    continue
-                for candidate_key in lsh.query(signature):
-                    candidate_idx = int(candidate_key)
-                    if candidate_idx <= idx:
-                        continue
-                    candidate_signature = signatures[candidate_idx]
-                    if candidate_signature is None:
-                        continue
-                    similarity = signature.jaccard(candidate_signature)
-                    if similarity >= similarity_threshold:
-                        pair = (idx, candidate_idx)
-                        near_duplicate_pairs.add(pair)
-                        duplicate_indexes.update(pair)
-        except Exception as exc:  # pragma: no cover - defensive guard against datasketch runtime errors
-            near_duplicate_pairs.clear()
+            # Exact duplicates are already reported above, so only one record per
+            # distinct text is banded; this keeps LSH buckets free of copies.
+            representatives = [indexes[0] for indexes in canonical_map.values()]
+            if signatures is not None and valid is not None:
+                rep_signatures, rep_valid = signatures[representatives], valid[representatives]
+            else:
+                parts = map_record_chunks(
+                    minhash_signatures, [records[idx].text for idx in representatives], pool, chunk_size
+                )
+                rep_signatures = np.concatenate([part[0] for part in parts])
+                rep_valid = np.concatenate([part[1] for part in parts])
+            for i, j, _ in near_duplicate_pairs(rep_signatures, rep_valid, similarity_threshold):
+                pair = tuple(sorted((representatives[i], representatives[j])))
+                near_duplicate_pairs_found.add(pair)  # type: ignore[arg-type]
+                near_duplicate_indexes.update(pair)
+        except Exception as exc:  # pragma: no cover - defensive guard against numeric runtime errors
+            near_duplicate_pairs_found.clear()
+            near_duplicate_indexes.clear()
             # Provide context without failing the overall QC run.
-            near_duplicate_pairs.add((-1, -1))  # sentinel to signal failure in flags
+            near_duplicate_pairs_found.add((-1, -1))  # sentinel to signal failure in flags
             near_duplicate_error = str(exc)
 
+    # Near duplicates are found between representatives, so a representative of an
+    # exact cluster is already counted through its cluster size.
+    duplicate_records = exact_duplicate_records + len(near_duplicate_indexes - exact_representatives)
     total_records = len(records) or 1
-    duplicate_ratio = len(duplicate_indexes) / total_records if duplicate_indexes else 0.0
+    duplicate_ratio = duplicate_records / total_records
 
+    # Samples pair each cluster's representative with its other members.
     combined_pairs: List[Tuple[int, int]] = []
-    combined_pairs.extend(duplicate_pairs_exact)
-    if near_duplicate_pairs:
-        combined_pairs.extend(pair for pair in near_duplicate_pairs if pair != (-1, -1))
+    for cluster in exact_clusters:
+        if len(combined_pairs) >= sample_limit:
+            break
+        combined_pairs.extend(
+            (cluster.representative, member)
+            for member in cluster.members[1 : 1 + sample_limit - len(combined_pairs)]
+        )
+    if near_duplicate_pairs_found:
+        combined_pairs.extend(pair for pair in sorted(near_duplicate_pairs_found) if pair != (-1, -1))
 
     flags: List[str] = []
-    if duplicate_pairs_exact:
-        sample = ", ".join(f"({a},{b})" for a, b in duplicate_pairs_exact[:sample_limit])
+    if exact_clusters:
+        sample = ", ".join(
+            f"{cluster.representative}x{cluster.size}" for cluster in exact_clusters[:sample_limit]
+        )
         flags.append(
-            f"Exact duplicates detected across {len(duplicate_pairs_exact)} pair(s) (examples: {sample})"
+            f"Exact duplicates detected in {len(exact_clusters)} cluster(s) covering {exact_duplicate_records} "
+            f"record(s) (largest, as representative x size: {sample})"
         )
-    if near_duplicate_pairs:
-        if (-1, -1) in near_duplicate_pairs:
+    if near_duplicate_pairs_found:
+        if (-1, -1) in near_duplicate_pairs_found:
             flags.append(
                 f"MinHash duplicate detection failed: {near_duplicate_error}. Falling back to exact matching results only."
             )
         else:
             sample = ", ".join(
-                f"({a},{b})" for a, b in list(sorted(near_duplicate_pairs))[:sample_limit]
+                f"({a},{b})" for a, b in list(sorted(near_duplicate_pairs_found))[:sample_limit]
             )
             flags.append(f"Near-duplicate pairs above {similarity_threshold:.2f} similarity: {sample}")
-    if not DATASKETCH_AVAILABLE:
-        flags.append("datasketch not installed; near-duplicate detection limited to exact matches.")
+    if not MINHASH_AVAILABLE:
+        flags.append("numpy not installed; near-duplicate detection limited to exact matches.")
 
     sample_duplicates = combined_pairs[:sample_limit]
 
@@ -534,27 +704,393 @@ def analyse_duplicates(
         sample_duplicates=sample_duplicates,
         flags=flags,
         similarity_threshold=similarity_threshold,
+        exact_clusters=exact_clusters,
     )
 
 
-def analyse_labels(records: Sequence[DatasetRecord], config: CategoryConfig, sample_limit: int) -> LabelStats:
-    totals: Dict[str, int] = {label: 0 for label in config.label_list}
-    missing_label_samples: List[int] = []
+class LabelAccumulator:
+    """Fold per-record labels into :class:`LabelStats`."""
 
-    for idx, record in enumerate(records):
-        positives = [label for label, score in record.labels.items() if score >= 0.5]
+    def __init__(self, label_list: Sequence[str], sample_limit: int):
+        self.totals: Dict[str, int] = {label: 0 for label in label_list}
+        self.sample_limit = sample_limit
+        self.missing_label_samples: List[int] = []
+
+    def add(self, idx: int, labels: Dict[str, float]) -> None:
+        positives = [label for label, score in labels.items() if score >= 0.5]
         for label in positives:
-            totals[label] += 1
-        if not positives and len(missing_label_samples) < sample_limit:
-            missing_label_samples.append(idx)
+            self.totals[label] += 1
+        if not positives and len(self.missing_label_samples) < self.sample_limit:
+            self.missing_label_samples.append(idx)
+
+    def result(self) -> LabelStats:
+        warnings: List[str] = []
+        if self.missing_label_samples:
+            warnings.append(
+                f"{len(self.missing_label_samples)} records contain no positive labels (examples: {', '.join(map(str, self.missing_label_samples))})"
+            )
+        return LabelStats(totals=self.totals, warnings=warnings)
 
-    warnings: List[str] = []
-    if missing_label_samples:
-        warnings.append(
-            f"{len(missing_label_samples)} records contain no positive labels (examples: {', '.join(map(str, missing_label_samples))})"
+
+def analyse_labels(records: Sequence[DatasetRecord], config: CategoryConfig, sample_limit: int) -> LabelStats:
+    accumulator = LabelAccumulator(config.label_list, sample_limit)
+    for idx, record in enumerate(records):
+        accumulator.add(idx, record.labels)
+    return accumulator.result()
+
+
+def analysis_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for per-record stages.
+
+    Workers start lazily on the first submit, which may happen in an analysis
+    thread; forking a multithreaded parent can deadlock, so they come from a
+    fork server.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def run_analyses(
+    records: Sequence[DatasetRecord],
+    config: CategoryConfig,
+    thresholds: Dict[str, float],
+    sample_limit: int,
+    workers: int = 1,
+    chunk_size: int = QC_CHUNK_SIZE,
+    profiles: Optional["RecordProfiles"] = None,
+) -> Tuple[LengthStats, LanguageStats, DedupeStats, LabelStats]:
+    """Run the record analyses, concurrently when ``workers`` > 1.
+
+    Each analysis runs in its own thread and fans its per-record stage
+    (tokenization, language ID, shingling/signatures) out over record chunks
+    in a shared process pool; the chunk results are reduced in the parent.
+    With precomputed ``profiles`` only the reductions remain (label patterns,
+    LSH banding); they run serially in the parent.
+    """
+    length_args = (records, int(thresholds["min_tokens"]), int(thresholds["max_tokens"]), sample_limit)
+    dedupe_args = (records, sample_limit, float(thresholds["minhash_similarity_threshold"]))
+    if profiles is not None:
+        return (
+            compute_length_stats(*length_args, token_lengths=profiles.token_counts),
+            analyse_languages(records, sample_limit, detections=profiles.languages),
+            analyse_duplicates(*dedupe_args, signatures=profiles.signatures, valid=profiles.valid),
+            analyse_labels(records, config, sample_limit),
+        )
+    if workers <= 1:
+        return (
+            compute_length_stats(*length_args),
+            analyse_languages(records, sample_limit),
+            analyse_duplicates(*dedupe_args),
+            analyse_labels(records, config, sample_limit),
         )
 
-    return LabelStats(totals=totals, warnings=warnings)
+    with analysis_pool(workers) as pool, ThreadPoolExecutor(
+        max_workers=4
+    ) as threads:
+        length_future = threads.submit(compute_length_stats, *length_args, pool=pool, chunk_size=chunk_size)
+        language_future = threads.submit(analyse_languages, records, sample_limit, pool=pool, chunk_size=chunk_size)
+        dedupe_future = threads.submit(analyse_duplicates, *dedupe_args, pool=pool, chunk_size=chunk_size)
+        label_future = threads.submit(analyse_labels, records, config, sample_limit)
+        return (
+            length_future.result(),
+            language_future.result(),
+            dedupe_future.result(),
+            label_future.result(),
+        )
+
+
+@dataclass
+class ChunkProfile:
+    token_counts: List[int]
+    languages: List[LanguageResult]
+    signatures: "np.ndarray"
+    valid: "np.ndarray"
+    content_hashes: "np.ndarray"
+
+
+def profile_chunk(texts: Sequence[str]) -> ChunkProfile:
+    """Per-record work for one streaming chunk (runs in a pool worker)."""
+    signatures, valid = minhash_signatures(texts)
+    return ChunkProfile(
+        token_counts=token_counts(texts),
+        languages=detect_languages(texts),
+        signatures=signatures,
+        valid=valid,
+        content_hashes=np.array([content_hash64(text) for text in texts if text], dtype=np.int64).view(np.uint64),
+    )
+
+
+@dataclass
+class RecordProfiles:
+    token_counts: List[int]
+    languages: List[LanguageResult]
+    signatures: "np.ndarray"
+    valid: "np.ndarray"
+    cache_hits: int = 0
+    computed: int = 0
+
+
+def qc_analysis_version() -> str:
+    """Fingerprint of everything that determines a record's cached analysis."""
+    profiles = get_profiles()
+    if profiles is not None:
+        language_source = profiles.source_hash
+    else:
+        language_source = "langdetect" if LANGDETECT_AVAILABLE else "heuristic"
+    minhasher = get_minhasher()
+    minhash_params = f"{minhasher.num_perm}:{minhasher.shingle_size}:{minhasher.seed}" if minhasher else "none"
+    payload = f"{QC_ANALYSIS_VERSION}|{language_source}|{LANGDETECT_CONFIDENCE_THRESHOLD}|{minhash_params}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def profile_records(
+    texts: Sequence[str],
+    cache: QCCache,
+    pool: Optional[Executor] = None,
+    chunk_size: int = QC_CHUNK_SIZE,
+) -> RecordProfiles:
+    """Per-record token counts, languages and signatures, served from ``cache`` where possible.
+
+    Only distinct texts missing from the cache are analysed (in ``pool`` when
+    given); their results are written back for the next run.
+    """
+    digests = [text_hash(text) for text in texts]
+    cached = cache.get_many(digests)
+    hits = sum(1 for digest in digests if digest in cached)
+    missing = list(dict.fromkeys(digest for digest in digests if digest not in cached))
+    if missing:
+        text_by_digest = dict(zip(digests, texts))
+        missing_texts = [text_by_digest[digest] for digest in missing]
+        parts = map_record_chunks(profile_chunk, missing_texts, pool, chunk_size)
+        tokens = itertools.chain.from_iterable(part.token_counts for part in parts)
+        languages = itertools.chain.from_iterable(part.languages for part in parts)
+        signatures = np.concatenate([part.signatures for part in parts])
+        valid = np.concatenate([part.valid for part in parts])
+        entries = [
+            (digest, CachedAnalysis(token_count, language, signature.tobytes() if is_valid else None))
+            for digest, token_count, language, signature, is_valid in zip(missing, tokens, languages, signatures, valid)
+        ]
+        cache.put_many(entries)
+        cached.update(entries)
+
+    num_perm = get_minhasher().num_perm  # type: ignore[union-attr]
+    signatures = np.zeros((len(texts), num_perm), dtype=np.uint32)
+    valid = np.zeros(len(texts), dtype=bool)
+    token_lengths: List[int] = []
+    languages_out: List[LanguageResult] = []
+    for idx, digest in enumerate(digests):
+        entry = cached[digest]
+        token_lengths.append(entry.token_count)
+        languages_out.append(entry.language)
+        if entry.signature is not None:
+            signatures[idx] = np.frombuffer(entry.signature, dtype=np.uint32)
+            valid[idx] = True
+    return RecordProfiles(
+        token_counts=token_lengths,
+        languages=languages_out,
+        signatures=signatures,
+        valid=valid,
+        cache_hits=hits,
+        computed=len(missing),
+    )
+
+
+def run_streaming_qc(
+    path: Path,
+    config: Optional[CategoryConfig],
+    thresholds: Dict[str, float],
+    sample_limit: int,
+    workers: int = 1,
+    chunk_size: int = QC_CHUNK_SIZE,
+    sketch_dir: Optional[str] = None,
+) -> Tuple[IntegrityResult, StructureResult, LengthStats, LanguageStats, DedupeStats, LabelStats, Dict[str, Any]]:
+    """QC a JSONL file in one pass with memory independent of its size.
+
+    Length percentiles and the language-confidence median come from KLL
+    sketches, distinct texts from HyperLogLog, and near duplicates from a
+    disk-backed streaming LSH index that compares each record with the
+    earliest record sharing each of its bands. The returned ``error_bounds``
+    state the accuracy of each estimate.
+    """
+    if not MINHASH_AVAILABLE:
+        raise RuntimeError("Streaming QC requires numpy")
+    if not path.exists():
+        empty = LengthStats({}, {}, [])
+        return (
+            IntegrityResult("fail", [f"Dataset file not found: {path}"]),
+            StructureResult("fail", []),
+            empty,
+            LanguageAccumulator(sample_limit).result(),
+            DedupeStats(0.0, [], [], float(thresholds["minhash_similarity_threshold"])),
+            LabelStats({}, []),
+            {},
+        )
+
+    min_tokens, max_tokens = int(thresholds["min_tokens"]), int(thresholds["max_tokens"])
+    similarity_threshold = float(thresholds["minhash_similarity_threshold"])
+    integrity_errors: List[str] = []
+    structure_issues: List[str] = []
+    message_counts = Counter()
+    char_sketch, token_sketch = KLLSketch(), KLLSketch()
+    short_samples: List[int] = []
+    long_samples: List[int] = []
+    short_count = long_count = 0
+    languages = LanguageAccumulator(sample_limit, confidence_sketch=KLLSketch())
+    labels = LabelAccumulator(config.label_list, sample_limit) if config is not None else None
+    distinct = HyperLogLog()
+    near_pairs: List[Tuple[int, int]] = []
+    near_pair_count = 0
+    total_records = hashed_records = 0
+
+    def keep_messages(target: List[str], kind: str, messages: List[str]) -> None:
+        message_counts[kind] += len(messages)
+        target.extend(messages[: max(0, STREAMING_MESSAGE_LIMIT - len(target))])
+
+    with tempfile.TemporaryDirectory(dir=sketch_dir) as tmp_dir:
+        lsh = StreamingLSH(os.path.join(tmp_dir, "lsh.sqlite"), similarity_threshold, MINHASH_PERMUTATIONS)
+
+        def consume(start: int, texts: List[str], profile: ChunkProfile) -> None:
+            nonlocal short_count, long_count, near_pair_count, hashed_records
+            for offset, (text, tokens, detection) in enumerate(zip(texts, profile.token_counts, profile.languages)):
+                idx = start + offset
+                char_sketch.update(len(text))
+                token_sketch.update(tokens)
+                if tokens < min_tokens:
+                    short_count += 1
+                    if len(short_samples) < sample_limit:
+                        short_samples.append(idx)
+                if tokens > max_tokens:
+                    long_count += 1
+                    if len(long_samples) < sample_limit:
+                        long_samples.append(idx)
+                languages.add(idx, *detection)
+            distinct.add_many(profile.content_hashes)
+            hashed_records += len(profile.content_hashes)
+            doc_ids = np.arange(start, start + len(texts), dtype=np.int64)
+            found = lsh.add_batch(doc_ids, profile.signatures, profile.valid)
+            near_pair_count += len(found)
+            near_pairs.extend((earlier, doc) for earlier, doc, _ in found[: max(0, sample_limit - len(near_pairs))])
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        pending: deque = deque()
+        chunk: List[str] = []
+        chunk_start = 0
+
+        def flush_chunk() -> None:
+            nonlocal chunk, chunk_start
+            if not chunk:
+                return
+            if pool is None:
+                consume(chunk_start, chunk, profile_chunk(chunk))
+            else:
+                pending.append((chunk_start, chunk, pool.submit(profile_chunk, chunk)))
+                # Bounded look-ahead keeps memory flat while results are consumed in order.
+                if len(pending) >= workers * 2:
+                    start, texts, future = pending.popleft()
+                    consume(start, texts, future.result())
+            chunk_start += len(chunk)
+            chunk = []
+
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                for line_no, raw_line in enumerate(handle, start=1):
+                    line = raw_line.strip()
+                    if not line:
+                        continue
+                    record, line_errors, line_issues = parse_record_line(line_no, line, config)
+                    keep_messages(integrity_errors, "integrity", line_errors)
+                    keep_messages(structure_issues, "structure", line_issues)
+                    if record is None:
+                        continue
+                    if labels is not None:
+                        labels.add(total_records, record.labels)
+                    chunk.append(record.text)
+                    total_records += 1
+                    if len(chunk) >= chunk_size:
+                        flush_chunk()
+            flush_chunk()
+            while pending:
+                start, texts, future = pending.popleft()
+                consume(start, texts, future.result())
+        except UnicodeDecodeError as exc:  # pragma: no cover - depends on malformed file
+            integrity_errors.append(f"Unicode decode error: {exc}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            duplicate_records = lsh.duplicate_count()
+            lsh.close()
+
+    for target, kind in ((integrity_errors, "integrity"), (structure_issues, "structure")):
+        if message_counts[kind] > len(target):
+            target.append(f"... {message_counts[kind] - len(target)} more {kind} message(s) omitted")
+
+    flags: List[str] = []
+    if short_count:
+        flags.append(f"{short_count} records below min token threshold (examples: {', '.join(map(str, short_samples))})")
+    if long_count:
+        flags.append(f"{long_count} records above max token threshold (examples: {', '.join(map(str, long_samples))})")
+    length_stats = LengthStats(char_stats=char_sketch.summary(), token_stats=token_sketch.summary(), flags=flags)
+
+    distinct_estimate = distinct.count()
+    dedupe_flags: List[str] = []
+    if near_pair_count:
+        sample = ", ".join(f"({a},{b})" for a, b in near_pairs)
+        dedupe_flags.append(
+            f"{near_pair_count} near-duplicate match(es) above {similarity_threshold:.2f} similarity "
+            f"covering {duplicate_records} record(s) (examples: {sample})"
+        )
+    repeated = hashed_records - distinct_estimate
+    if repeated > hashed_records * distinct.standard_error * 2:
+        dedupe_flags.append(
+            f"~{int(repeated)} records repeat an earlier text exactly (HyperLogLog estimate, "
+            f"±{distinct.standard_error:.1%} of {int(distinct_estimate)} distinct texts)"
+        )
+    dedupe_stats = DedupeStats(
+        duplicate_ratio=duplicate_records / (total_records or 1),
+        sample_duplicates=near_pairs,
+        flags=dedupe_flags,
+        similarity_threshold=similarity_threshold,
+    )
+
+    error_bounds: Dict[str, Any] = {
+        "length_quantiles": {
+            "sketch": "KLL",
+            "k": char_sketch.k,
+            "normalized_rank_error_99": round(char_sketch.rank_error, 4),
+            "exact": ["count", "min", "max", "mean"],
+        },
+        "language_confidence_median": {
+            "sketch": "KLL",
+            "normalized_rank_error_99": round(languages.confidence_sketch.rank_error, 4),
+        },
+        "distinct_texts": {
+            "sketch": "HyperLogLog",
+            "precision": distinct.precision,
+            "estimate": int(round(distinct_estimate)),
+            "relative_standard_error": round(distinct.standard_error, 4),
+        },
+        "near_duplicates": {
+            "method": "streaming MinHash LSH (earliest record per band)",
+            "num_perm": MINHASH_PERMUTATIONS,
+            "bands": lsh.bands,
+            "rows": lsh.rows,
+            "detection_probability_upper_bound_at_threshold": round(
+                lsh.detection_probability_upper_bound(similarity_threshold), 4
+            ),
+            "jaccard_standard_error_at_threshold": round(
+                math.sqrt(similarity_threshold * (1 - similarity_threshold) / MINHASH_PERMUTATIONS), 4
+            ),
+        },
+    }
+    return (
+        IntegrityResult("pass" if not integrity_errors else "fail", integrity_errors),
+        StructureResult("pass" if not structure_issues else "fail", structure_issues),
+        length_stats,
+        languages.result(),
+        dedupe_stats,
+        labels.result() if labels is not None else LabelStats({}, []),
+        error_bounds,
+    )
 
 
 def load_manifest(manifest_path: Optional[Path]) -> Dict[str, Any]:
@@ -654,6 +1190,10 @@ def build_report(
         "dedupe": {
             "duplicate_ratio": round(dedupe_stats.duplicate_ratio, 4),
             "sample_pairs": dedupe_stats.sample_duplicates,
+            "exact_clusters": [
+                {"representative": cluster.representative, "size": cluster.size, "members": cluster.members}
+                for cluster in dedupe_stats.exact_clusters
+            ],
             "flags": dedupe_stats.flags,
             "similarity_threshold": round(dedupe_stats.similarity_threshold, 4),
         },
@@ -670,6 +1210,133 @@ def build_report(
     }
 
 
+def find_previous_dataset(dataset_path: Path) -> Optional[Path]:
+    """Return the same-named file from the latest version directory sorting before this one."""
+    version_dir = dataset_path.parent
+    if not version_dir.parent.is_dir():
+        return None
+    candidates = sorted(
+        sibling
+        for sibling in version_dir.parent.iterdir()
+        if sibling.is_dir() and sibling.name < version_dir.name and (sibling / dataset_path.name).exists()
+    )
+    return candidates[-1] / dataset_path.name if candidates else None
+
+
+def positive_labels(labels: Dict[str, float]) -> frozenset:
+    return frozenset(label for label, score in labels.items() if score >= 0.5)
+
+
+def build_diff_report(
+    records: Sequence[DatasetRecord],
+    previous_records: Sequence[DatasetRecord],
+    report: Dict[str, Any],
+    previous_version: str,
+    previous_report: Optional[Dict[str, Any]],
+    sample_limit: int,
+) -> Dict[str, Any]:
+    """Compare a dataset version with its predecessor by text hash.
+
+    A record is *added* when its text does not occur in the previous version,
+    *removed* when a previous text no longer occurs, and *relabelled* when a
+    shared text's positive labels changed. Headline QC metrics are compared
+    against the previous version's QC report when one exists.
+    """
+    current_first: Dict[str, int] = {}
+    current_digests = [text_hash(record.text) for record in records]
+    for idx, digest in enumerate(current_digests):
+        current_first.setdefault(digest, idx)
+    previous_first: Dict[str, int] = {}
+    previous_digests = [text_hash(record.text) for record in previous_records]
+    for idx, digest in enumerate(previous_digests):
+        previous_first.setdefault(digest, idx)
+
+    added = [idx for idx, digest in enumerate(current_digests) if digest not in previous_first]
+    removed = [idx for idx, digest in enumerate(previous_digests) if digest not in current_first]
+    relabelled = sorted(
+        idx
+        for digest, idx in current_first.items()
+        if digest in previous_first
+        and positive_labels(records[idx].labels) != positive_labels(previous_records[previous_first[digest]].labels)
+    )
+
+    label_names = list(dict.fromkeys(label for record in (*previous_records, *records) for label in record.labels))
+    current_totals = Counter(label for record in records for label in positive_labels(record.labels))
+    previous_totals = Counter(label for record in previous_records for label in positive_labels(record.labels))
+    label_totals = {
+        label: {
+            "previous": previous_totals[label],
+            "current": current_totals[label],
+            "delta": current_totals[label] - previous_totals[label],
+        }
+        for label in label_names
+    }
+
+    metrics: Dict[str, Dict[str, float]] = {}
+    if previous_report:
+        metric_paths = {
+            "duplicate_ratio": ("dedupe", "duplicate_ratio"),
+            "token_median": ("length", "token_stats", "median"),
+            "english_share": ("language", "breakdown", "en"),
+        }
+        for name, path in metric_paths.items():
+            values = []
+            for source in (previous_report, report):
+                value: Any = source
+                for key in path:
+                    value = value.get(key, {}) if isinstance(value, dict) else {}
+                values.append(value if isinstance(value, (int, float)) else None)
+            if None not in values:
+                metrics[name] = {
+                    "previous": values[0],
+                    "current": values[1],
+                    "delta": round(values[1] - values[0], 4),
+                }
+
+    return {
+        "base_version": previous_version,
+        "version": report["metadata"]["version"],
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "record_counts": {"previous": len(previous_records), "current": len(records)},
+        "changes": {
+            "added": len(added),
+            "removed": len(removed),
+            "unchanged": len(records) - len(added) - len(relabelled),
+            "relabelled": len(relabelled),
+        },
+        "samples": {
+            "added": added[:sample_limit],
+            "removed": removed[:sample_limit],
+            "relabelled": relabelled[:sample_limit],
+        },
+        "label_totals": label_totals,
+        "metrics": metrics,
+    }
+
+
+def render_diff_markdown(diff: Dict[str, Any]) -> str:
+    changes = diff["changes"]
+    lines = [
+        f"# QC Diff — {diff['base_version']} → {diff['version']}",
+        "",
+        f"Generated at: {diff['generated_at']}",
+        "",
+        "## Records",
+        f"- Previous: **{diff['record_counts']['previous']}**, current: **{diff['record_counts']['current']}**",
+        f"- Added: **{changes['added']}**, removed: **{changes['removed']}**, "
+        f"unchanged: **{changes['unchanged']}**, relabelled: **{changes['relabelled']}**",
+        "",
+        "## Label Totals",
+    ]
+    for label, totals in diff["label_totals"].items():
+        lines.append(f"- **{label}**: {totals['previous']} → {totals['current']} ({totals['delta']:+d})")
+    if diff["metrics"]:
+        lines.extend(["", "## QC Metrics"])
+        for name, values in diff["metrics"].items():
+            lines.append(f"- {name}: {values['previous']} → {values['current']} ({values['delta']:+})")
+    return "\n".join(lines) + "\n"
+
+
 def render_markdown(report: Dict[str, Any]) -> str:
     metadata = report["metadata"]
     length_stats = report["length"]
@@ -686,6 +1353,7 @@ def render_markdown(report: Dict[str, Any]) -> str:
         f"- Integrity: **{report['integrity']['status']}**",
         f"- Structure: **{report['structure']['status']}**",
         f"- Duplicate ratio: **{dedupe['duplicate_ratio']:.2%}**",
+        f"- Exact duplicate clusters: **{len(dedupe.get('exact_clusters', []))}**",
         f"- Primary language: **{language_stats['primary']}**",
         f"- Token median: **{length_stats['token_stats']['median']}**",
         "",
@@ -706,39 +1374,87 @@ def render_markdown(report: Dict[str, Any]) -> str:
     for label, total in labels["totals"].items():
         lines.append(f"- **{label}**: {total}")
 
+    error_bounds = report.get("error_bounds")
+    if error_bounds:
+        near = error_bounds["near_duplicates"]
+        distinct = error_bounds["distinct_texts"]
+        lines.extend(
+            [
+                "",
+                "## Estimate Error Bounds",
+                f"- Length percentiles: ±{error_bounds['length_quantiles']['normalized_rank_error_99']:.2%} rank (99% confidence)",
+                f"- Distinct texts: ~{distinct['estimate']} (±{distinct['relative_standard_error']:.2%} standard error)",
+                f"- Near duplicates: {near['bands']}x{near['rows']} LSH bands, "
+                f"at most {near['detection_probability_upper_bound_at_threshold']:.2%} detection probability at threshold "
+                "(banding bound; only each band key's first owner is compared)",
+            ]
+        )
+
     return "\n".join(lines) + "\n"
 
 
 def main() -> None:  # pragma: no cover - CLI entry point
     args = parse_args()
 
-    category_config = CATEGORY_REGISTRY[args.category]
+    category = args.category or "corpus"
+    category_config = CATEGORY_REGISTRY[args.category] if args.category else None
     dataset_path = Path(args.dataset)
     manifest = load_manifest(Path(args.manifest)) if args.manifest else {}
     version = infer_version(dataset_path, args.version)
-    output_dir = determine_output_dir(args.category, version, args.output_dir)
+    output_dir = determine_output_dir(category, version, args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     sources = [item.strip() for item in args.sources.split(",") if item.strip()]
 
-    thresholds = load_thresholds(args.category, args)
-
-    records, integrity, structure = load_dataset(dataset_path, category_config)
-    length_stats = compute_length_stats(
-        records,
-        int(thresholds["min_tokens"]),
-        int(thresholds["max_tokens"]),
-        args.sample_limit,
-    )
-    language_stats = analyse_languages(records, args.sample_limit)
-    dedupe_stats = analyse_duplicates(
-        records,
-        args.sample_limit,
-        float(thresholds["minhash_similarity_threshold"]),
-    )
-    label_stats = analyse_labels(records, category_config, args.sample_limit)
+    thresholds = load_thresholds(category, args)
+
+    error_bounds: Dict[str, Any] = {}
+    profiles: Optional[RecordProfiles] = None
+    if args.streaming:
+        records: List[DatasetRecord] = []
+        (
+            integrity,
+            structure,
+            length_stats,
+            language_stats,
+            dedupe_stats,
+            label_stats,
+            error_bounds,
+        ) = run_streaming_qc(
+            dataset_path,
+            category_config,
+            thresholds,
+            args.sample_limit,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            sketch_dir=args.sketch_dir,
+        )
+    else:
+        records, integrity, structure = load_dataset(dataset_path, category_config)
+        if not args.no_qc_cache and MINHASH_AVAILABLE:
+            cache = QCCache(Path(args.qc_cache), qc_analysis_version())
+            texts = [record.text for record in records]
+            try:
+                # Cache misses fan out over the same kind of pool as the uncached analyses.
+                if args.workers > 1:
+                    with analysis_pool(args.workers) as pool:
+                        profiles = profile_records(texts, cache, pool=pool, chunk_size=args.chunk_size)
+                else:
+                    profiles = profile_records(texts, cache, chunk_size=args.chunk_size)
+            finally:
+                cache.close()
+            print(f"QC cache: reused {profiles.cache_hits} record analyses, computed {profiles.computed}")
+        length_stats, language_stats, dedupe_stats, label_stats = run_analyses(
+            records,
+            category_config,
+            thresholds,
+            args.sample_limit,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            profiles=profiles,
+        )
     report = build_report(
-        category=args.category,
+        category=category,
         version=version,
         records=records,
         integrity=integrity,
@@ -751,6 +1467,11 @@ def main() -> None:  # pragma: no cover - CLI entry point
         sources=sources,
         thresholds=thresholds,
     )
+    if args.streaming:
+        report["metadata"]["mode"] = "streaming"
+        report["error_bounds"] = error_bounds
+    elif profiles is not None:
+        report["metadata"]["qc_cache"] = {"reused": profiles.cache_hits, "computed": profiles.computed}
 
     json_path = output_dir / "qc_report.json"
     json_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
@@ -763,6 +1484,23 @@ def main() -> None:  # pragma: no cover - CLI entry point
     if args.write_markdown:
         print(f"Markdown summary written to {markdown_path}")
 
+    previous_path = None
+    if not args.streaming and not args.no_diff:
+        previous_path = Path(args.diff_against) if args.diff_against else find_previous_dataset(dataset_path)
+    if previous_path is not None and previous_path.exists():
+        previous_records, _, _ = load_dataset(previous_path, category_config)
+        previous_version = infer_version(previous_path, None)
+        previous_report_path = determine_output_dir(category, previous_version, None) / "qc_report.json"
+        previous_report = (
+            json.loads(previous_report_path.read_text(encoding="utf-8")) if previous_report_path.exists() else None
+        )
+        diff = build_diff_report(records, previous_records, report, previous_version, previous_report, args.sample_limit)
+        diff_path = output_dir / "qc_diff.json"
+        diff_path.write_text(json.dumps(diff, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Diff against {previous_version} written to {diff_path}")
+        if args.write_markdown:
+            (output_dir / "qc_diff.md").write_text(render_diff_markdown(diff), encoding="utf-8")
+
     exit_code = 0
     if report["gates"]["failed_checks"]:
         exit_code = 1
@@ -1,20 +1,44 @@
 #!/usr/bin/env python3
 """Test script to validate pattern YAML files load correctly.
 
+With ``--benchmark`` it also times every labeling regex (category YAMLs,
+``FALLBACK_LABEL_PATTERNS`` and ``harvest_clause_candidates.PATTERNS``)
+against a reference corpus, and with ``--fuzz`` grows adversarial inputs to
+flag patterns whose match time grows super-linearly with input length.
+
 Usage:
     python scripts/corpus/test_pattern_loading.py
+    python scripts/corpus/test_pattern_loading.py --benchmark --fuzz \
+        --corpus data/clauses.jsonl --output reports/pattern_benchmark.json
 """
 
+import argparse
+import json
+import math
+import re
+import time
 from pathlib import Path
 import sys
+from typing import Dict, List, Optional, Sequence, Tuple
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(REPO_ROOT))
 
 from scripts.corpus.build_category_dataset import (
+    FALLBACK_LABEL_PATTERNS,
     get_patterns_for_category,
     load_patterns_from_yaml,
 )
+from scripts.corpus.pattern_engine import (
+    MatchTimeout,
+    budget_supported,
+    pattern_literals,
+    search_with_budget,
+)
+from scripts.harvest_clause_candidates import PATTERNS as HARVEST_PATTERNS
+from scripts.ml.category_config import CATEGORY_REGISTRY
+
+DEFAULT_CORPUS = REPO_ROOT / "data" / "clauses.jsonl"
 
 PRIORITY_CATEGORIES = [
     "dispute_resolution",
@@ -44,7 +68,221 @@ TEST_CASES = {
 }
 
 
-def main():
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmark", action="store_true", help="Time every pattern against a reference corpus")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSONL corpus with a 'text' field")
+    parser.add_argument("--limit", type=int, default=2000, help="Maximum corpus records to benchmark against")
+    parser.add_argument("--fuzz", action="store_true", help="Probe patterns with adversarial long inputs")
+    parser.add_argument(
+        "--fuzz-lengths",
+        default="2000,8000",
+        help="Comma-separated input lengths (chars) used to estimate growth",
+    )
+    parser.add_argument(
+        "--superlinear-exponent",
+        type=float,
+        default=1.5,
+        help="Flag patterns whose fitted time ~ length**k exceeds this exponent",
+    )
+    parser.add_argument(
+        "--fuzz-budget-ms",
+        type=float,
+        default=2000.0,
+        help="Abandon a single fuzz search after this long and flag the pattern as runaway",
+    )
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest patterns to print")
+    parser.add_argument("--output", help="Optional JSON path for the full benchmark report")
+    parser.add_argument(
+        "--fail-on-superlinear",
+        action="store_true",
+        help="Exit non-zero when fuzzing flags any pattern",
+    )
+    return parser.parse_args()
+
+
+def collect_pattern_sources() -> List[Tuple[str, str, re.Pattern]]:
+    """Return (source, label, pattern) for every regex used by the corpus tooling."""
+    entries: List[Tuple[str, str, re.Pattern]] = []
+    for category in sorted(CATEGORY_REGISTRY):
+        for label, patterns in get_patterns_for_category(category).items():
+            entries.extend((category, label, pattern) for pattern in patterns)
+    for category, label_patterns in FALLBACK_LABEL_PATTERNS.items():
+        for label, patterns in label_patterns.items():
+            entries.extend((f"fallback/{category}", label, pattern) for pattern in patterns)
+    for label, patterns in HARVEST_PATTERNS.items():
+        entries.extend(("harvest_clause_candidates", label, pattern) for pattern in patterns)
+    return entries
+
+
+def load_corpus_texts(path: Path, limit: int) -> List[str]:
+    texts: List[str] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            text = str(json.loads(line).get("text", "")).strip()
+            if text:
+                texts.append(text)
+            if len(texts) >= limit:
+                break
+    return texts
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def benchmark_pattern(pattern: re.Pattern, texts: Sequence[str]) -> Dict[str, float]:
+    timings: List[float] = []
+    hits = 0
+    for text in texts:
+        started = time.perf_counter()
+        matched = pattern.search(text)
+        timings.append((time.perf_counter() - started) * 1e6)
+        if matched:
+            hits += 1
+    timings.sort()
+    return {
+        "hits": hits,
+        "hit_rate": round(hits / len(texts), 4) if texts else 0.0,
+        "p50_us": round(percentile(timings, 0.50), 2),
+        "p99_us": round(percentile(timings, 0.99), 2),
+        "max_us": round(timings[-1], 2) if timings else 0.0,
+        "total_ms": round(sum(timings) / 1000, 3),
+    }
+
+
+def adversarial_inputs(pattern: re.Pattern, length: int) -> Dict[str, str]:
+    """Build near-miss inputs that make backtracking patterns do the most work."""
+    inputs: Dict[str, str] = {
+        "word_run": "a" * length,
+        "space_run": " " * length,
+        "legal_filler": ("the service may " * (length // 16 + 1))[:length],
+    }
+    # Repeating one literal prefix without ever completing the match forces
+    # ``x.*y`` style patterns to rescan the tail from every occurrence.
+    for literal in pattern_literals(pattern)[:3]:
+        unit = literal + " "
+        inputs[f"repeat:{literal}"] = (unit * (length // len(unit) + 1))[:length]
+    return inputs
+
+
+def time_search(pattern: re.Pattern, text: str, budget: Optional[float], repeats: int = 3) -> Optional[float]:
+    """Best-of-``repeats`` search time in seconds, or ``None`` if the budget ran out."""
+    best = math.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        try:
+            if budget is not None:
+                search_with_budget(pattern, text, budget)
+            else:
+                pattern.search(text)
+        except MatchTimeout:
+            return None
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def fuzz_pattern(
+    pattern: re.Pattern,
+    lengths: Sequence[int],
+    budget: Optional[float],
+    exponent_limit: float,
+) -> Dict[str, object]:
+    worst_exponent = 0.0
+    worst_input = ""
+    worst_ms = 0.0
+    runaway = False
+    for name, _ in adversarial_inputs(pattern, lengths[0]).items():
+        samples: List[Tuple[int, float]] = []
+        for length in lengths:
+            text = adversarial_inputs(pattern, length)[name]
+            elapsed = time_search(pattern, text, budget)
+            if elapsed is None:
+                runaway = True
+                worst_input = name
+                break
+            samples.append((length, elapsed))
+        if runaway:
+            break
+        (short_len, short_time), (long_len, long_time) = samples[0], samples[-1]
+        # Sub-millisecond timings are dominated by noise, not growth.
+        if long_time < 1e-3:
+            continue
+        exponent = math.log(max(long_time, 1e-9) / max(short_time, 1e-9)) / math.log(long_len / short_len)
+        if exponent > worst_exponent:
+            worst_exponent, worst_input, worst_ms = exponent, name, long_time * 1000
+    return {
+        "growth_exponent": round(worst_exponent, 2),
+        "worst_input": worst_input,
+        "worst_ms": round(worst_ms, 3),
+        "runaway": runaway,
+        "superlinear": runaway or worst_exponent > exponent_limit,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> int:
+    corpus_path = Path(args.corpus)
+    texts = load_corpus_texts(corpus_path, args.limit) if corpus_path.exists() else []
+    entries = collect_pattern_sources()
+    lengths = sorted(int(item) for item in args.fuzz_lengths.split(",") if item.strip())
+    if args.fuzz and len(lengths) < 2:
+        raise SystemExit("--fuzz-lengths needs at least two lengths")
+    budget = args.fuzz_budget_ms / 1000.0 if budget_supported() else None
+
+    print("=" * 80)
+    print(f"Pattern Benchmark — {len(entries)} patterns, {len(texts)} corpus records ({corpus_path})")
+    print("=" * 80)
+
+    results: List[Dict[str, object]] = []
+    for source, label, pattern in entries:
+        entry: Dict[str, object] = {"source": source, "label": label, "pattern": pattern.pattern}
+        if texts:
+            entry.update(benchmark_pattern(pattern, texts))
+        if args.fuzz:
+            entry["fuzz"] = fuzz_pattern(pattern, lengths, budget, args.superlinear_exponent)
+        results.append(entry)
+
+    if texts:
+        print(f"\nSlowest {args.top} patterns by p99 match time:")
+        for entry in sorted(results, key=lambda item: item["p99_us"], reverse=True)[: args.top]:
+            print(
+                f"   {entry['p99_us']:>9.1f}µs p99  {entry['hits']:>6} hits  "
+                f"{entry['source']}/{entry['label']}: {entry['pattern'][:70]}"
+            )
+
+    flagged = [entry for entry in results if entry.get("fuzz", {}).get("superlinear")]
+    if args.fuzz:
+        print(f"\nSuper-linear patterns (exponent > {args.superlinear_exponent}): {len(flagged)}")
+        for entry in flagged:
+            fuzz = entry["fuzz"]
+            detail = "exceeded fuzz budget" if fuzz["runaway"] else (
+                f"~n^{fuzz['growth_exponent']} ({fuzz['worst_ms']}ms at {lengths[-1]} chars)"
+            )
+            print(f"   ❌ {entry['source']}/{entry['label']}: {detail} on '{fuzz['worst_input']}'")
+            print(f"      {entry['pattern']}")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        report = {
+            "corpus": str(corpus_path),
+            "records": len(texts),
+            "fuzz_lengths": lengths if args.fuzz else [],
+            "patterns": results,
+        }
+        output_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"\nBenchmark report written to {output_path}")
+
+    return 1 if flagged and args.fail_on_superlinear else 0
+
+
+def run_loading_test():
     print("=" * 80)
     print("Pattern YAML Loading Test")
     print("=" * 80)
@@ -96,5 +334,12 @@ def main():
     print("=" * 80)
 
 
+def main():
+    args = parse_args()
+    if args.benchmark or args.fuzz:
+        sys.exit(run_benchmark(args))
+    run_loading_test()
+
+
 if __name__ == "__main__":
     main()
@@ -9,10 +9,13 @@ Usage examples:
 Notes:
 - Respects mapping file for label normalization into our taxonomy.
 - Adds a `source` field for provenance.
+- Skips texts already recorded in the shared dedupe index (also used by
+  scripts/corpus/ingest_huggingface.py); pass --no-dedupe to keep them.
 """
 import argparse
 import csv
 import json
+import sys
 from pathlib import Path
 from typing import Dict
 
@@ -21,6 +24,12 @@ try:
 except Exception:
     yaml = None
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.corpus.dedupe_index import DEFAULT_DEDUPE_INDEX_PATH, DedupeIndex
+
 
 def load_mapping(path: str) -> Dict[str, str]:
     if not path:
@@ -37,8 +46,10 @@ def run(args):
     inp = Path(args.input)
     outp = Path(args.out)
     outp.parent.mkdir(parents=True, exist_ok=True)
+    index = None if args.no_dedupe else DedupeIndex(args.dedupe_index)
 
     count = 0
+    skipped = 0
     with outp.open('w', encoding='utf-8') as fo:
         if args.csv:
             with inp.open('r', encoding='utf-8', newline='') as fi:
@@ -48,6 +59,9 @@ def run(args):
                     label = (row.get(args.label_field) or '').strip()
                     if not text or not label:
                         continue
+                    if index is not None and index.check_and_add(text, args.source):
+                        skipped += 1
+                        continue
                     label = mapping.get(label, label)
                     rec = {"text": text, "label": label, "source": args.source}
                     fo.write(json.dumps(rec, ensure_ascii=False) + '\n')
@@ -65,10 +79,16 @@ def run(args):
                     label = (obj.get(args.label_field) or '').strip()
                     if not text or not label:
                         continue
+                    if index is not None and index.check_and_add(text, args.source):
+                        skipped += 1
+                        continue
                     label = mapping.get(label, label)
                     rec = {"text": text, "label": label, "source": args.source}
                     fo.write(json.dumps(rec, ensure_ascii=False) + '\n')
                     count += 1
+    if index is not None:
+        index.close()
+        print(f"Skipped {skipped} duplicate rows (dedupe index: {args.dedupe_index})")
     print(f"Wrote {count} rows to {outp}")
 
 
@@ -81,4 +101,6 @@ if __name__ == '__main__':
     ap.add_argument('--label-field', required=True)
     ap.add_argument('--map-file', default='', help='Optional YAML mapping file for labels')
     ap.add_argument('--out', required=True, help='Output JSONL path')
+    ap.add_argument('--dedupe-index', default=str(DEFAULT_DEDUPE_INDEX_PATH), help='Shared content-hash dedupe index')
+    ap.add_argument('--no-dedupe', action='store_true', help='Write every row, ignoring the dedupe index')
     run(ap.parse_args())
@@ -21,10 +21,12 @@ from typing import Dict
 
 import numpy as np  # type: ignore
 
-from transformers import AutoModelForSequenceClassification, AutoTokenizer  # type: ignore
-
-from scripts.ml.category_config import CATEGORY_REGISTRY
-from scripts.ml.evaluate_category_model import build_dataset, compute_predictions
+from scripts.ml.category_config import CATEGORY_REGISTRY, config_for_model, with_window_options
+from scripts.ml.evaluate_category_model import build_dataset, predict_with_cache
+from scripts.ml.inference import DEFAULT_TOKEN_BUDGET
+from scripts.ml.onnx_backend import BACKENDS
+from scripts.ml.sliding_window import POOLING_MODES
+from scripts.ml.token_cache import DEFAULT_TOKEN_CACHE_DIR
 
 
 def derive_thresholds(y_true: np.ndarray, y_proba: np.ndarray) -> Dict[str, float]:
@@ -83,18 +85,37 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--model", required=True, help="Directory with fine-tuned model weights")
     parser.add_argument("--out-json", required=True, help="Where to write calibration thresholds JSON")
     parser.add_argument("--threshold", type=float, default=0.5, help="Initial cutoff used for predictions (for reporting only)")
+    parser.add_argument("--token-cache", default=str(DEFAULT_TOKEN_CACHE_DIR), help="Shared token-id cache directory")
+    parser.add_argument("--no-token-cache", action="store_true", help="Tokenize every text from scratch")
+    parser.add_argument("--window-stride", type=int, help="Classify long texts over overlapping windows sharing this many tokens (default: as trained)")
+    parser.add_argument("--window-pooling", choices=POOLING_MODES, help="How window logits are combined per text (default: as trained)")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Maximum padded tokens per forward pass")
+    parser.add_argument("--threads", type=int, help="CPU intra-op threads (default: CPUs available to this process)")
+    parser.add_argument("--no-logits-cache", action="store_true", help="Always run inference instead of reusing logits cached next to the model")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="Run the PyTorch checkpoint or the exported ONNX graph")
+    parser.add_argument("--onnx-model", help="ONNX graph for --backend onnx (default: <model>/model.onnx)")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    config = CATEGORY_REGISTRY[args.category]
+    config = config_for_model(CATEGORY_REGISTRY[args.category], Path(args.model))
+    config = with_window_options(config, args.window_stride, args.window_pooling)
 
     dataset = build_dataset(Path(args.dataset), config)
-    tokenizer = AutoTokenizer.from_pretrained(args.model)
-    model = AutoModelForSequenceClassification.from_pretrained(args.model)
-
-    labels, _, probs = compute_predictions(model, tokenizer, dataset, config, args.threshold)
+    # Reuses logits from a previous evaluation of this model on the same dataset.
+    labels, _, probs = predict_with_cache(
+        Path(args.model),
+        dataset,
+        config,
+        args.threshold,
+        token_cache_dir=None if args.no_token_cache else Path(args.token_cache),
+        token_budget=args.token_budget,
+        threads=args.threads,
+        use_logits_cache=not args.no_logits_cache,
+        backend=args.backend,
+        onnx_path=Path(args.onnx_model) if args.onnx_model else None,
+    )
 
     thresholds = {}
     labels_arr = np.array(labels)
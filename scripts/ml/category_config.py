@@ -2,8 +2,16 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import json
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Written by profile_token_lengths.py; overrides the default max_length per category.
+PROFILED_LENGTHS_PATH = Path(__file__).with_name("category_lengths.json")
+PROCESSED_ROOT = Path(__file__).resolve().parents[2] / "data" / "processed"
+# Models trained before lengths were profiled don't record max_length; they were all trained at 512.
+LEGACY_MAX_LENGTH = 512
 
 
 @dataclass
@@ -14,6 +22,9 @@ class CategoryConfig:
     label_list: List[str]
     description: str
     max_length: int = 512
+    # Sliding-window mode: overlap between consecutive windows, or None to truncate.
+    window_stride: Optional[int] = None
+    window_pooling: str = "max"
 
 
 CATEGORY_REGISTRY: Dict[str, CategoryConfig] = {
@@ -89,3 +100,55 @@ CATEGORY_REGISTRY: Dict[str, CategoryConfig] = {
     ),
     # NOTE: clarity_transparency is a derived metric, not a separate category
 }
+
+
+def apply_profiled_max_lengths(registry: Dict[str, CategoryConfig], path: Path = PROFILED_LENGTHS_PATH) -> None:
+    """Set each category's ``max_length`` to the value recorded by the length profiler."""
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as handle:
+        profile = json.load(handle)
+    for name, entry in profile.get("categories", {}).items():
+        if name in registry:
+            registry[name].max_length = int(entry["max_length"])
+
+
+def latest_processed_dataset(category: str, root: Path = PROCESSED_ROOT) -> Optional[Path]:
+    """Path of the newest ``data/processed/<category>/<version>/dataset.jsonl``, if any."""
+    category_dir = root / category
+    if not category_dir.is_dir():
+        return None
+    versions = sorted(path for path in category_dir.iterdir() if (path / "dataset.jsonl").exists())
+    return versions[-1] / "dataset.jsonl" if versions else None
+
+
+def config_for_model(config: CategoryConfig, model_dir: Optional[Path]) -> CategoryConfig:
+    """``config`` with the input settings (``max_length``, windowing) the model in ``model_dir`` was trained with.
+
+    Profiled lengths only apply to models that recorded them: a model whose
+    ``category_config.json`` has no ``max_length`` was trained at
+    :data:`LEGACY_MAX_LENGTH`.
+    """
+    if model_dir is None:
+        return config
+    path = Path(model_dir) / "category_config.json"
+    trained = {}
+    if path.exists():
+        with path.open("r", encoding="utf-8") as handle:
+            trained = json.load(handle)
+    overrides = {key: trained[key] for key in ("window_stride", "window_pooling") if key in trained}
+    overrides["max_length"] = int(trained.get("max_length", LEGACY_MAX_LENGTH))
+    return replace(config, **overrides)
+
+
+def with_window_options(config: CategoryConfig, stride: Optional[int], pooling: Optional[str]) -> CategoryConfig:
+    """Apply command-line sliding-window options on top of ``config``; ``None`` keeps its value."""
+    overrides = {}
+    if stride is not None:
+        overrides["window_stride"] = stride
+    if pooling is not None:
+        overrides["window_pooling"] = pooling
+    return replace(config, **overrides)
+
+
+apply_profiled_max_lengths(CATEGORY_REGISTRY)
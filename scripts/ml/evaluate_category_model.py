@@ -18,19 +18,23 @@ import argparse
 import json
 import logging
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional
 
 try:
     from datasets import Dataset  # type: ignore
-    from transformers import AutoModelForSequenceClassification, AutoTokenizer  # type: ignore
-    import torch  # type: ignore
+    from transformers import AutoTokenizer  # type: ignore
 except ImportError as exc:  # pragma: no cover
     raise SystemExit(
         "Missing Transformers/Datasets dependencies. Install with "
         "`pip install -r scripts/requirements.txt`."
     ) from exc
 
-from scripts.ml.category_config import CATEGORY_REGISTRY, CategoryConfig
+from scripts.ml.category_config import CATEGORY_REGISTRY, CategoryConfig, config_for_model, with_window_options
+from scripts.ml.inference import DEFAULT_TOKEN_BUDGET, configure_cpu_threads, predict_text_logits, sigmoid
+from scripts.ml.logits_cache import LogitsCache, cached_logits
+from scripts.ml.onnx_backend import BACKENDS, backend_artifacts, load_inference_model
+from scripts.ml.sliding_window import POOLING_MODES
+from scripts.ml.token_cache import DEFAULT_TOKEN_CACHE_DIR, TokenCache
 
 LOGGER = logging.getLogger("evaluate_category_model")
 
@@ -43,6 +47,15 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--threshold", type=float, default=0.5, help="Prediction threshold for metrics")
     parser.add_argument("--report", required=True, help="Path to write metrics JSON report")
     parser.add_argument("--confusion-matrix", help="Optional path for confusion matrix CSV")
+    parser.add_argument("--token-cache", default=str(DEFAULT_TOKEN_CACHE_DIR), help="Shared token-id cache directory")
+    parser.add_argument("--no-token-cache", action="store_true", help="Tokenize every text from scratch")
+    parser.add_argument("--window-stride", type=int, help="Classify long texts over overlapping windows sharing this many tokens (default: as trained)")
+    parser.add_argument("--window-pooling", choices=POOLING_MODES, help="How window logits are combined per text (default: as trained)")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Maximum padded tokens per forward pass")
+    parser.add_argument("--threads", type=int, help="CPU intra-op threads (default: CPUs available to this process)")
+    parser.add_argument("--no-logits-cache", action="store_true", help="Always run inference instead of reusing logits cached next to the model")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="Run the PyTorch checkpoint or the exported ONNX graph")
+    parser.add_argument("--onnx-model", help="ONNX graph for --backend onnx (default: <model>/model.onnx)")
     return parser.parse_args()
 
 
@@ -68,25 +81,49 @@ def build_dataset(path: Path, config: CategoryConfig) -> Dataset:
     return Dataset.from_list(data)
 
 
-def compute_predictions(model, tokenizer, dataset: Dataset, config: CategoryConfig, threshold: float):
-    inputs = dataset["text"]
-    encodings = tokenizer(
-        inputs,
-        truncation=True,
-        padding="max_length",
-        max_length=config.max_length,
-        return_tensors="pt",
-    )
-    labels = dataset["labels"]
-
-    with torch.no_grad():  # type: ignore
-        logits = model(**encodings).logits.cpu().numpy()
-
-    import numpy as np  # type: ignore
-
-    probs = 1 / (1 + np.exp(-logits))
+def predict_with_cache(
+    model_dir: Path,
+    dataset: Dataset,
+    config: CategoryConfig,
+    threshold: float,
+    token_cache_dir: Optional[Path] = DEFAULT_TOKEN_CACHE_DIR,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    threads: Optional[int] = None,
+    use_logits_cache: bool = True,
+    backend: str = "torch",
+    onnx_path: Optional[Path] = None,
+):
+    """Labels, thresholded predictions and probabilities, reusing logits cached next to the model.
+
+    The model and tokenizer are loaded only when no cached logits match the
+    model weights, dataset and input settings. ``backend="onnx"`` runs the
+    exported graph (``onnx_path``, default ``<model_dir>/model.onnx``).
+    """
+    texts = dataset["text"]
+
+    def run_inference():
+        tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        model = load_inference_model(model_dir, config.name, backend, onnx_path, threads)
+        token_cache = TokenCache(tokenizer, token_cache_dir) if token_cache_dir else None
+        if backend == "torch":
+            configure_cpu_threads(threads)
+        return predict_text_logits(
+            model,
+            tokenizer,
+            texts,
+            max_length=config.max_length,
+            token_cache=token_cache,
+            window_stride=config.window_stride,
+            window_pooling=config.window_pooling,
+            token_budget=token_budget,
+        )
+
+    logits_cache = None
+    if use_logits_cache:
+        logits_cache = LogitsCache(model_dir, config.name, backend, backend_artifacts(model_dir, backend, onnx_path))
+    probs = sigmoid(cached_logits(logits_cache, texts, config, run_inference))
     preds = (probs >= threshold).astype(int)
-    return labels, preds, probs
+    return dataset["labels"], preds, probs
 
 
 def compute_metrics(labels, preds, probs, config: CategoryConfig, report_path: Path, confusion_path: Path | None):
@@ -142,28 +179,25 @@ def main() -> None:
     args = parse_args()
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 
-    config = CATEGORY_REGISTRY[args.category]
+    config = config_for_model(CATEGORY_REGISTRY[args.category], Path(args.model))
+    config = with_window_options(config, args.window_stride, args.window_pooling)
     dataset = build_dataset(Path(args.dataset), config)
 
-    tokenizer = AutoTokenizer.from_pretrained(args.model)
-    model = AutoModelForSequenceClassification.from_pretrained(args.model)
-
-    metrics = compute_predictions_and_metrics(
-        tokenizer,
-        model,
+    labels, preds, probs = predict_with_cache(
+        Path(args.model),
         dataset,
         config,
         args.threshold,
-        Path(args.report),
-        args.confusion_matrix,
+        token_cache_dir=None if args.no_token_cache else Path(args.token_cache),
+        token_budget=args.token_budget,
+        threads=args.threads,
+        use_logits_cache=not args.no_logits_cache,
+        backend=args.backend,
+        onnx_path=Path(args.onnx_model) if args.onnx_model else None,
     )
+    metrics = compute_metrics(labels, preds, probs, config, Path(args.report), args.confusion_matrix)
     LOGGER.info("Metrics: %s", metrics)
 
 
-def compute_predictions_and_metrics(tokenizer, model, dataset, config, threshold, report_path, confusion_path):
-    labels, preds, probs = compute_predictions(model, tokenizer, dataset, config, threshold)
-    return compute_metrics(labels, preds, probs, config, report_path, confusion_path)
-
-
 if __name__ == "__main__":
     main()
@@ -49,7 +49,7 @@ import json
 import logging
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 from datasets import Dataset
@@ -61,14 +61,18 @@ from sklearn.metrics import (
     precision_recall_fscore_support,
 )
 from transformers import (
-    AutoModelForSequenceClassification,
     AutoTokenizer,
     pipeline,
 )
 
 # Add scripts/ml to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
-from category_config import CATEGORY_REGISTRY, CategoryConfig
+from category_config import CATEGORY_REGISTRY, CategoryConfig, config_for_model, with_window_options
+from inference import DEFAULT_TOKEN_BUDGET, configure_cpu_threads, predict_text_logits, sigmoid
+from logits_cache import LogitsCache, cached_logits
+from onnx_backend import BACKENDS, backend_artifacts, load_inference_model
+from sliding_window import POOLING_MODES
+from token_cache import DEFAULT_TOKEN_CACHE_DIR, TokenCache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -144,6 +148,53 @@ def parse_args() -> argparse.Namespace:
         default=5,
         help="Maximum number of false positives to retain per label (default: 5)",
     )
+    parser.add_argument(
+        "--token-cache",
+        type=Path,
+        default=DEFAULT_TOKEN_CACHE_DIR,
+        help="Shared token-id cache directory; only texts missing from it are tokenized",
+    )
+    parser.add_argument(
+        "--no-token-cache",
+        action="store_true",
+        help="Tokenize every text from scratch",
+    )
+    parser.add_argument(
+        "--window-stride",
+        type=int,
+        help="Classify long texts over overlapping windows sharing this many tokens (default: as trained)",
+    )
+    parser.add_argument(
+        "--window-pooling",
+        choices=POOLING_MODES,
+        help="How window logits are combined per text in sliding-window mode (default: as trained)",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f"Maximum padded tokens per forward pass (default: {DEFAULT_TOKEN_BUDGET})",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="CPU intra-op threads for inference (default: CPUs available to this process)",
+    )
+    parser.add_argument(
+        "--no-logits-cache",
+        action="store_true",
+        help="Always run inference instead of reusing logits cached next to the model",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="torch",
+        help="Run the PyTorch checkpoint or the exported ONNX graph (default: torch)",
+    )
+    parser.add_argument(
+        "--onnx-model",
+        help="ONNX graph for --backend onnx (default: <model>/model.onnx)",
+    )
     return parser.parse_args()
 
 
@@ -170,48 +221,6 @@ def load_dataset(dataset_path: str, eval_split: float, seed: int) -> Dataset:
     return eval_data
 
 
-def predict_batch(
-    model: Any,
-    tokenizer: Any,
-    texts: List[str],
-    label_list: List[str],
-    threshold: float,
-    device: int = -1,
-) -> Tuple[np.ndarray, np.ndarray]:
-    """Run batch prediction and return predictions + probabilities.
-    
-    Returns:
-        predictions: Binary matrix (n_samples, n_labels) with 1 where prob >= threshold
-        probabilities: Float matrix (n_samples, n_labels) with raw sigmoid probabilities
-    """
-    LOGGER.info(f"Running inference on {len(texts)} examples...")
-    
-    # Tokenize
-    encodings = tokenizer(
-        texts,
-        truncation=True,
-        padding=True,
-        max_length=512,
-        return_tensors="pt",
-    )
-    
-    # Move to device if GPU available
-    if device >= 0:
-        encodings = {k: v.to(f"cuda:{device}") for k, v in encodings.items()}
-    
-    # Get predictions
-    import torch
-    with torch.no_grad():
-        outputs = model(**encodings)
-        logits = outputs.logits
-        probabilities = torch.sigmoid(logits).cpu().numpy()
-    
-    # Apply threshold
-    predictions = (probabilities >= threshold).astype(int)
-    
-    return predictions, probabilities
-
-
 def compute_per_label_metrics(
     y_true: np.ndarray,
     y_pred: np.ndarray,
@@ -501,24 +510,12 @@ def main():
     args = parse_args()
     
     # Load category config
-    category_config = CATEGORY_REGISTRY[args.category]
+    # Use the max_length the model was trained with (512 for models that predate length profiling).
+    category_config = config_for_model(CATEGORY_REGISTRY[args.category], Path(args.model))
+    category_config = with_window_options(category_config, args.window_stride, args.window_pooling)
     LOGGER.info(f"Evaluating category: {args.category}")
     LOGGER.info(f"Labels: {', '.join(category_config.label_list)}")
     
-    # Load model and tokenizer
-    LOGGER.info(f"Loading model from {args.model}")
-    model = AutoModelForSequenceClassification.from_pretrained(args.model)
-    tokenizer = AutoTokenizer.from_pretrained(args.model)
-    
-    # Check for GPU
-    import torch
-    device = 0 if torch.cuda.is_available() else -1
-    if device >= 0:
-        model = model.to(f"cuda:{device}")
-        LOGGER.info("✅ Using GPU for inference")
-    else:
-        LOGGER.info("⚠️  Using CPU for inference (will be slower)")
-    
     # Load evaluation dataset
     eval_dataset = load_dataset(args.dataset, args.eval_split, args.seed)
     
@@ -546,15 +543,42 @@ def main():
     LOGGER.info(f"Evaluation dataset: {len(texts)} examples")
     LOGGER.info(f"Label distribution: {y_true.sum(axis=0).tolist()}")
     
-    # Run predictions
-    y_pred, probabilities = predict_batch(
-        model=model,
-        tokenizer=tokenizer,
-        texts=texts,
-        label_list=category_config.label_list,
-        threshold=args.threshold,
-        device=device,
-    )
+    # Run predictions; the model is only loaded when no cached logits match
+    def run_inference() -> np.ndarray:
+        LOGGER.info(f"Loading {args.backend} model from {args.onnx_model or args.model}")
+        model = load_inference_model(Path(args.model), args.category, args.backend, args.onnx_model, args.threads)
+        tokenizer = AutoTokenizer.from_pretrained(args.model)
+
+        # Check for GPU
+        import torch
+        if args.backend == "onnx":
+            LOGGER.info(f"Using ONNX Runtime providers: {model.session.get_providers()}")
+        elif torch.cuda.is_available():
+            model = model.to("cuda:0")
+            LOGGER.info("✅ Using GPU for inference")
+        else:
+            threads = configure_cpu_threads(args.threads)
+            LOGGER.info(f"⚠️  Using CPU for inference with {threads} threads (will be slower)")
+
+        LOGGER.info(f"Running inference on {len(texts)} examples...")
+        token_cache = None if args.no_token_cache else TokenCache(tokenizer, args.token_cache)
+        return predict_text_logits(
+            model,
+            tokenizer,
+            texts,
+            max_length=category_config.max_length,
+            token_cache=token_cache,
+            window_stride=category_config.window_stride,
+            window_pooling=category_config.window_pooling,
+            token_budget=args.token_budget,
+        )
+
+    logits_cache = None
+    if not args.no_logits_cache:
+        artifacts = backend_artifacts(Path(args.model), args.backend, args.onnx_model)
+        logits_cache = LogitsCache(Path(args.model), args.category, args.backend, artifacts)
+    probabilities = sigmoid(cached_logits(logits_cache, texts, category_config, run_inference))
+    y_pred = (probabilities >= args.threshold).astype(int)
     
     # Compute metrics
     LOGGER.info("Computing metrics...")
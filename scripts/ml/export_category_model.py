@@ -5,6 +5,20 @@ The script primarily targets ONNX because it is well-supported by Hugging Face
 Transformers. TF.js export is attempted via the ONNX→TF→TF.js toolchain when the
 required dependencies are installed (`onnx`, `onnx-tf`, `tensorflow`, `tensorflowjs`).
 
+The tokenizer is saved next to the exported model with `model_max_length` set
+to the `max_length` recorded in the model's `category_config.json` (512 for
+models trained before lengths were profiled), so the browser loader truncates inputs the same way
+training and evaluation did.
+
+The float graph is then quantized to int8 (``--quantize dynamic`` by default,
+or ``static`` with activation ranges calibrated on a sample of the category
+dataset). Both graphs are run over the gold set (``--gold-dataset``) with the
+model's calibrated thresholds. If any label's F1 drops by more than
+``--max-f1-drop``, the quantized graph is refused: ``model.onnx`` stays float
+and the script exits non-zero. Otherwise the quantized graph replaces it.
+Per-label F1, model sizes and single-text latencies are written to
+``export_report.json``. Pass ``--quantize none`` to ship the float graph as before.
+
 Example:
 
 ```bash
@@ -12,6 +26,7 @@ python scripts/ml/export_category_model.py \
   --model artifacts/models/data_collection/v2025.09.30 \
   --output-dir dist/models/data_collection/v2025.09.30 \
   --opset 14 \
+  --gold-dataset data/processed/data_collection/v2025.09.30/gold_seed.jsonl \
   --tfjs
 ```
 """
@@ -19,12 +34,38 @@ python scripts/ml/export_category_model.py \
 from __future__ import annotations
 
 import argparse
+import json
+import os
 import subprocess
+import sys
 from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np  # type: ignore
 
 from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification  # type: ignore
 from transformers.onnx import FeaturesManager, export  # type: ignore
 
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:  # pragma: no cover - ensure local imports resolve
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.ml.category_config import CATEGORY_REGISTRY, LEGACY_MAX_LENGTH, config_for_model, latest_processed_dataset
+from scripts.ml.evaluate_category_model import build_dataset, load_jsonl
+from scripts.ml.onnx_quantization import (
+    DEFAULT_CALIBRATION_SAMPLES,
+    DEFAULT_LATENCY_SAMPLES,
+    DEFAULT_MAX_F1_DROP,
+    QUANTIZATION_MODES,
+    parity_report,
+    quantize_model,
+    sample_texts,
+)
+
+QUANTIZED_MODEL_NAME = "model.int8.onnx"
+FLOAT_MODEL_NAME = "model.fp32.onnx"
+REPORT_NAME = "export_report.json"
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
@@ -32,12 +73,57 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--output-dir", required=True, help="Where to store exported artifacts")
     parser.add_argument("--opset", type=int, default=13, help="ONNX opset version")
     parser.add_argument("--tfjs", action="store_true", help="Attempt TF.js conversion (requires tensorflowjs converter)")
+    parser.add_argument("--category", choices=sorted(CATEGORY_REGISTRY.keys()), help="Category of the model (default: from its category_config.json)")
+    parser.add_argument("--quantize", choices=QUANTIZATION_MODES, default="dynamic", help="Int8 quantization of the exported graph (default: dynamic)")
+    parser.add_argument("--gold-dataset", help="Gold JSONL set for the quantization F1 parity check (required unless --quantize none)")
+    parser.add_argument("--max-f1-drop", type=float, default=DEFAULT_MAX_F1_DROP, help="Largest per-label F1 loss accepted from quantization")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Decision threshold for labels missing from the model's thresholds.json")
+    parser.add_argument("--calibration-dataset", help="JSONL texts for static quantization (default: the category's latest processed dataset)")
+    parser.add_argument("--calibration-samples", type=int, default=DEFAULT_CALIBRATION_SAMPLES, help="Texts sampled for static calibration")
+    parser.add_argument("--latency-samples", type=int, default=DEFAULT_LATENCY_SAMPLES, help="Gold texts timed one at a time for the latency comparison")
+    parser.add_argument("--threads", type=int, help="ONNX Runtime intra-op threads for the parity check (default: CPUs available to this process)")
+    parser.add_argument("--keep-float", action="store_true", help=f"Keep the float graph as {FLOAT_MODEL_NAME} when the quantized one is published")
     return parser.parse_args()
 
 
+def resolve_max_length(model_path: Path) -> Optional[int]:
+    """The ``max_length`` the model was trained with; models that predate length profiling used 512."""
+    config_path = model_path / "category_config.json"
+    if not config_path.exists():
+        return None
+    with config_path.open("r", encoding="utf-8") as handle:
+        trained = json.load(handle)
+    return int(trained.get("max_length", LEGACY_MAX_LENGTH))
+
+
+def resolve_category(model_path: Path, override: Optional[str]) -> str:
+    if override:
+        return override
+    config_path = model_path / "category_config.json"
+    if config_path.exists():
+        with config_path.open("r", encoding="utf-8") as handle:
+            category = json.load(handle).get("category")
+        if category in CATEGORY_REGISTRY:
+            return category
+    raise SystemExit(f"Cannot tell the category of {model_path}; pass --category")
+
+
+def load_label_thresholds(model_path: Path, label_list: List[str], default: float) -> List[float]:
+    """Per-label decision thresholds from the model's ``thresholds.json`` (calibration output)."""
+    path = model_path / "thresholds.json"
+    calibrated: Dict[str, Dict[str, float]] = {}
+    if path.exists():
+        with path.open("r", encoding="utf-8") as handle:
+            calibrated = json.load(handle).get("thresholds", {})
+    return [float(calibrated.get(label, {}).get("suggested", default)) for label in label_list]
+
+
 def export_onnx(model_path: Path, output_dir: Path, opset: int) -> Path:
     config = AutoConfig.from_pretrained(model_path)
     tokenizer = AutoTokenizer.from_pretrained(model_path)
+    max_length = resolve_max_length(model_path)
+    if max_length is not None:
+        tokenizer.model_max_length = max_length
     model = AutoModelForSequenceClassification.from_pretrained(model_path)
 
     model_kind, onnx_config_cls = FeaturesManager.check_supported_model_or_raise(
@@ -55,6 +141,7 @@ def export_onnx(model_path: Path, output_dir: Path, opset: int) -> Path:
         opset=opset,
         output=onnx_path,
     )
+    tokenizer.save_pretrained(output_dir)
     return onnx_path
 
 
@@ -89,10 +176,72 @@ def try_convert_to_tfjs(onnx_path: Path, output_dir: Path) -> None:
     subprocess.run(converter_cmd, check=True)
 
 
+def quantize_and_gate(args: argparse.Namespace, model_path: Path, onnx_path: Path) -> None:
+    """Quantize ``onnx_path`` and publish it in its place if per-label F1 holds on the gold set."""
+    category = resolve_category(model_path, args.category)
+    config = config_for_model(CATEGORY_REGISTRY[category], model_path)
+    tokenizer = AutoTokenizer.from_pretrained(onnx_path.parent)
+    gold = build_dataset(Path(args.gold_dataset), config)
+
+    calibration_texts: List[str] = []
+    if args.quantize == "static":
+        calibration_path = Path(args.calibration_dataset) if args.calibration_dataset else latest_processed_dataset(category)
+        if calibration_path is None:
+            raise SystemExit(f"No processed dataset for {category}; pass --calibration-dataset")
+        texts = [row["text"] for row in load_jsonl(calibration_path)]
+        calibration_texts = sample_texts(texts, args.calibration_samples)
+        print(f"Calibrating static quantization on {len(calibration_texts)} texts from {calibration_path}")
+
+    quantized_path = onnx_path.with_name(QUANTIZED_MODEL_NAME)
+    quantize_model(onnx_path, quantized_path, args.quantize, tokenizer, calibration_texts, config.max_length)
+
+    report = parity_report(
+        onnx_path,
+        quantized_path,
+        tokenizer,
+        config,
+        gold["text"],
+        np.asarray(gold["labels"], dtype=int),
+        load_label_thresholds(model_path, config.label_list, args.threshold),
+        max_f1_drop=args.max_f1_drop,
+        latency_samples=args.latency_samples,
+        threads=args.threads,
+    )
+    report.update({"category": category, "quantization": args.quantize, "gold_dataset": args.gold_dataset})
+
+    for label, stats in report["labels"].items():
+        print(f"  {label:<32} F1 {stats['f1_float']:.3f} -> {stats['f1_quantized']:.3f} ({-stats['f1_drop']:+.3f})")
+    print(
+        f"Size {report['float']['size_bytes'] / 1e6:.1f} MB -> {report['quantized']['size_bytes'] / 1e6:.1f} MB, "
+        f"p50 latency {report['float']['latency']['p50_ms']:.1f} ms -> {report['quantized']['latency']['p50_ms']:.1f} ms"
+    )
+
+    if report["passed"]:
+        if args.keep_float:
+            os.replace(onnx_path, onnx_path.with_name(FLOAT_MODEL_NAME))
+        os.replace(quantized_path, onnx_path)
+        report["published"] = "quantized"
+    else:
+        quantized_path.unlink()
+        report["published"] = "float"
+    with (onnx_path.parent / REPORT_NAME).open("w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+    if not report["passed"]:
+        raise SystemExit(
+            f"Refusing the {args.quantize} int8 model: F1 dropped by more than {args.max_f1_drop} for "
+            f"{', '.join(report['failing_labels'])}. {onnx_path} is the float graph; "
+            f"see {onnx_path.parent / REPORT_NAME}."
+        )
+    print(f"Published {args.quantize} int8 model to {onnx_path} (report: {onnx_path.parent / REPORT_NAME})")
+
+
 def main() -> None:
     args = parse_args()
     model_path = Path(args.model)
     output_dir = Path(args.output_dir)
+    if args.quantize != "none" and not args.gold_dataset:
+        raise SystemExit("Quantization is checked against a gold set; pass --gold-dataset (or --quantize none)")
 
     onnx_path = export_onnx(model_path, output_dir, args.opset)
     print(f"Exported ONNX model to {onnx_path}")
@@ -106,6 +255,10 @@ def main() -> None:
         except Exception as exc:
             raise SystemExit(f"TF.js conversion failed: {exc}") from exc
 
+    # TF.js is converted from the float graph above; onnx-tf does not handle quantized operators.
+    if args.quantize != "none":
+        quantize_and_gate(args, model_path, onnx_path)
+
 
 if __name__ == "__main__":
     main()
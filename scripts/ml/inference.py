@@ -0,0 +1,162 @@
+"""Batched inference shared by the evaluation, calibration and validation scripts.
+
+Texts are tokenized once (through the token cache when given), sorted by
+length and grouped into micro-batches whose padded size stays under a token
+budget, so memory is bounded and each batch pads only to its own longest
+member. Batches run under ``torch.inference_mode`` on the model's device and
+the logits are scattered back into the caller's order. In sliding-window mode
+the windows are batched the same way and pooled per text afterwards.
+
+``model`` is either a PyTorch sequence classifier or an object with a
+``run_encoded(numpy_encodings) -> logits`` method, such as the ONNX Runtime
+wrapper in ``onnx_backend``; both go through the same batching.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+try:  # imported as ``scripts.ml.inference``
+    from .sliding_window import pool_window_logits, split_windows
+    from .token_cache import TokenCache, encode_texts, pad_encoded
+except ImportError:  # imported with scripts/ml on sys.path
+    from sliding_window import pool_window_logits, split_windows  # type: ignore[no-redef]
+    from token_cache import TokenCache, encode_texts, pad_encoded  # type: ignore[no-redef]
+
+LOGGER = logging.getLogger("inference")
+
+# Padded tokens per forward pass; ~64 full 512-token sequences.
+DEFAULT_TOKEN_BUDGET = 32768
+DEFAULT_MAX_BATCH_SIZE = 256
+
+_configured_threads: Optional[int] = None
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def configure_cpu_threads(num_threads: Optional[int] = None) -> int:
+    """Set torch intra-op threads to ``num_threads`` (default: the CPUs this process may use).
+
+    Torch sizes its pool from the host's core count, which oversubscribes
+    containers and parallel validation jobs restricted to fewer CPUs.
+    Inter-op parallelism is pinned to one thread; encoder inference is a
+    chain of ops with nothing to run concurrently.
+    """
+    import torch  # type: ignore
+
+    global _configured_threads
+    threads = max(1, num_threads or available_cpus())
+    if _configured_threads != threads:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:  # already set, or parallel work has started
+            pass
+        _configured_threads = threads
+    return threads
+
+
+def length_sorted_batches(
+    lengths: Sequence[int],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+) -> List[List[int]]:
+    """Group indices, longest first, so ``len(batch) * longest`` stays within ``token_budget``."""
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for index in order:
+        # The first member of a batch is its longest, so it sets the padded width.
+        width = lengths[current[0]] if current else lengths[index]
+        if current and ((len(current) + 1) * width > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def predict_logits(
+    model,
+    tokenizer,
+    input_ids: Sequence[Sequence[int]],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+) -> np.ndarray:
+    """Logits for pre-tokenized sequences, in their original order."""
+    batches = length_sorted_batches([len(ids) for ids in input_ids], token_budget, max_batch_size)
+    logits: Optional[np.ndarray] = None
+    with _forward_context(model) as forward:
+        for batch in batches:
+            batch_logits = forward(tokenizer, [input_ids[index] for index in batch])
+            if logits is None:
+                logits = np.empty((len(input_ids), batch_logits.shape[1]), dtype=np.float32)
+            logits[batch] = batch_logits
+    if logits is None:
+        num_labels = getattr(model, "num_labels", None) or getattr(getattr(model, "config", None), "num_labels", 0)
+        return np.empty((0, num_labels), dtype=np.float32)
+    return logits
+
+
+@contextmanager
+def _forward_context(model) -> Iterator[Callable]:
+    """Yield ``forward(tokenizer, ids) -> logits`` for one padded batch on ``model``'s backend."""
+    if hasattr(model, "run_encoded"):
+        yield lambda tokenizer, ids: model.run_encoded(pad_encoded(tokenizer, ids, return_tensors="np"))
+        return
+
+    import torch  # type: ignore
+
+    device = next(model.parameters()).device
+    if device.type == "cpu" and _configured_threads is None:
+        configure_cpu_threads()
+    model.eval()
+
+    def forward(tokenizer, ids):
+        encodings = {key: value.to(device) for key, value in pad_encoded(tokenizer, ids).items()}
+        return model(**encodings).logits.float().cpu().numpy()
+
+    with torch.inference_mode():
+        yield forward
+
+
+def predict_text_logits(
+    model,
+    tokenizer,
+    texts: Sequence[str],
+    max_length: int = 512,
+    token_cache: Optional[TokenCache] = None,
+    window_stride: Optional[int] = None,
+    window_pooling: str = "max",
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+) -> np.ndarray:
+    """Logits, shape ``(len(texts), num_labels)``, in the order of ``texts``."""
+    texts = list(texts)
+    if window_stride is None:
+        input_ids = encode_texts(tokenizer, texts, max_length, token_cache)
+        return predict_logits(model, tokenizer, input_ids, token_budget, max_batch_size)
+    bodies = encode_texts(tokenizer, texts, None, token_cache)
+    windows, owners = split_windows(tokenizer, bodies, max_length, window_stride)
+    window_logits = predict_logits(model, tokenizer, windows, token_budget, max_batch_size)
+    return pool_window_logits(window_logits, owners, len(texts), window_pooling)
+
+
+def sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-logits))
+
+
+def predict_proba(model, tokenizer, texts: Sequence[str], **kwargs) -> np.ndarray:
+    """Sigmoid probabilities for ``texts``; keyword arguments as for :func:`predict_text_logits`."""
+    return sigmoid(predict_text_logits(model, tokenizer, texts, **kwargs))
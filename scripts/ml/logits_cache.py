@@ -0,0 +1,170 @@
+"""Persistent logits cache shared by evaluation, calibration and validation.
+
+Evaluating, calibrating and validating a model on the same dataset used to
+recompute every logit each time. Logits are now stored as ``.npy`` files
+under ``<model_dir>/logits_cache/``, keyed by a hash of
+
+- the model weights (every weight file, plus ``config.json``, and for the
+  ONNX backend the exported graph) and the tokenizer files,
+- the dataset content (the texts in order),
+- the category head, the inference backend and the input settings
+  (``max_length``, sliding-window stride and pooling),
+
+so retraining the model, changing its vocabulary or editing the dataset invalidates an entry, and a
+repeat run needs neither inference nor loading the model. Weight hashes are
+memoized per file by (size, mtime) so multi-hundred-megabyte checkpoints are
+only read once. Entries for older weights are removed when a new one is saved.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+CACHE_DIR_NAME = "logits_cache"
+WEIGHTS_INDEX_NAME = "weights.json"
+# Files whose bytes determine the logits: weights, model config, and the tokenizer that turns texts into ids.
+WEIGHT_PATTERNS = ("*.safetensors", "*.bin", "*.pt", "config.json", "encoder/*.safetensors", "encoder/*.bin", "encoder/config.json")
+TOKENIZER_PATTERNS = ("tokenizer.json", "tokenizer_config.json", "special_tokens_map.json", "vocab.txt", "vocab.json", "merges.txt", "*.model")
+HASH_CHUNK_SIZE = 1 << 20
+
+LOGGER = logging.getLogger("logits_cache")
+
+
+def dataset_fingerprint(texts: Sequence[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LogitsCache:
+    """``.npy`` logits for one model directory and category."""
+
+    def __init__(self, model_dir: Path, category: str, backend: str = "torch", artifacts: Sequence[Path] = ()):
+        self.model_dir = Path(model_dir)
+        self.category = category
+        self.backend = backend
+        # Files outside the model directory that also determine the logits (e.g. an exported ONNX graph).
+        self.artifacts = [Path(path).resolve() for path in artifacts]
+        self.directory = self.model_dir / CACHE_DIR_NAME
+        self._weights_hash: Optional[str] = None
+
+    def weights_fingerprint(self) -> str:
+        if self._weights_hash is not None:
+            return self._weights_hash
+        index_path = self.directory / WEIGHTS_INDEX_NAME
+        known: Dict[str, Dict[str, object]] = {}
+        if index_path.exists():
+            with index_path.open("r", encoding="utf-8") as handle:
+                known = json.load(handle)
+        patterns = WEIGHT_PATTERNS + TOKENIZER_PATTERNS
+        files: List[Path] = sorted({path for pattern in patterns for path in self.model_dir.glob(pattern)})
+        named = [(path.relative_to(self.model_dir).as_posix(), path) for path in files]
+        named += [(f"artifacts/{path.name}", path) for path in self.artifacts]
+        entries: Dict[str, Dict[str, object]] = {}
+        digest = hashlib.sha256()
+        for name, path in named:
+            stat = path.stat()
+            entry = known.get(name)
+            if not entry or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+                entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _file_sha256(path)}
+            entries[name] = entry
+            digest.update(f"{name}:{entry['sha256']}\n".encode("utf-8"))
+        if entries != known:
+            self._write_json(index_path, entries)
+        self._weights_hash = digest.hexdigest()
+        return self._weights_hash
+
+    def key(self, texts: Sequence[str], config) -> str:
+        """Entry key for ``texts`` under ``config`` (a ``CategoryConfig``'s input settings)."""
+        parts = {
+            "weights": self.weights_fingerprint(),
+            "category": self.category,
+            "backend": self.backend,
+            "dataset": dataset_fingerprint(texts),
+            "max_length": config.max_length,
+            "window_stride": config.window_stride,
+            "window_pooling": config.window_pooling if config.window_stride is not None else None,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+    def load(self, key: str, num_texts: int) -> Optional[np.ndarray]:
+        path = self.directory / f"{key}.npy"
+        if not path.exists():
+            return None
+        try:
+            logits = np.load(path)
+        except (OSError, ValueError):
+            LOGGER.warning("Ignoring unreadable logits cache entry %s", path)
+            return None
+        return logits if logits.shape[0] == num_texts else None
+
+    def save(self, key: str, logits: np.ndarray) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        weights = self.weights_fingerprint()
+        tmp_path = self.directory / f".{uuid.uuid4().hex}.npy"
+        np.save(tmp_path, np.asarray(logits, dtype=np.float32))
+        os.replace(tmp_path, self.directory / f"{key}.npy")
+        self._write_json(self.directory / f"{key}.json", {"weights": weights, "category": self.category, "backend": self.backend})
+        self._prune(weights)
+
+    def _prune(self, weights: str) -> None:
+        """Drop this backend's entries computed with weights other than the current ones."""
+        for meta_path in self.directory.glob("*.json"):
+            if meta_path.name == WEIGHTS_INDEX_NAME:
+                continue
+            try:
+                with meta_path.open("r", encoding="utf-8") as handle:
+                    meta = json.load(handle)
+                if meta.get("backend", "torch") != self.backend:
+                    continue
+                stale = meta.get("weights") != weights
+            except (OSError, ValueError):
+                stale = True
+            if stale:
+                meta_path.with_suffix(".npy").unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _write_json(path: Path, payload: object) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+        os.replace(tmp_path, path)
+
+
+def cached_logits(
+    cache: Optional[LogitsCache],
+    texts: Sequence[str],
+    config,
+    compute: Callable[[], np.ndarray],
+) -> np.ndarray:
+    """Logits for ``texts`` from ``cache``, or from ``compute()`` (then stored) on a miss."""
+    if cache is None:
+        return compute()
+    key = cache.key(texts, config)
+    logits = cache.load(key, len(texts))
+    if logits is not None:
+        LOGGER.info("Reusing cached logits for %d texts from %s", len(texts), cache.directory)
+        return logits
+    logits = compute()
+    cache.save(key, logits)
+    return logits
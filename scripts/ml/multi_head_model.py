@@ -0,0 +1,166 @@
+"""Shared-encoder model with one multi-label classification head per category.
+
+One encoder pass serves every category in ``CATEGORY_REGISTRY``: the pooled
+[CLS] representation feeds a small linear head per category and the heads'
+logits are concatenated in a fixed label layout. Training uses the union of
+the category datasets; a per-example ``label_mask`` zeroes the loss for the
+heads of categories whose dataset did not contain the text, so missing
+annotations are never treated as negatives.
+
+A combined model directory holds:
+- ``encoder/`` - the fine-tuned encoder (``save_pretrained`` format)
+- ``heads.pt`` - classification head weights
+- ``multi_head_config.json`` - category -> label list layout
+- tokenizer files, as for single-category models
+
+:func:`load_category_classifier` returns a model for one category from either
+a single-category or a combined directory, so evaluation and validation
+scripts accept both.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch  # type: ignore
+from torch import nn  # type: ignore
+from transformers import AutoModel, AutoModelForSequenceClassification  # type: ignore
+from transformers.modeling_outputs import SequenceClassifierOutput  # type: ignore
+
+MULTI_HEAD_CONFIG_NAME = "multi_head_config.json"
+HEADS_WEIGHTS_NAME = "heads.pt"
+ENCODER_DIR_NAME = "encoder"
+FORMAT_VERSION = 1
+
+
+def label_layout(heads: Dict[str, List[str]]) -> Dict[str, Tuple[int, int]]:
+    """Map each category to its ``(start, end)`` slice of the concatenated logits."""
+    layout: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    for category, labels in heads.items():
+        layout[category] = (offset, offset + len(labels))
+        offset += len(labels)
+    return layout
+
+
+class MultiHeadClassifier(nn.Module):
+    """Encoder shared by per-category multi-label heads, trained with masked BCE."""
+
+    def __init__(self, encoder, heads: Dict[str, List[str]], dropout: float = 0.1):
+        super().__init__()
+        self.encoder = encoder
+        self.config = encoder.config
+        self.heads_spec = dict(heads)
+        self.layout = label_layout(self.heads_spec)
+        self.dropout = nn.Dropout(dropout)
+        self.heads = nn.ModuleDict(
+            {category: nn.Linear(encoder.config.hidden_size, len(labels)) for category, labels in heads.items()}
+        )
+
+    @classmethod
+    def from_encoder(cls, base_model: str, heads: Dict[str, List[str]], dropout: float = 0.1) -> "MultiHeadClassifier":
+        return cls(AutoModel.from_pretrained(base_model), heads, dropout)
+
+    def pooled(self, input_ids, attention_mask=None):
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        return self.dropout(hidden[:, 0])
+
+    def forward(self, input_ids=None, attention_mask=None, labels=None, label_mask=None, **_unused):
+        pooled = self.pooled(input_ids, attention_mask)
+        logits = torch.cat([self.heads[category](pooled) for category in self.heads_spec], dim=-1)
+        loss = None
+        if labels is not None:
+            losses = nn.functional.binary_cross_entropy_with_logits(logits, labels.float(), reduction="none")
+            mask = label_mask.float() if label_mask is not None else torch.ones_like(losses)
+            loss = (losses * mask).sum() / mask.sum().clamp(min=1.0)
+        return SequenceClassifierOutput(loss=loss, logits=logits)
+
+    def category_logits(self, category: str, input_ids=None, attention_mask=None):
+        return self.heads[category](self.pooled(input_ids, attention_mask))
+
+    def save_pretrained(self, output_dir: Path, base_model: Optional[str] = None) -> None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.encoder.save_pretrained(output_dir / ENCODER_DIR_NAME)
+        torch.save(self.heads.state_dict(), output_dir / HEADS_WEIGHTS_NAME)
+        with (output_dir / MULTI_HEAD_CONFIG_NAME).open("w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "format_version": FORMAT_VERSION,
+                    "base_model": base_model,
+                    "dropout": self.dropout.p,
+                    "heads": self.heads_spec,
+                },
+                handle,
+                indent=2,
+            )
+
+    @classmethod
+    def from_pretrained(cls, model_dir: Path) -> "MultiHeadClassifier":
+        model_dir = Path(model_dir)
+        with (model_dir / MULTI_HEAD_CONFIG_NAME).open("r", encoding="utf-8") as handle:
+            spec = json.load(handle)
+        model = cls(AutoModel.from_pretrained(model_dir / ENCODER_DIR_NAME), spec["heads"], spec.get("dropout", 0.1))
+        model.heads.load_state_dict(torch.load(model_dir / HEADS_WEIGHTS_NAME, map_location="cpu"))
+        model.eval()
+        return model
+
+
+class CategoryHeadView(nn.Module):
+    """One category's head of a :class:`MultiHeadClassifier`, used like a sequence classifier."""
+
+    def __init__(self, model: MultiHeadClassifier, category: str):
+        super().__init__()
+        if category not in model.heads_spec:
+            raise ValueError(f"Combined model has no head for category '{category}'")
+        self.model = model
+        self.category = category
+        self.config = copy.copy(model.config)
+        self.config.num_labels = len(model.heads_spec[category])
+
+    def forward(self, input_ids=None, attention_mask=None, **_unused):
+        return SequenceClassifierOutput(logits=self.model.category_logits(self.category, input_ids, attention_mask))
+
+
+def is_multi_head_model(model_path) -> bool:
+    return (Path(model_path) / MULTI_HEAD_CONFIG_NAME).exists()
+
+
+@lru_cache(maxsize=4)
+def _load_multi_head(model_path: str) -> MultiHeadClassifier:
+    # Validating several categories against one combined model loads it once.
+    return MultiHeadClassifier.from_pretrained(Path(model_path))
+
+
+def load_category_classifier(model_path, category: str):
+    """Load a classifier for ``category`` from a single-category or combined model directory."""
+    if is_multi_head_model(model_path):
+        return CategoryHeadView(_load_multi_head(str(Path(model_path).resolve())), category).eval()
+    return AutoModelForSequenceClassification.from_pretrained(model_path)
+
+
+def merge_category_records(
+    datasets: Dict[str, Sequence[Dict[str, object]]], heads: Dict[str, List[str]]
+) -> List[Dict[str, object]]:
+    """Union category datasets by text with concatenated label vectors and masks.
+
+    A text present in several category datasets gets each category's labels;
+    heads of categories that did not annotate it are masked out.
+    """
+    layout = label_layout(heads)
+    width = sum(len(labels) for labels in heads.values())
+    merged: Dict[str, Dict[str, object]] = {}
+    for category, records in datasets.items():
+        start, _ = layout[category]
+        for record in records:
+            text = str(record["text"])
+            entry = merged.setdefault(text, {"text": text, "labels": [0.0] * width, "label_mask": [0.0] * width})
+            label_dict = record.get("labels", {}) or {}
+            for offset, label in enumerate(heads[category]):
+                entry["labels"][offset + start] = float(label_dict.get(label, 0.0))  # type: ignore[index]
+                entry["label_mask"][offset + start] = 1.0  # type: ignore[index]
+    return list(merged.values())
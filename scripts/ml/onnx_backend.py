@@ -0,0 +1,141 @@
+"""ONNX Runtime inference backend for exported category models.
+
+`export_category_model.py` writes `model.onnx`; evaluating through it
+validates the artifact that ships rather than the PyTorch checkpoint it came
+from, and is usually faster on CPU. :class:`OnnxClassifier` wraps one
+onnxruntime session (all graph optimizations enabled, sequential execution,
+intra-op threads sized like the PyTorch path) and is accepted wherever the
+inference helpers take a model. Sessions are cached per model file.
+
+onnxruntime is optional (see `scripts/requirements.txt`); it is only
+imported when the ONNX backend is selected.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+try:  # imported as ``scripts.ml.onnx_backend``
+    from .inference import available_cpus, predict_proba
+except ImportError:  # imported with scripts/ml on sys.path
+    from inference import available_cpus, predict_proba  # type: ignore[no-redef]
+
+try:  # pragma: no cover - optional dependency guard
+    import onnxruntime as ort  # type: ignore
+
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:  # pragma: no cover - handled when the backend is requested
+    ort = None  # type: ignore[assignment]
+    ONNXRUNTIME_AVAILABLE = False
+
+BACKENDS = ("torch", "onnx")
+ONNX_MODEL_NAME = "model.onnx"
+# Largest probability difference accepted between the PyTorch and ONNX backends.
+DEFAULT_PARITY_ATOL = 1e-4
+DEFAULT_PARITY_SAMPLES = 256
+
+
+class OnnxClassifier:
+    """A sequence-classification ONNX graph run through onnxruntime."""
+
+    def __init__(self, onnx_path: Path, threads: Optional[int] = None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise SystemExit("The ONNX backend requires onnxruntime. Install with `pip install onnxruntime`.")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = max(1, threads or available_cpus())
+        options.inter_op_num_threads = 1
+        providers = ["CPUExecutionProvider"]
+        if "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        self.path = Path(onnx_path)
+        self.session = ort.InferenceSession(str(self.path), options, providers=providers)
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        # BERT-style exports also declare token_type_ids, which PyTorch defaults to zeros.
+        self.zero_inputs = [
+            node.name for node in self.session.get_inputs() if node.name not in ("input_ids", "attention_mask") and node.type == "tensor(int64)"
+        ]
+        outputs = [node.name for node in self.session.get_outputs()]
+        self.output_name = "logits" if "logits" in outputs else outputs[0]
+        self.num_labels = self.session.get_outputs()[0].shape[-1]
+
+    def run_encoded(self, encodings: Dict[str, np.ndarray]) -> np.ndarray:
+        """Logits for a padded batch (``return_tensors="np"`` tokenizer output)."""
+        feed = {name: np.asarray(encodings[name], dtype=np.int64) for name in self.input_names if name in encodings}
+        for name in self.zero_inputs:
+            if name not in feed:
+                feed[name] = np.zeros_like(feed["input_ids"])
+        return self.session.run([self.output_name], feed)[0].astype(np.float32)
+
+
+@lru_cache(maxsize=8)
+def _load_onnx_classifier(onnx_path: str, threads: Optional[int]) -> OnnxClassifier:
+    return OnnxClassifier(Path(onnx_path), threads)
+
+
+def default_onnx_path(model_dir: Path) -> Path:
+    return Path(model_dir) / ONNX_MODEL_NAME
+
+
+def resolve_onnx_path(model_dir: Path, onnx_path: Optional[Path] = None) -> Path:
+    return Path(onnx_path) if onnx_path else default_onnx_path(model_dir)
+
+
+def backend_artifacts(model_dir: Path, backend: str, onnx_path: Optional[Path] = None) -> List[Path]:
+    """Files besides the checkpoint that determine ``backend``'s logits (for the logits cache key)."""
+    if backend != "onnx":
+        return []
+    path = resolve_onnx_path(model_dir, onnx_path)
+    return [path] if path.exists() else []
+
+
+def load_inference_model(
+    model_dir: Path,
+    category: str,
+    backend: str = "torch",
+    onnx_path: Optional[Path] = None,
+    threads: Optional[int] = None,
+):
+    """Model object for the inference helpers: a PyTorch classifier or an :class:`OnnxClassifier`."""
+    if backend == "onnx":
+        path = resolve_onnx_path(model_dir, onnx_path)
+        if not path.exists():
+            raise FileNotFoundError(f"ONNX model not found: {path} (export it with export_category_model.py or pass --onnx-model)")
+        return _load_onnx_classifier(str(path.resolve()), threads)
+    if backend != "torch":
+        raise ValueError(f"Unknown backend '{backend}'; expected one of {BACKENDS}")
+    try:  # imported as ``scripts.ml.onnx_backend``
+        from .multi_head_model import load_category_classifier
+    except ImportError:  # imported with scripts/ml on sys.path
+        from multi_head_model import load_category_classifier  # type: ignore[no-redef]
+    return load_category_classifier(model_dir, category)
+
+
+def backend_parity(
+    model_dir: Path,
+    category: str,
+    tokenizer,
+    texts: Sequence[str],
+    config,
+    onnx_path: Optional[Path] = None,
+    threads: Optional[int] = None,
+    atol: float = DEFAULT_PARITY_ATOL,
+) -> Dict[str, object]:
+    """Compare PyTorch and ONNX probabilities for ``texts`` under ``config``'s input settings."""
+    kwargs = dict(
+        max_length=config.max_length,
+        window_stride=config.window_stride,
+        window_pooling=config.window_pooling,
+    )
+    probs = {
+        backend: predict_proba(load_inference_model(model_dir, category, backend, onnx_path, threads), tokenizer, texts, **kwargs)
+        for backend in BACKENDS
+    }
+    diff = np.abs(probs["torch"] - probs["onnx"])
+    max_diff = float(diff.max()) if diff.size else 0.0
+    return {"examples": len(texts), "max_abs_diff": max_diff, "atol": atol, "passed": max_diff <= atol}
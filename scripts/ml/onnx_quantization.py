@@ -0,0 +1,199 @@
+"""Int8 quantization of exported ONNX category models, gated on gold-set F1.
+
+Two modes are supported:
+
+- ``dynamic`` (default): weights are stored as int8 and activations are
+  quantized on the fly per batch. Needs no calibration data.
+- ``static``: activation ranges are fixed ahead of time from a sample of the
+  category's training dataset (QDQ format, per-channel weights). Only
+  ``MatMul``/``Gemm`` and the embedding ``Gather`` are quantized; LayerNorm,
+  Softmax and GELU stay in float, where transformer encoders lose most of
+  their accuracy.
+
+:func:`parity_report` runs the float and quantized graphs over the gold set
+with the same per-label thresholds and compares per-label F1, model size and
+single-text latency. The export refuses the quantized graph when any label's
+F1 drops by more than the configured budget.
+"""
+
+from __future__ import annotations
+
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+try:  # imported as ``scripts.ml.onnx_quantization``
+    from .inference import predict_logits, predict_text_logits, sigmoid
+    from .onnx_backend import ONNXRUNTIME_AVAILABLE, OnnxClassifier
+    from .token_cache import encode_texts, pad_encoded
+except ImportError:  # imported with scripts/ml on sys.path
+    from inference import predict_logits, predict_text_logits, sigmoid  # type: ignore[no-redef]
+    from onnx_backend import ONNXRUNTIME_AVAILABLE, OnnxClassifier  # type: ignore[no-redef]
+    from token_cache import encode_texts, pad_encoded  # type: ignore[no-redef]
+
+QUANTIZATION_MODES = ("dynamic", "static", "none")
+DEFAULT_MAX_F1_DROP = 0.01
+DEFAULT_CALIBRATION_SAMPLES = 256
+DEFAULT_LATENCY_SAMPLES = 64
+STATIC_OP_TYPES = ["MatMul", "Gemm", "Gather"]
+
+
+def _require_quantization():
+    if not ONNXRUNTIME_AVAILABLE:
+        raise SystemExit("Quantization requires onnxruntime. Install with `pip install onnxruntime onnx`.")
+    from onnxruntime import quantization  # type: ignore
+
+    return quantization
+
+
+def sample_texts(texts: Sequence[str], size: int, seed: int = 42) -> List[str]:
+    """Up to ``size`` texts drawn reproducibly from ``texts``."""
+    texts = list(texts)
+    if len(texts) <= size:
+        return texts
+    return random.Random(seed).sample(texts, size)
+
+
+class TextCalibrationReader:
+    """Feeds padded batches of calibration texts to the static-quantization calibrator."""
+
+    def __init__(self, tokenizer, texts: Sequence[str], input_names: Sequence[str], max_length: int, batch_size: int = 16):
+        input_ids = encode_texts(tokenizer, list(texts), max_length)
+        self._batches: Iterator[Dict[str, np.ndarray]] = iter(
+            {
+                name: np.asarray(values, dtype=np.int64)
+                for name, values in pad_encoded(tokenizer, input_ids[start : start + batch_size], return_tensors="np").items()
+                if name in input_names
+            }
+            for start in range(0, len(input_ids), batch_size)
+        )
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        return next(self._batches, None)
+
+
+def quantize_model(
+    float_path: Path,
+    output_path: Path,
+    mode: str = "dynamic",
+    tokenizer=None,
+    calibration_texts: Sequence[str] = (),
+    max_length: int = 512,
+) -> Path:
+    """Write an int8 copy of ``float_path`` to ``output_path``."""
+    quantization = _require_quantization()
+    if mode not in ("dynamic", "static"):
+        raise ValueError(f"Unknown quantization mode '{mode}'; expected 'dynamic' or 'static'")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Shape inference and graph fusion first, as onnxruntime recommends for transformer graphs.
+        prepared = Path(tmp) / "prepared.onnx"
+        try:
+            quantization.quant_pre_process(str(float_path), str(prepared))
+        except Exception:  # pragma: no cover - symbolic shape inference fails on some exporters
+            shutil.copyfile(float_path, prepared)
+        if mode == "dynamic":
+            quantization.quantize_dynamic(prepared, output_path, weight_type=quantization.QuantType.QInt8)
+            return output_path
+        if tokenizer is None or not calibration_texts:
+            raise ValueError("Static quantization needs a tokenizer and calibration texts")
+        input_names = [node.name for node in OnnxClassifier(prepared, threads=1).session.get_inputs()]
+        reader = TextCalibrationReader(tokenizer, calibration_texts, input_names, max_length)
+        quantization.quantize_static(
+            prepared,
+            output_path,
+            reader,
+            quant_format=quantization.QuantFormat.QDQ,
+            op_types_to_quantize=STATIC_OP_TYPES,
+            per_channel=True,
+            activation_type=quantization.QuantType.QUInt8,
+            weight_type=quantization.QuantType.QInt8,
+            calibrate_method=quantization.CalibrationMethod.MinMax,
+        )
+    return output_path
+
+
+def per_label_f1(labels: np.ndarray, probs: np.ndarray, thresholds: Sequence[float]) -> np.ndarray:
+    from sklearn.metrics import f1_score  # type: ignore
+
+    preds = (probs >= np.asarray(thresholds)[None, :]).astype(int)
+    return np.array([f1_score(labels[:, idx], preds[:, idx], zero_division=0) for idx in range(labels.shape[1])])
+
+
+def measure_latency(model, tokenizer, texts: Sequence[str], max_length: int) -> Dict[str, float]:
+    """Single-text latency percentiles (ms), the browser's one-chunk-at-a-time case."""
+    input_ids = encode_texts(tokenizer, list(texts), max_length)
+    if input_ids:
+        predict_logits(model, tokenizer, input_ids[:1])  # warm-up
+    timings = []
+    for ids in input_ids:
+        start = time.perf_counter()
+        predict_logits(model, tokenizer, [ids], max_batch_size=1)
+        timings.append((time.perf_counter() - start) * 1000)
+    if not timings:
+        return {"p50_ms": 0.0, "p95_ms": 0.0}
+    return {"p50_ms": float(np.percentile(timings, 50)), "p95_ms": float(np.percentile(timings, 95))}
+
+
+def parity_report(
+    float_path: Path,
+    quantized_path: Path,
+    tokenizer,
+    config,
+    texts: Sequence[str],
+    labels: np.ndarray,
+    thresholds: Sequence[float],
+    max_f1_drop: float = DEFAULT_MAX_F1_DROP,
+    latency_samples: int = DEFAULT_LATENCY_SAMPLES,
+    threads: Optional[int] = None,
+) -> Dict[str, object]:
+    """Per-label F1, size and latency of the quantized graph against the float one.
+
+    ``config`` supplies the input settings (``max_length``, sliding windows)
+    the model was trained with; ``report["passed"]`` is False when any label
+    loses more than ``max_f1_drop`` F1.
+    """
+    report: Dict[str, object] = {"max_f1_drop": max_f1_drop, "gold_examples": len(texts)}
+    latency_texts = sample_texts(texts, latency_samples)
+    f1: Dict[str, np.ndarray] = {}
+    for variant, path in (("float", float_path), ("quantized", quantized_path)):
+        model = OnnxClassifier(path, threads)
+        start = time.perf_counter()
+        logits = predict_text_logits(
+            model,
+            tokenizer,
+            texts,
+            max_length=config.max_length,
+            window_stride=config.window_stride,
+            window_pooling=config.window_pooling,
+        )
+        elapsed = time.perf_counter() - start
+        f1[variant] = per_label_f1(labels, sigmoid(logits), thresholds)
+        report[variant] = {
+            "path": str(path),
+            "size_bytes": Path(path).stat().st_size,
+            "gold_set_seconds": round(elapsed, 3),
+            "latency": measure_latency(model, tokenizer, latency_texts, config.max_length),
+        }
+
+    drops = f1["float"] - f1["quantized"]
+    report["labels"] = {
+        label: {
+            "threshold": float(thresholds[idx]),
+            "f1_float": float(f1["float"][idx]),
+            "f1_quantized": float(f1["quantized"][idx]),
+            "f1_drop": float(drops[idx]),
+        }
+        for idx, label in enumerate(config.label_list)
+    }
+    report["macro_f1"] = {"float": float(f1["float"].mean()), "quantized": float(f1["quantized"].mean())}
+    float_stats, quant_stats = report["float"], report["quantized"]
+    report["size_ratio"] = quant_stats["size_bytes"] / max(1, float_stats["size_bytes"])
+    report["latency_speedup_p50"] = float_stats["latency"]["p50_ms"] / max(1e-9, quant_stats["latency"]["p50_ms"])
+    report["failing_labels"] = [label for idx, label in enumerate(config.label_list) if drops[idx] > max_f1_drop]
+    report["passed"] = not report["failing_labels"]
+    return report
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Choose each category's `max_length` from its tokenized length distribution.
+
+Every category used to train and evaluate at 512 tokens, although most
+clauses in `terms_changes` or `account_management` are a fraction of that.
+This profiler tokenizes each category's dataset (untruncated), recommends
+the smallest `max_length` that covers `--percentile` of the records (rounded
+up to a multiple of `--multiple-of` and capped at `--ceiling`), and records it
+in `scripts/ml/category_lengths.json`, which `category_config.py` applies to
+`CATEGORY_REGISTRY`. Training, evaluation, calibration and export then pick it
+up from the category config.
+
+The report lists, for a ladder of candidate lengths, what truncation costs
+(records truncated, tokens dropped, positive examples truncated) against what
+it saves (encoder compute relative to the ceiling, under dynamic padding). With
+`--model CATEGORY=DIR` it also measures micro F1 and inference time of that
+model at each candidate on a sample of the dataset. A length that truncates
+positive examples is only recorded when that category was measured with
+`--model`; otherwise the category keeps its default.
+
+Example:
+    python scripts/ml/profile_token_lengths.py \
+        --percentile 98 \
+        --model terms_changes=artifacts/models/terms_changes/v2025.10.07
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np  # type: ignore
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:  # pragma: no cover - ensure local imports resolve
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.ml.category_config import (
+    CATEGORY_REGISTRY,
+    PROFILED_LENGTHS_PATH,
+    CategoryConfig,
+    latest_processed_dataset,
+)
+
+LOGGER = logging.getLogger("profile_token_lengths")
+
+DEFAULT_REPORT_PATH = REPO_ROOT / "reports" / "eval" / "max_length_profile.json"
+CANDIDATE_LENGTHS = (64, 128, 192, 256, 384, 512)
+TOKENIZE_BATCH_SIZE = 1024
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", nargs="+", choices=sorted(CATEGORY_REGISTRY.keys()), help="Categories to profile (default: all)")
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        metavar="CATEGORY=PATH",
+        help="Dataset for one category (repeatable); defaults to its latest processed version",
+    )
+    parser.add_argument("--tokenizer", default="distilbert-base-uncased", help="Tokenizer the category models are trained with")
+    parser.add_argument("--percentile", type=float, default=95.0, help="Share of records the recommended max_length must cover")
+    parser.add_argument("--multiple-of", type=int, default=8, help="Round recommendations up to a multiple of this")
+    parser.add_argument("--minimum", type=int, default=32, help="Smallest max_length to recommend")
+    parser.add_argument("--ceiling", type=int, default=512, help="Largest max_length (the encoder's position limit)")
+    parser.add_argument(
+        "--model",
+        action="append",
+        default=[],
+        metavar="CATEGORY=DIR",
+        help="Trained model to measure F1 and latency at each candidate length (repeatable)",
+    )
+    parser.add_argument("--eval-sample", type=int, default=512, help="Records sampled for --model measurements")
+    parser.add_argument("--batch-size", type=int, default=32, help="Inference batch size for --model measurements")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Prediction threshold for --model measurements")
+    parser.add_argument("--config-output", type=Path, default=PROFILED_LENGTHS_PATH, help="Where to record the chosen lengths")
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT_PATH, help="Tradeoff report (JSON; a Markdown copy is written alongside)")
+    parser.add_argument("--dry-run", action="store_true", help="Write the report but leave the recorded lengths untouched")
+    return parser.parse_args()
+
+
+def parse_pairs(entries: List[str], flag: str) -> Dict[str, Path]:
+    pairs: Dict[str, Path] = {}
+    for entry in entries:
+        name, _, path = entry.partition("=")
+        if name not in CATEGORY_REGISTRY or not path:
+            raise SystemExit(f"Invalid {flag} '{entry}'; expected CATEGORY=PATH")
+        pairs[name] = Path(path)
+    return pairs
+
+
+def display_path(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(REPO_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def load_jsonl(path: Path) -> Iterable[Dict[str, object]]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def token_lengths(tokenizer, texts: List[str]) -> np.ndarray:
+    """Untruncated token counts, special tokens included."""
+    lengths: List[int] = []
+    for start in range(0, len(texts), TOKENIZE_BATCH_SIZE):
+        batch = texts[start : start + TOKENIZE_BATCH_SIZE]
+        encoded = tokenizer(batch, truncation=False, add_special_tokens=True)["input_ids"]
+        lengths.extend(len(ids) for ids in encoded)
+    return np.asarray(lengths, dtype=np.int64)
+
+
+def recommend_max_length(lengths: np.ndarray, percentile: float, multiple_of: int, minimum: int, ceiling: int) -> int:
+    covered = int(np.ceil(np.percentile(lengths, percentile))) if lengths.size else minimum
+    rounded = -(-covered // multiple_of) * multiple_of
+    return int(min(ceiling, max(minimum, rounded)))
+
+
+def length_summary(lengths: np.ndarray) -> Dict[str, float]:
+    return {
+        "records": int(lengths.size),
+        "mean": round(float(lengths.mean()), 1),
+        **{f"p{q}": int(np.percentile(lengths, q)) for q in (50, 90, 95, 98, 99)},
+        "max": int(lengths.max()),
+    }
+
+
+def tradeoff_row(lengths: np.ndarray, positive: np.ndarray, max_length: int, ceiling: int) -> Dict[str, float]:
+    """Truncation cost and compute saving of ``max_length`` relative to ``ceiling``.
+
+    With per-batch padding an encoder processes ``min(length, max_length)``
+    positions per record; feed-forward cost grows linearly with that and
+    self-attention quadratically.
+    """
+    kept = np.minimum(lengths, max_length)
+    at_ceiling = np.minimum(lengths, ceiling)
+    truncated = lengths > max_length
+    return {
+        "max_length": int(max_length),
+        "records_truncated": round(float(truncated.mean()), 4),
+        "positive_records_truncated": round(float(truncated[positive].mean()), 4) if positive.any() else 0.0,
+        "tokens_kept": round(float(kept.sum() / lengths.sum()), 4),
+        "relative_linear_compute": round(float(kept.sum() / at_ceiling.sum()), 4),
+        "relative_attention_compute": round(float((kept.astype(np.float64) ** 2).sum() / (at_ceiling.astype(np.float64) ** 2).sum()), 4),
+    }
+
+
+def measure_model(
+    model_dir: Path,
+    tokenizer,
+    config: CategoryConfig,
+    records: List[Dict[str, object]],
+    lengths: List[int],
+    batch_size: int,
+    threshold: float,
+) -> List[Dict[str, float]]:
+    """Micro F1 and inference seconds of a trained model at each candidate length."""
+    from sklearn.metrics import f1_score  # type: ignore
+
+    from scripts.ml.inference import predict_proba
+    from scripts.ml.multi_head_model import load_category_classifier
+
+    model = load_category_classifier(model_dir, config.name)
+    texts = [str(record["text"]) for record in records]
+    labels = np.asarray(
+        [[float((record.get("labels") or {}).get(label, 0.0)) > 0 for label in config.label_list] for record in records],
+        dtype=int,
+    )
+    results: List[Dict[str, float]] = []
+    for max_length in lengths:
+        started = time.perf_counter()
+        probs = predict_proba(model, tokenizer, texts, max_length=max_length, token_budget=batch_size * max_length)
+        elapsed = time.perf_counter() - started
+        f1 = f1_score(labels, (probs >= threshold).astype(int), average="micro", zero_division=0)
+        results.append({"max_length": max_length, "f1_micro": round(float(f1), 4), "seconds": round(elapsed, 3)})
+        LOGGER.info("  %s @ %d: micro F1 %.4f in %.2fs", config.name, max_length, f1, elapsed)
+    return results
+
+
+def profile_category(
+    name: str,
+    dataset_path: Path,
+    tokenizer,
+    args: argparse.Namespace,
+    model_dir: Optional[Path],
+) -> Dict[str, object]:
+    config = CATEGORY_REGISTRY[name]
+    records = [record for record in load_jsonl(dataset_path) if str(record.get("text") or "").strip()]
+    if not records:
+        raise SystemExit(f"Dataset {dataset_path} has no texts")
+    lengths = token_lengths(tokenizer, [str(record["text"]) for record in records])
+    positive = np.asarray(
+        [any(float(value) > 0 for value in (record.get("labels") or {}).values()) for record in records],
+        dtype=bool,
+    )
+    recommended = recommend_max_length(lengths, args.percentile, args.multiple_of, args.minimum, args.ceiling)
+    candidates = sorted({length for length in CANDIDATE_LENGTHS if length <= args.ceiling} | {recommended, args.ceiling})
+    tradeoffs = [tradeoff_row(lengths, positive, length, args.ceiling) for length in candidates]
+    chosen = next(row for row in tradeoffs if row["max_length"] == recommended)
+    LOGGER.info(
+        "%s: p%g=%d tokens -> max_length %d (%.1f%% of records truncated, %.0f%% of attention compute at %d)",
+        name,
+        args.percentile,
+        int(np.percentile(lengths, args.percentile)),
+        recommended,
+        100 * chosen["records_truncated"],
+        100 * chosen["relative_attention_compute"],
+        args.ceiling,
+    )
+
+    profile: Dict[str, object] = {
+        "dataset": display_path(dataset_path),
+        "previous_max_length": config.max_length,
+        "max_length": recommended,
+        "coverage": round(1.0 - chosen["records_truncated"], 4),
+        "positive_records_truncated": chosen["positive_records_truncated"],
+        "lengths": length_summary(lengths),
+        "tradeoffs": tradeoffs,
+    }
+    if model_dir is not None:
+        sample = records
+        if len(records) > args.eval_sample:
+            sample = random.Random(42).sample(records, args.eval_sample)
+        profile["measured"] = measure_model(
+            model_dir, tokenizer, config, sample, candidates, args.batch_size, args.threshold
+        )
+    return profile
+
+
+def unmeasured_truncation(profile: Dict[str, object]) -> bool:
+    """Whether ``profile`` recommends a length that truncates positives without an F1 measurement."""
+    return float(profile["positive_records_truncated"]) > 0 and "measured" not in profile
+
+
+def render_markdown(report: Dict[str, object]) -> str:
+    lines = [
+        "# max_length Profile",
+        "",
+        f"Tokenizer `{report['tokenizer']}`, covering p{report['percentile']:g} of records "
+        f"(multiple of {report['multiple_of']}, ceiling {report['ceiling']}). "
+        "Compute is relative to the ceiling under dynamic padding.",
+        "",
+    ]
+    for name, profile in report["categories"].items():  # type: ignore[union-attr]
+        stats = profile["lengths"]
+        lines.extend(
+            [
+                f"## {name}: max_length {profile['max_length']} (was {profile['previous_max_length']})",
+                "",
+                f"{stats['records']} records; tokens p50 {stats['p50']}, p95 {stats['p95']}, p99 {stats['p99']}, max {stats['max']}.",
+                "",
+            ]
+        )
+        if unmeasured_truncation(profile):
+            lines.extend(
+                [
+                    f"Not recorded: truncates {float(profile['positive_records_truncated']):.2%} of positive records "
+                    "and no `--model` was measured; the category keeps its default.",
+                    "",
+                ]
+            )
+        lines.extend(
+            [
+                "| max_length | records truncated | positives truncated | tokens kept | linear compute | attention compute |",
+                "| ---: | ---: | ---: | ---: | ---: | ---: |",
+            ]
+        )
+        for row in profile["tradeoffs"]:
+            marker = " **←**" if row["max_length"] == profile["max_length"] else ""
+            lines.append(
+                f"| {row['max_length']}{marker} | {row['records_truncated']:.2%} | {row['positive_records_truncated']:.2%} "
+                f"| {row['tokens_kept']:.2%} | {row['relative_linear_compute']:.2%} | {row['relative_attention_compute']:.2%} |"
+            )
+        if "measured" in profile:
+            lines.extend(["", "| max_length | micro F1 | seconds |", "| ---: | ---: | ---: |"])
+            for row in profile["measured"]:
+                lines.append(f"| {row['max_length']} | {row['f1_micro']:.4f} | {row['seconds']:.2f} |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    from transformers import AutoTokenizer  # type: ignore
+
+    datasets = parse_pairs(args.dataset, "--dataset")
+    models = parse_pairs(args.model, "--model")
+    categories = args.categories or sorted(datasets or CATEGORY_REGISTRY)
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    # Lengths are measured untruncated; silence the "longer than the model maximum" warning.
+    tokenizer.model_max_length = int(1e9)
+
+    profiles: Dict[str, Dict[str, object]] = {}
+    for name in categories:
+        dataset_path = datasets.get(name) or latest_processed_dataset(name)
+        if dataset_path is None:
+            LOGGER.warning("No processed dataset for '%s'; keeping max_length %d", name, CATEGORY_REGISTRY[name].max_length)
+            continue
+        profiles[name] = profile_category(name, dataset_path, tokenizer, args, models.get(name))
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "tokenizer": args.tokenizer,
+        "percentile": args.percentile,
+        "multiple_of": args.multiple_of,
+        "ceiling": args.ceiling,
+        "categories": profiles,
+    }
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    with args.report.open("w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    args.report.with_suffix(".md").write_text(render_markdown(report), encoding="utf-8")
+    LOGGER.info("Wrote tradeoff report to %s", args.report)
+
+    if args.dry_run:
+        return
+    recorded: Dict[str, object] = {"categories": {}}
+    if args.config_output.exists():
+        with args.config_output.open("r", encoding="utf-8") as handle:
+            recorded = json.load(handle)
+    recorded.update(
+        {
+            "generated_at": report["generated_at"],
+            "tokenizer": args.tokenizer,
+            "percentile": args.percentile,
+        }
+    )
+    for name, profile in profiles.items():
+        if unmeasured_truncation(profile):
+            LOGGER.warning(
+                "%s: max_length %d truncates %.1f%% of positive records; pass --model %s=DIR to record it",
+                name,
+                profile["max_length"],
+                100 * float(profile["positive_records_truncated"]),
+                name,
+            )
+            recorded.setdefault("categories", {}).pop(name, None)  # type: ignore[union-attr]
+            continue
+        recorded.setdefault("categories", {})[name] = {  # type: ignore[index]
+            "max_length": profile["max_length"],
+            "coverage": profile["coverage"],
+            "dataset": profile["dataset"],
+        }
+    with args.config_output.open("w", encoding="utf-8") as handle:
+        json.dump(recorded, handle, indent=2)
+        handle.write("\n")
+    LOGGER.info("Recorded max_length for %d categories in %s", len(recorded["categories"]), args.config_output)  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,16 @@ Any category marked with `enforce: true` will cause the process to exit with a
 non-zero status when the requirements are not satisfied. Categories with
 `enforce: false` will emit warnings but will not fail the pipeline, which is
 useful for models that are still under active development.
+
+With `--jobs N` categories are validated concurrently in N worker processes,
+each limited to an equal share of the available CPU threads; results are
+merged into the same summary, JSON report and CSV log in configuration order.
+
+With `--backend onnx` each model is validated through its exported ONNX graph
+(`<model_path>/model.onnx`, or an entry's `onnx_path`), i.e. the artifact that
+ships; an entry may also set `backend` to override the command-line choice.
+`--check-parity` additionally runs both backends on the dataset and fails a
+category whose PyTorch and ONNX probabilities differ by more than the tolerance.
 """
 
 from __future__ import annotations
@@ -23,10 +33,12 @@ import json
 import logging
 import sys
 import csv
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 import yaml
@@ -40,10 +52,26 @@ from evaluate_model import (  # type: ignore  # pylint: disable=import-error
     CATEGORY_REGISTRY,
     compute_macro_metrics,
     compute_per_label_metrics,
-    predict_batch,
+)
+from category_config import config_for_model  # type: ignore  # pylint: disable=import-error
+from inference import (  # type: ignore  # pylint: disable=import-error
+    available_cpus,
+    configure_cpu_threads,
+    predict_text_logits,
+    sigmoid,
+)
+from logits_cache import LogitsCache, cached_logits  # type: ignore  # pylint: disable=import-error
+from onnx_backend import (  # type: ignore  # pylint: disable=import-error
+    BACKENDS,
+    DEFAULT_PARITY_ATOL,
+    DEFAULT_PARITY_SAMPLES,
+    backend_artifacts,
+    backend_parity,
+    load_inference_model,
+    resolve_onnx_path,
 )
 
-from transformers import AutoModelForSequenceClassification, AutoTokenizer  # type: ignore
+from transformers import AutoTokenizer  # type: ignore
 
 try:
     import torch  # type: ignore
@@ -54,6 +82,9 @@ except ImportError as exc:  # pragma: no cover - handled at runtime
 
 LOGGER = logging.getLogger("model_validation")
 
+# CPU threads granted to this process when running as a --jobs worker.
+_worker_threads: Optional[int] = None
+
 
 @dataclass
 class ValidationResult:
@@ -120,6 +151,40 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Reduce console output (still prints summary table)",
     )
+    parser.add_argument(
+        "--no-logits-cache",
+        action="store_true",
+        help="Always run inference instead of reusing logits cached next to each model",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Validate this many categories concurrently in worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="torch",
+        help="Run each PyTorch checkpoint or its exported ONNX graph (default: torch; entries may override)",
+    )
+    parser.add_argument(
+        "--check-parity",
+        action="store_true",
+        help="Also fail categories whose PyTorch and ONNX probabilities differ beyond --parity-atol",
+    )
+    parser.add_argument(
+        "--parity-atol",
+        type=float,
+        default=DEFAULT_PARITY_ATOL,
+        help=f"Largest accepted probability difference between backends (default: {DEFAULT_PARITY_ATOL})",
+    )
+    parser.add_argument(
+        "--parity-samples",
+        type=int,
+        default=DEFAULT_PARITY_SAMPLES,
+        help=f"Dataset texts compared by --check-parity (default: {DEFAULT_PARITY_SAMPLES})",
+    )
     return parser.parse_args()
 
 
@@ -152,30 +217,43 @@ def predict_in_batches(
     model,
     tokenizer,
     texts: List[str],
-    label_list: List[str],
-    threshold: float,
-    device: int,
     batch_size: int,
+    max_length: int = 512,
+    window_stride: Optional[int] = None,
+    window_pooling: str = "max",
 ) -> np.ndarray:
-    """Run inference in smaller batches to control memory usage."""
+    """Return logits from length-sorted micro-batches to control memory usage.
+
+    ``batch_size`` bounds memory as before: each forward pass holds at most
+    ``batch_size * max_length`` padded tokens, but batches of short texts
+    pack more of them.
+    """
+
+    return predict_text_logits(
+        model,
+        tokenizer,
+        texts,
+        max_length=max_length,
+        window_stride=window_stride,
+        window_pooling=window_pooling,
+        token_budget=batch_size * max_length,
+    )
 
-    batched_predictions: List[np.ndarray] = []
-    for start in range(0, len(texts), batch_size):
-        batch_texts = texts[start : start + batch_size]
-        batch_predictions, _ = predict_batch(
-            model=model,
-            tokenizer=tokenizer,
-            texts=batch_texts,
-            label_list=label_list,
-            threshold=threshold,
-            device=device,
-        )
-        batched_predictions.append(batch_predictions)
 
-    return np.vstack(batched_predictions)
+@dataclass
+class ParityCheck:
+    """Settings for comparing the PyTorch and ONNX backends (``--check-parity``)."""
+
+    atol: float = DEFAULT_PARITY_ATOL
+    samples: int = DEFAULT_PARITY_SAMPLES
 
 
-def evaluate_category(entry: Dict[str, Any]) -> ValidationResult:
+def evaluate_category(
+    entry: Dict[str, Any],
+    use_logits_cache: bool = True,
+    backend: str = "torch",
+    parity: Optional[ParityCheck] = None,
+) -> ValidationResult:
     name = entry["name"]
     config = CATEGORY_REGISTRY.get(name)
     if not config:
@@ -189,6 +267,8 @@ def evaluate_category(entry: Dict[str, Any]) -> ValidationResult:
     min_label_support = entry.get("min_label_support")
     batch_size = int(entry.get("batch_size", 64))
     enforce = bool(entry.get("enforce", True))
+    backend = entry.get("backend", backend)
+    onnx_path = Path(entry["onnx_path"]).expanduser() if entry.get("onnx_path") else None
 
     failures: List[str] = []
     warnings: List[str] = []
@@ -204,6 +284,17 @@ def evaluate_category(entry: Dict[str, Any]) -> ValidationResult:
             failures=failures,
         )
 
+    if (backend == "onnx" or parity) and not resolve_onnx_path(model_path, onnx_path).exists():
+        failures.append(f"ONNX model missing: {resolve_onnx_path(model_path, onnx_path)}")
+        return ValidationResult(
+            name=name,
+            status="failed" if enforce else "warning",
+            macro_f1=0.0,
+            per_label_metrics={},
+            label_support={},
+            failures=failures,
+        )
+
     if not dataset_path.exists():
         failures.append(f"Dataset missing: {dataset_path}")
         return ValidationResult(
@@ -215,21 +306,10 @@ def evaluate_category(entry: Dict[str, Any]) -> ValidationResult:
             failures=failures,
         )
 
-    LOGGER.info("Evaluating %s", name)
+    LOGGER.info("Evaluating %s (%s)", name, backend)
     LOGGER.debug("  Model:   %s", model_path)
     LOGGER.debug("  Dataset: %s", dataset_path)
 
-    # Load resources
-    model = AutoModelForSequenceClassification.from_pretrained(model_path)
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-
-    device = 0 if torch.cuda.is_available() else -1
-    if device >= 0:
-        model = model.to(f"cuda:{device}")
-        LOGGER.debug("Using GPU for inference")
-    else:
-        LOGGER.debug("Using CPU for inference")
-
     examples = load_examples(dataset_path)
     texts = [example["text"] for example in examples]
     label_matrix = build_label_matrix(examples, config.label_list)
@@ -237,15 +317,37 @@ def evaluate_category(entry: Dict[str, Any]) -> ValidationResult:
         label: int(label_matrix[:, idx].sum()) for idx, label in enumerate(config.label_list)
     }
 
-    predictions = predict_in_batches(
-        model=model,
-        tokenizer=tokenizer,
-        texts=texts,
-        label_list=config.label_list,
-        threshold=threshold,
-        device=device,
-        batch_size=batch_size,
-    )
+    # Input settings (max_length, windowing) follow how the model was trained.
+    model_config = config_for_model(config, model_path)
+
+    def run_inference() -> np.ndarray:
+        # Load resources only when no cached logits match
+        model = load_inference_model(model_path, name, backend, onnx_path, _worker_threads)
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+        if backend == "onnx":
+            LOGGER.debug("Using ONNX Runtime providers %s", model.session.get_providers())
+        elif torch.cuda.is_available():
+            model = model.to("cuda:0")
+            LOGGER.debug("Using GPU for inference")
+        else:
+            LOGGER.debug("Using CPU for inference")
+
+        return predict_in_batches(
+            model=model,
+            tokenizer=tokenizer,
+            texts=texts,
+            batch_size=batch_size,
+            max_length=model_config.max_length,
+            window_stride=model_config.window_stride,
+            window_pooling=model_config.window_pooling,
+        )
+
+    logits_cache = None
+    if use_logits_cache:
+        logits_cache = LogitsCache(model_path, name, backend, backend_artifacts(model_path, backend, onnx_path))
+    probabilities = sigmoid(cached_logits(logits_cache, texts, model_config, run_inference))
+    predictions = (probabilities >= threshold).astype(int)
 
     per_label_metrics = compute_per_label_metrics(label_matrix, predictions, config.label_list)
     macro_metrics = compute_macro_metrics(label_matrix, predictions)
@@ -263,6 +365,23 @@ def evaluate_category(entry: Dict[str, Any]) -> ValidationResult:
                 f"Label '{label_name}' F1 {metrics['f1']:.3f} below minimum {min_label_f1:.3f}"
             )
 
+    if parity is not None:
+        report = backend_parity(
+            model_path,
+            name,
+            AutoTokenizer.from_pretrained(model_path),
+            texts[: parity.samples],
+            model_config,
+            onnx_path=onnx_path,
+            threads=_worker_threads,
+            atol=parity.atol,
+        )
+        LOGGER.info("  torch/onnx max |dp| = %.2e over %d texts", report["max_abs_diff"], report["examples"])
+        if not report["passed"]:
+            failures.append(
+                f"ONNX probabilities differ from PyTorch by {report['max_abs_diff']:.2e} (> {parity.atol:.0e})"
+            )
+
     if min_label_support is not None:
         for label_name, support in label_support.items():
             if support < min_label_support:
@@ -393,6 +512,39 @@ def append_summary_csv(summary_path: Path, run_id: str, results: List[Validation
                 )
 
 
+def validate_entry(
+    entry: Dict[str, Any],
+    use_logits_cache: bool = True,
+    backend: str = "torch",
+    parity: Optional[ParityCheck] = None,
+) -> ValidationResult:
+    """Validate one category, turning unexpected errors into a failed (or warning) result."""
+    try:
+        return evaluate_category(entry, use_logits_cache=use_logits_cache, backend=backend, parity=parity)
+    except Exception as exc:  # pragma: no cover - diagnostic aid
+        LOGGER.exception("Validation crashed for category %s", entry.get("name", "<unknown>"))
+        enforce = bool(entry.get("enforce", True))
+        status = "failed" if enforce else "warning"
+        return ValidationResult(
+            name=entry.get("name", "<unknown>"),
+            status=status,
+            macro_f1=0.0,
+            per_label_metrics={},
+            label_support={},
+            failures=[f"Unexpected error: {exc}"],
+        )
+
+
+def init_worker(threads: int, log_level: int) -> None:
+    """Limit a validation worker to its share of CPU threads."""
+    global _worker_threads
+    _worker_threads = threads
+    logging.basicConfig(level=log_level, format="%(levelname)s %(message)s")
+    # The Rust tokenizer sizes its own pool from this variable.
+    os.environ["RAYON_NUM_THREADS"] = str(threads)
+    configure_cpu_threads(threads)
+
+
 def main() -> None:
     args = parse_args()
     logging.basicConfig(
@@ -417,26 +569,23 @@ def main() -> None:
     if not categories:
         raise SystemExit("No validation categories defined in configuration")
 
-    results: List[ValidationResult] = []
-    for entry in categories:
-        try:
-            result = evaluate_category(entry)
-        except Exception as exc:  # pragma: no cover - diagnostic aid
-            LOGGER.exception("Validation crashed for category %s", entry.get("name", "<unknown>"))
-            enforce = bool(entry.get("enforce", True))
-            status = "failed" if enforce else "warning"
-            results.append(
-                ValidationResult(
-                    name=entry.get("name", "<unknown>"),
-                    status=status,
-                    macro_f1=0.0,
-                    per_label_metrics={},
-                    label_support={},
-                    failures=[f"Unexpected error: {exc}"],
-                )
-            )
-            continue
-        results.append(result)
+    use_logits_cache = not args.no_logits_cache
+    parity = ParityCheck(args.parity_atol, args.parity_samples) if args.check_parity else None
+    jobs = max(1, min(args.jobs, len(categories)))
+    if jobs == 1:
+        results = [validate_entry(entry, use_logits_cache, args.backend, parity) for entry in categories]
+    else:
+        # Split the CPU threads between workers so concurrent models don't oversubscribe cores.
+        threads = max(1, available_cpus() // jobs)
+        LOGGER.info("Validating %d categories with %d workers x %d threads", len(categories), jobs, threads)
+        log_level = logging.getLogger().level
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_worker, initargs=(threads, log_level)
+        ) as pool:
+            futures: List[Future] = [
+                pool.submit(validate_entry, entry, use_logits_cache, args.backend, parity) for entry in categories
+            ]
+            results = [future.result() for future in futures]
 
     print_summary(results)
 
@@ -0,0 +1,83 @@
+"""Sliding-window encoding for clauses longer than the model window.
+
+Truncating at ``max_length`` silently drops the tail of long harvested
+chunks. In windowed mode a text's full token ids (without special tokens)
+are cut into overlapping windows of ``max_length`` tokens, special tokens
+included, that advance by ``max_length - specials - stride`` tokens, so
+consecutive windows share ``stride`` tokens. A text that fits in one window
+gets exactly the ids truncation would have given it, so short clauses cost
+nothing extra.
+
+All windows of a batch of texts are run through the model together; each
+window carries the index of the text it came from, and the windows' logits
+are pooled back to one row per text (``max``: a label fires if any window
+supports it; ``mean``: average evidence across the clause).
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+POOLING_MODES = ("max", "mean")
+DEFAULT_STRIDE = 128
+
+
+def window_body_ids(body: Sequence[int], window: int, stride: int) -> List[Sequence[int]]:
+    """Cut ``body`` into windows of ``window`` tokens overlapping by ``stride``."""
+    if len(body) <= window:
+        return [body]
+    step = window - stride
+    windows = []
+    start = 0
+    while True:
+        windows.append(body[start : start + window])
+        if start + window >= len(body):
+            return windows
+        start += step
+
+
+def split_windows(
+    tokenizer,
+    bodies: Sequence[Sequence[int]],
+    max_length: int,
+    stride: int,
+) -> Tuple[List[List[int]], List[int]]:
+    """Token-id windows for full texts and, for each window, the index of its text.
+
+    ``bodies`` are untruncated ids without special tokens, as returned by
+    ``encode_texts(tokenizer, texts, None, cache)``.
+    """
+    window = max_length - tokenizer.num_special_tokens_to_add(pair=False)
+    if not 0 <= stride < window:
+        raise ValueError(f"stride must be in [0, {window}) for max_length {max_length}, got {stride}")
+    windows: List[List[int]] = []
+    owners: List[int] = []
+    for index, body in enumerate(bodies):
+        for part in window_body_ids(body, window, stride):
+            windows.append(tokenizer.build_inputs_with_special_tokens(list(part)))
+            owners.append(index)
+    return windows, owners
+
+
+def pool_window_logits(logits: np.ndarray, owners: Sequence[int], num_texts: int, pooling: str = "max") -> np.ndarray:
+    """Reduce per-window logits to one row per text."""
+    owners_arr = np.asarray(owners, dtype=np.int64)
+    if pooling == "max":
+        pooled = np.full((num_texts, logits.shape[1]), -np.inf, dtype=logits.dtype)
+        np.maximum.at(pooled, owners_arr, logits)
+        return pooled
+    if pooling == "mean":
+        pooled = np.zeros((num_texts, logits.shape[1]), dtype=logits.dtype)
+        np.add.at(pooled, owners_arr, logits)
+        counts = np.bincount(owners_arr, minlength=num_texts).astype(logits.dtype)
+        return pooled / counts[:, None]
+    raise ValueError(f"Unknown pooling '{pooling}'; expected one of {POOLING_MODES}")
+
+
+def first_window_rows(owners: Sequence[int]) -> np.ndarray:
+    """Index of each text's first window, e.g. to pick one label row per text."""
+    owners_arr = np.asarray(owners, dtype=np.int64)
+    _, first = np.unique(owners_arr, return_index=True)
+    return first
@@ -6,10 +6,13 @@ Allows rapid validation of model behavior before full evaluation.
 
 import argparse
 import json
+import sys
 from pathlib import Path
-import torch
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
+sys.path.insert(0, str(Path(__file__).parent))
+from inference import predict_proba
+
 
 def test_model(model_path: Path, test_texts: list, threshold: float = 0.5):
     """Test model on sample texts."""
@@ -26,6 +29,7 @@ def test_model(model_path: Path, test_texts: list, threshold: float = 0.5):
     model.eval()
     
     # Load category config to get labels
+    config = {}
     config_path = model_path / "category_config.json"
     if config_path.exists():
         with config_path.open() as f:
@@ -40,33 +44,28 @@ def test_model(model_path: Path, test_texts: list, threshold: float = 0.5):
     print(f"Threshold: {threshold}")
     print()
     
-    # Test each text
-    for i, text in enumerate(test_texts, 1):
+    # Predict all texts in one batched pass, with the input settings used in training
+    all_probs = predict_proba(
+        model,
+        tokenizer,
+        test_texts,
+        max_length=config.get("max_length", 512),
+        window_stride=config.get("window_stride"),
+        window_pooling=config.get("window_pooling", "max"),
+    )
+    
+    # Show each text
+    for i, (text, probs) in enumerate(zip(test_texts, all_probs), 1):
         print("-" * 70)
         print(f"Test #{i}:")
         print(f"Text: {text[:100]}{'...' if len(text) > 100 else ''}")
         print()
         
-        # Tokenize
-        inputs = tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            max_length=512,
-            padding=True
-        )
-        
-        # Predict
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits[0]
-            probs = torch.sigmoid(logits)
-        
         # Show all probabilities
         print("Predictions:")
         predictions = []
         for label, prob in zip(labels, probs):
-            prob_val = prob.item()
+            prob_val = float(prob)
             is_predicted = prob_val >= threshold
             marker = "✅" if is_predicted else "  "
             print(f"  {marker} {label:30} {prob_val:.4f}")
@@ -0,0 +1,181 @@
+"""Content-addressed token-id cache shared by training, evaluation and calibration.
+
+Token ids are keyed by (tokenizer fingerprint, text hash, max_length). The
+fingerprint hashes the tokenizer's serialized pipeline (vocabulary,
+normalizer, pre-tokenizer, post-processor), not its path, so every category
+model fine-tuned from the same base checkpoint shares one store.
+
+Entries live under ``data/cache/tokens/<fingerprint>/len<max_length>/`` (or
+``raw/`` for the untruncated ids without special tokens that sliding-window
+mode cuts into windows) as
+Arrow IPC shards that are memory-mapped on open, so a warm cache costs no
+tokenization and little resident memory. Misses are tokenized in one batch
+and appended as a new shard (written to a temporary file and renamed, so
+concurrent runs never see partial shards); shards are merged once there are
+more than ``MAX_SHARDS``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:  # pragma: no cover - optional dependency guard
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc as ipc  # type: ignore
+
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - pyarrow ships with `datasets`
+    pa = None  # type: ignore[assignment]
+    ipc = None  # type: ignore[assignment]
+    PYARROW_AVAILABLE = False
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_TOKEN_CACHE_DIR = REPO_ROOT / "data" / "cache" / "tokens"
+MAX_SHARDS = 32
+
+LOGGER = logging.getLogger("token_cache")
+
+# Call-time state the tokenizer library stores in the serialized pipeline.
+_TRANSIENT_TOKENIZER_KEYS = ("truncation", "padding")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash of everything that determines a tokenizer's ids for a text."""
+    digest = hashlib.sha256(type(tokenizer).__name__.encode("utf-8"))
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        state = json.loads(backend.to_str())
+        for key in _TRANSIENT_TOKENIZER_KEYS:
+            state.pop(key, None)
+        digest.update(json.dumps(state, sort_keys=True).encode("utf-8"))
+    else:
+        digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode("utf-8"))
+        digest.update(json.dumps(tokenizer.all_special_tokens).encode("utf-8"))
+        digest.update(str(getattr(tokenizer, "do_lower_case", "")).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def tokenize_uncached(tokenizer, texts: Sequence[str], max_length: Optional[int]) -> List[List[int]]:
+    """Truncated ids with special tokens, or with ``max_length=None`` the full ids without them."""
+    if not texts:
+        return []
+    if max_length is None:
+        return tokenizer(list(texts), add_special_tokens=False, verbose=False)["input_ids"]
+    return tokenizer(list(texts), truncation=True, max_length=max_length)["input_ids"]
+
+
+class TokenCache:
+    """Memory-mapped Arrow store of token ids for one tokenizer."""
+
+    def __init__(self, tokenizer, root: Path = DEFAULT_TOKEN_CACHE_DIR):
+        self.tokenizer = tokenizer
+        self.root = Path(root) / tokenizer_fingerprint(tokenizer)
+        self.hits = 0
+        self.misses = 0
+        self._shards: Dict[Optional[int], List["pa.Table"]] = {}
+        self._index: Dict[Optional[int], Dict[str, Tuple[int, int]]] = {}
+
+    def _directory(self, max_length: Optional[int]) -> Path:
+        return self.root / ("raw" if max_length is None else f"len{max_length}")
+
+    def _load(self, max_length: Optional[int]) -> None:
+        if max_length in self._index:
+            return
+        tables: List["pa.Table"] = []
+        index: Dict[str, Tuple[int, int]] = {}
+        directory = self._directory(max_length)
+        paths = sorted(directory.glob("*.arrow")) if directory.exists() else []
+        if len(paths) > MAX_SHARDS:
+            paths = [self._compact(directory, paths)]
+        for path in paths:
+            table = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+            shard = len(tables)
+            tables.append(table)
+            for row, key in enumerate(table.column("key").to_pylist()):
+                index.setdefault(key, (shard, row))
+        self._shards[max_length] = tables
+        self._index[max_length] = index
+
+    def _write_shard(self, directory: Path, table: "pa.Table") -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        name = uuid.uuid4().hex
+        tmp_path = directory / f".{name}.tmp"
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        final_path = directory / f"{name}.arrow"
+        os.replace(tmp_path, final_path)
+        return final_path
+
+    def _compact(self, directory: Path, paths: List[Path]) -> Path:
+        tables = [ipc.open_file(pa.memory_map(str(path), "r")).read_all() for path in paths]
+        merged = self._write_shard(directory, pa.concat_tables(tables))
+        for path in paths:
+            path.unlink(missing_ok=True)
+        return merged
+
+    def encode(self, texts: Sequence[str], max_length: Optional[int]) -> List[List[int]]:
+        """Return token ids for ``texts`` as :func:`tokenize_uncached` would, tokenizing only misses."""
+        if not PYARROW_AVAILABLE:
+            return tokenize_uncached(self.tokenizer, texts, max_length)
+        self._load(max_length)
+        index = self._index[max_length]
+        tables = self._shards[max_length]
+        keys = [text_hash(text) for text in texts]
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in index:
+                missing.setdefault(key, text)
+        self.misses += len(missing)
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        if missing:
+            missing_keys = list(missing)
+            ids = tokenize_uncached(self.tokenizer, list(missing.values()), max_length)
+            table = pa.table(
+                {
+                    "key": pa.array(missing_keys, pa.string()),
+                    "input_ids": pa.array(ids, pa.list_(pa.int32())),
+                }
+            )
+            self._write_shard(self._directory(max_length), table)
+            shard = len(tables)
+            tables.append(table)
+            for row, key in enumerate(missing_keys):
+                index[key] = (shard, row)
+
+        # Gather per shard so each Arrow column is converted in one call.
+        rows_by_shard: Dict[int, List[Tuple[int, int]]] = {}
+        for position, key in enumerate(keys):
+            shard, row = index[key]
+            rows_by_shard.setdefault(shard, []).append((position, row))
+        encoded: List[Optional[List[int]]] = [None] * len(keys)
+        for shard, rows in rows_by_shard.items():
+            column = tables[shard].column("input_ids").take(pa.array([row for _, row in rows]))
+            for (position, _), ids in zip(rows, column.to_pylist()):
+                encoded[position] = ids
+        return encoded  # type: ignore[return-value]
+
+
+def encode_texts(
+    tokenizer, texts: Sequence[str], max_length: Optional[int], cache: Optional[TokenCache] = None
+) -> List[List[int]]:
+    """Token ids for ``texts`` via ``cache`` when given, otherwise tokenized directly."""
+    if cache is None:
+        return tokenize_uncached(tokenizer, texts, max_length)
+    return cache.encode(texts, max_length)
+
+
+def pad_encoded(tokenizer, input_ids: Sequence[Sequence[int]], return_tensors: str = "pt"):
+    """Pad cached ids to the longest sequence and add the attention mask."""
+    return tokenizer.pad({"input_ids": list(input_ids)}, padding=True, return_tensors=return_tensors)
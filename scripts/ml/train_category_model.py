@@ -21,6 +21,21 @@ The script expects Hugging Face Transformers + Datasets libraries. Install via:
 pip install -r scripts/requirements.txt
 ```
 
+To train one shared encoder with a classification head per category on the
+union of the category datasets (latest `data/processed/<category>/<version>/dataset.jsonl`
+unless `--multi-head-dataset CATEGORY=PATH` is given):
+
+```bash
+python scripts/ml/train_category_model.py \
+  --multi-head \
+  --output-dir artifacts/models/multi_head/v2025.10.15
+```
+
+Harvested chunks can exceed the model window; `--window-stride N` trains on
+overlapping windows (sharing N tokens) instead of truncating. Evaluation
+scripts then pool window logits per text (`--window-pooling max|mean`) using
+the settings recorded in `category_config.json`.
+
 Outputs:
 - Fine-tuned model weights (saved in `--output-dir`)
 - `metrics.json` with accuracy, precision, recall, F1, and AUROC
@@ -42,6 +57,7 @@ try:
     from transformers import (  # type: ignore
         AutoModelForSequenceClassification,
         AutoTokenizer,
+        DataCollatorWithPadding,
         Trainer,
         TrainingArguments,
     )
@@ -55,7 +71,9 @@ except ImportError as exc:  # pragma: no cover - guidance for users without deps
 import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
-from category_config import CATEGORY_REGISTRY, CategoryConfig
+from category_config import CATEGORY_REGISTRY, CategoryConfig, latest_processed_dataset
+from sliding_window import POOLING_MODES, first_window_rows, pool_window_logits, split_windows
+from token_cache import DEFAULT_TOKEN_CACHE_DIR, TokenCache, encode_texts
 
 
 LOGGER = logging.getLogger("train_category_model")
@@ -63,8 +81,20 @@ LOGGER = logging.getLogger("train_category_model")
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("--category", required=True, choices=sorted(CATEGORY_REGISTRY.keys()))
-    parser.add_argument("--dataset", required=True, help="Path to JSONL dataset produced by the data pipeline")
+    parser.add_argument("--category", choices=sorted(CATEGORY_REGISTRY.keys()))
+    parser.add_argument("--dataset", help="Path to JSONL dataset produced by the data pipeline")
+    parser.add_argument(
+        "--multi-head",
+        action="store_true",
+        help="Train one shared encoder with a classification head per category instead of a single-category model",
+    )
+    parser.add_argument(
+        "--multi-head-dataset",
+        action="append",
+        default=[],
+        metavar="CATEGORY=PATH",
+        help="Dataset for one head (repeatable); defaults to the latest processed version of every category",
+    )
     parser.add_argument("--base-model", default="distilbert-base-uncased", help="Hugging Face model checkpoint to fine-tune")
     parser.add_argument("--output-dir", required=True, help="Directory where model + metrics will be written")
     parser.add_argument("--epochs", type=float, default=3.0)
@@ -74,8 +104,34 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--warmup-ratio", type=float, default=0.1)
     parser.add_argument("--eval-split", type=float, default=0.15, help="Proportion of data reserved for evaluation")
     parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument(
+        "--no-group-by-length",
+        dest="group_by_length",
+        action="store_false",
+        help="Disable length-grouped batching (batches are still padded dynamically)",
+    )
+    parser.add_argument(
+        "--token-cache",
+        default=str(DEFAULT_TOKEN_CACHE_DIR),
+        help="Shared token-id cache directory; only texts missing from it are tokenized",
+    )
+    parser.add_argument("--no-token-cache", action="store_true", help="Tokenize every text from scratch")
+    parser.add_argument(
+        "--window-stride",
+        type=int,
+        help="Sliding-window mode: split texts longer than max_length into windows overlapping by this many tokens",
+    )
+    parser.add_argument(
+        "--window-pooling",
+        choices=POOLING_MODES,
+        default="max",
+        help="How window logits are combined per text at evaluation time (recorded for inference)",
+    )
     parser.add_argument("--push-to-hub", action="store_true", help="If set, attempt to push model to configured Hugging Face Hub repo")
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.multi_head and not (args.category and args.dataset):
+        parser.error("--category and --dataset are required unless --multi-head is set")
+    return args
 
 
 def load_jsonl(path: Path) -> List[Dict[str, object]]:
@@ -103,10 +159,259 @@ def dataset_from_jsonl(path: Path, config: CategoryConfig, eval_split: float):
     return dataset["train"], dataset["test"]
 
 
+class PaddingStatsCollator:
+    """Pad each training batch to its longest example and tally how many positions are padding."""
+
+    def __init__(self, tokenizer, max_length: int):
+        self.collator = DataCollatorWithPadding(tokenizer)
+        self.max_length = max_length
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.examples = 0
+
+    def __call__(self, features: List[Dict[str, object]]):
+        batch = self.collator(features)
+        mask = batch["attention_mask"]
+        self.real_tokens += int(mask.sum())
+        self.padded_tokens += int(mask.numel())
+        self.examples += int(mask.shape[0])
+        return batch
+
+    def summary(self) -> Dict[str, float]:
+        """Padding-waste ratios for the batches seen so far, versus fixed ``max_length`` padding."""
+        if not self.padded_tokens:
+            return {"padding_waste_ratio": 0.0, "fixed_padding_waste_ratio": 0.0}
+        fixed_tokens = self.examples * self.max_length
+        return {
+            "padding_waste_ratio": round(1 - self.real_tokens / self.padded_tokens, 4),
+            "fixed_padding_waste_ratio": round(1 - self.real_tokens / fixed_tokens, 4),
+        }
+
+
+class TrainingPaddingTrainer(Trainer):
+    """Trainer that pads evaluation batches with a plain collator.
+
+    Trainer reuses ``data_collator`` for every per-epoch evaluation, which
+    would mix eval batches into the training padding figures.
+    """
+
+    def __init__(self, *args, eval_data_collator=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.eval_data_collator = eval_data_collator or DataCollatorWithPadding(self.tokenizer)
+
+    def _with_eval_collator(self, build):
+        train_collator, self.data_collator = self.data_collator, self.eval_data_collator
+        try:
+            return build()
+        finally:
+            self.data_collator = train_collator
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        return self._with_eval_collator(lambda: super(TrainingPaddingTrainer, self).get_eval_dataloader(eval_dataset))
+
+    def get_test_dataloader(self, test_dataset):
+        return self._with_eval_collator(lambda: super(TrainingPaddingTrainer, self).get_test_dataloader(test_dataset))
+
+
+def attach_token_ids(
+    dataset,
+    tokenizer,
+    max_length: int,
+    token_cache: Optional[TokenCache],
+    window_stride: Optional[int] = None,
+):
+    """Add ``input_ids`` (unpadded) and the ``length`` column read by the length-grouped sampler.
+
+    With ``window_stride`` set, a text longer than ``max_length`` becomes one
+    row per window, each with the text's labels. Returns the dataset and, in
+    windowed mode, the source-row index of every window (else ``None``).
+    """
+    if window_stride is None:
+        input_ids = encode_texts(tokenizer, dataset["text"], max_length, token_cache)
+        owners = None
+    else:
+        bodies = encode_texts(tokenizer, dataset["text"], None, token_cache)
+        input_ids, owners = split_windows(tokenizer, bodies, max_length, window_stride)
+        if len(owners) > len(dataset):
+            LOGGER.info("Sliding windows: %d texts -> %d windows", len(dataset), len(owners))
+        dataset = dataset.select(owners)
+    dataset = dataset.add_column("input_ids", input_ids)
+    return dataset.add_column("length", [len(ids) for ids in input_ids]), owners
+
+
+def pool_eval_windows(logits, label_arrays, owners, pooling: str):
+    """Per-text logits and label rows from per-window evaluation outputs."""
+    if owners is None:
+        return logits, label_arrays
+    first = first_window_rows(owners)
+    pooled = pool_window_logits(logits, owners, len(first), pooling)
+    return pooled, tuple(array[first] for array in label_arrays)
+
+
+def build_training_args(args: argparse.Namespace, output_dir: Path, **overrides) -> TrainingArguments:
+    return TrainingArguments(
+        output_dir=str(output_dir),
+        learning_rate=args.learning_rate,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size,
+        num_train_epochs=args.epochs,
+        weight_decay=args.weight_decay,
+        warmup_ratio=args.warmup_ratio,
+        evaluation_strategy="epoch",
+        save_strategy="epoch",
+        logging_steps=50,
+        load_best_model_at_end=True,
+        metric_for_best_model="f1",
+        seed=args.seed,
+        group_by_length=args.group_by_length,
+        length_column_name="length",
+        push_to_hub=args.push_to_hub,
+        report_to=["none"],
+        **overrides,
+    )
+
+
+def log_padding_stats(collator: PaddingStatsCollator) -> Dict[str, float]:
+    padding_stats = collator.summary()
+    LOGGER.info(
+        "Padding waste: %.1f%% of batch positions (fixed max_length=%d padding would waste %.1f%%)",
+        100 * padding_stats["padding_waste_ratio"],
+        collator.max_length,
+        100 * padding_stats["fixed_padding_waste_ratio"],
+    )
+    return padding_stats
+
+
+def resolve_multi_head_datasets(entries: List[str]) -> Dict[str, Path]:
+    if entries:
+        datasets: Dict[str, Path] = {}
+        for entry in entries:
+            name, _, path = entry.partition("=")
+            if name not in CATEGORY_REGISTRY or not path:
+                raise SystemExit(f"Invalid --multi-head-dataset '{entry}'; expected CATEGORY=PATH")
+            datasets[name] = Path(path)
+        return datasets
+    datasets = {}
+    for name in CATEGORY_REGISTRY:
+        path = latest_processed_dataset(name)
+        if path is None:
+            LOGGER.warning("No processed dataset for '%s'; its head will not be trained", name)
+            continue
+        datasets[name] = path
+    return datasets
+
+
+def train_multi_head(args: argparse.Namespace) -> None:
+    """Jointly train a shared encoder with one head per category on the union of their datasets."""
+    import numpy as np  # type: ignore
+
+    from multi_head_model import MultiHeadClassifier, label_layout, merge_category_records
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    dataset_paths = resolve_multi_head_datasets(args.multi_head_dataset)
+    if not dataset_paths:
+        raise SystemExit("No datasets found for multi-head training")
+    heads = {name: CATEGORY_REGISTRY[name].label_list for name in dataset_paths}
+    layout = label_layout(heads)
+    for name, path in dataset_paths.items():
+        LOGGER.info("Head '%s': %s", name, path)
+    records = merge_category_records({name: load_jsonl(path) for name, path in dataset_paths.items()}, heads)
+    LOGGER.info("Union of %d datasets: %d distinct texts", len(dataset_paths), len(records))
+    split = Dataset.from_list(records).train_test_split(test_size=args.eval_split, seed=42)
+
+    max_length = max(CATEGORY_REGISTRY[name].max_length for name in heads)
+    tokenizer = AutoTokenizer.from_pretrained(args.base_model)
+    token_cache = None if args.no_token_cache else TokenCache(tokenizer, Path(args.token_cache))
+    train_dataset, _ = attach_token_ids(split["train"], tokenizer, max_length, token_cache, args.window_stride)
+    eval_dataset, eval_owners = attach_token_ids(split["test"], tokenizer, max_length, token_cache, args.window_stride)
+
+    model = MultiHeadClassifier.from_encoder(args.base_model, heads)
+    # Both tensors are passed to the model and handed to compute_metrics as label_ids.
+    training_args = build_training_args(args, output_dir, label_names=["labels", "label_mask"])
+
+    def compute_metrics(eval_preds):
+        from sklearn.metrics import classification_report  # type: ignore
+
+        logits, (labels, mask) = pool_eval_windows(
+            eval_preds.predictions, eval_preds.label_ids, eval_owners, args.window_pooling
+        )
+        preds = (1 / (1 + np.exp(-logits)) >= 0.5).astype(int)
+        reports = {}
+        metrics: Dict[str, float] = {}
+        for name, (start, end) in layout.items():
+            rows = mask[:, start] > 0
+            if not rows.any():
+                continue
+            report = classification_report(
+                labels[rows, start:end].astype(int),
+                preds[rows, start:end],
+                target_names=heads[name],
+                output_dict=True,
+                zero_division=0,
+            )
+            reports[name] = report
+            metrics[f"{name}_f1"] = report["micro avg"]["f1-score"]
+            metrics[f"{name}_macro_f1"] = report["macro avg"]["f1-score"]
+        # Model selection weighs every head equally, regardless of dataset size.
+        head_f1 = [metrics[f"{name}_f1"] for name in reports]
+        metrics["f1"] = float(np.mean(head_f1)) if head_f1 else 0.0
+        metrics_path = output_dir / "metrics.json"
+        with metrics_path.open("w", encoding="utf-8") as handle:
+            json.dump(reports, handle, indent=2)
+        LOGGER.info("Saved per-category metrics to %s", metrics_path)
+        return metrics
+
+    collator = PaddingStatsCollator(tokenizer, max_length)
+    trainer = TrainingPaddingTrainer(
+        model=model,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset,
+        tokenizer=tokenizer,
+        data_collator=collator,
+        eval_data_collator=DataCollatorWithPadding(tokenizer),
+        compute_metrics=compute_metrics,
+    )
+    trainer.train()
+    padding_stats = log_padding_stats(collator)
+    model.save_pretrained(output_dir, base_model=args.base_model)
+    tokenizer.save_pretrained(output_dir)
+
+    config_path = output_dir / "category_config.json"
+    with config_path.open("w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "category": "multi_head",
+                "heads": heads,
+                "datasets": {name: str(path) for name, path in dataset_paths.items()},
+                "max_length": max_length,
+                "window_stride": args.window_stride,
+                "window_pooling": args.window_pooling,
+                "base_model": args.base_model,
+                "epochs": args.epochs,
+                "learning_rate": args.learning_rate,
+                "batch_size": args.batch_size,
+                "weight_decay": args.weight_decay,
+                "warmup_ratio": args.warmup_ratio,
+                "group_by_length": args.group_by_length,
+                **padding_stats,
+            },
+            handle,
+            indent=2,
+        )
+    LOGGER.info("Saved multi-head config to %s", config_path)
+
+
 def main() -> None:
     args = parse_args()
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 
+    if args.multi_head:
+        train_multi_head(args)
+        return
+
     category = CATEGORY_REGISTRY[args.category]
     dataset_path = Path(args.dataset)
     output_dir = Path(args.output_dir)
@@ -117,16 +422,14 @@ def main() -> None:
 
     tokenizer = AutoTokenizer.from_pretrained(args.base_model)
 
-    def tokenize_batch(batch: Dict[str, List[str]]):
-        return tokenizer(
-            batch["text"],
-            truncation=True,
-            padding="max_length",
-            max_length=category.max_length,
-        )
-
-    train_dataset = train_dataset.map(tokenize_batch, batched=True)
-    eval_dataset = eval_dataset.map(tokenize_batch, batched=True)
+    token_cache = None if args.no_token_cache else TokenCache(tokenizer, Path(args.token_cache))
+    # Padding happens per batch in the collator.
+    train_dataset, _ = attach_token_ids(train_dataset, tokenizer, category.max_length, token_cache, args.window_stride)
+    eval_dataset, eval_owners = attach_token_ids(
+        eval_dataset, tokenizer, category.max_length, token_cache, args.window_stride
+    )
+    if token_cache is not None:
+        LOGGER.info("Token cache: %d hits, %d texts tokenized", token_cache.hits, token_cache.misses)
 
     model = AutoModelForSequenceClassification.from_pretrained(
         args.base_model,
@@ -134,29 +437,14 @@ def main() -> None:
         problem_type="multi_label_classification",
     )
 
-    training_args = TrainingArguments(
-        output_dir=str(output_dir),
-        learning_rate=args.learning_rate,
-        per_device_train_batch_size=args.batch_size,
-        per_device_eval_batch_size=args.batch_size,
-        num_train_epochs=args.epochs,
-        weight_decay=args.weight_decay,
-        warmup_ratio=args.warmup_ratio,
-        evaluation_strategy="epoch",
-        save_strategy="epoch",
-        logging_steps=50,
-        load_best_model_at_end=True,
-        metric_for_best_model="f1",
-        seed=args.seed,
-        push_to_hub=args.push_to_hub,
-        report_to=["none"],
-    )
+    training_args = build_training_args(args, output_dir)
 
     def compute_metrics(eval_preds):
         from sklearn.metrics import classification_report  # type: ignore
         import numpy as np  # type: ignore
 
-        logits, labels = eval_preds
+        # Windowed evaluation scores each text once, from its pooled window logits.
+        logits, (labels,) = pool_eval_windows(eval_preds.predictions, (eval_preds.label_ids,), eval_owners, args.window_pooling)
         probs = 1 / (1 + np.exp(-logits))
         preds = (probs >= 0.5).astype(int)
 
@@ -180,16 +468,20 @@ def main() -> None:
         LOGGER.info("Saved detailed metrics to %s", metrics_path)
         return metrics
 
-    trainer = Trainer(
+    collator = PaddingStatsCollator(tokenizer, category.max_length)
+    trainer = TrainingPaddingTrainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=eval_dataset,
         tokenizer=tokenizer,
+        data_collator=collator,
+        eval_data_collator=DataCollatorWithPadding(tokenizer),
         compute_metrics=compute_metrics,
     )
 
     trainer.train()
+    padding_stats = log_padding_stats(collator)
     trainer.save_model()
     tokenizer.save_pretrained(output_dir)
 
@@ -199,12 +491,17 @@ def main() -> None:
             {
                 "category": category.name,
                 "label_list": category.label_list,
+                "max_length": category.max_length,
+                "window_stride": args.window_stride,
+                "window_pooling": args.window_pooling,
                 "base_model": args.base_model,
                 "epochs": args.epochs,
                 "learning_rate": args.learning_rate,
                 "batch_size": args.batch_size,
                 "weight_decay": args.weight_decay,
                 "warmup_ratio": args.warmup_ratio,
+                "group_by_length": args.group_by_length,
+                **padding_stats,
             },
             handle,
             indent=2,